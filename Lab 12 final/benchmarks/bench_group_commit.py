@@ -0,0 +1,98 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_data_dir
+from model.bill_model import Bill, BillModel
+from model.product_model import ProductModel
+from model.text_storage import TextStorage
+from model.user_model import User
+
+# (window in ms, max batch); None saves every bill on its own
+SETTINGS = [None, (0, 64), (1, 64), (5, 64), (5, 256), (20, 256)]
+
+def open_backend(backend, data_dir):
+    """Open a text or SQLite storage on a fresh synthetic data directory"""
+    if backend == "sqlite":
+        from model.sqlite_storage import SQLiteStorage
+        storage = SQLiteStorage(os.path.join(data_dir, "smartmart.db"))
+        storage.import_text_data(TextStorage(data_dir))
+        return storage
+    return TextStorage(data_dir)
+
+def run_setting(backend, setting, threads, bills_per_thread, products=1000, seed=0):
+    """Save bills from several threads at once and measure the bills saved per second"""
+    with tempfile.TemporaryDirectory() as data_dir:
+        make_data_dir(data_dir, products, seed)
+        storage = open_backend(backend, data_dir)
+        if backend == "text":
+            storage.ledger_compact_threshold = 1 << 40  # Measure the writes, not compaction
+        product_model = ProductModel(storage)
+        catalog = product_model.get_all_products()
+        bill_model = BillModel(product_model)
+        if setting is not None:
+            bill_model.use_group_commit(setting[0] / 1000, setting[1])
+        
+        failures = []
+        def cashier(number):
+            rng = random.Random(seed + number)
+            user = User(f"cashier{number}", "", "cashier")
+            for _ in range(bills_per_thread):
+                bill = Bill(user)
+                for product in rng.sample(catalog, 3):
+                    bill.add_item(product, 1)
+                bill.apply_payment_method(rng.choice(["cash", "card"]))
+                success, message = bill_model.save_bill(bill)
+                if not success:
+                    failures.append(message)
+        
+        workers = [threading.Thread(target=cashier, args=(number,)) for number in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        
+        if failures:
+            raise RuntimeError(f"{len(failures)} bills failed, e.g. {failures[0]}")
+        committer = bill_model.group_commit
+        return dict(backend=backend,
+                    window_ms=setting[0] if setting else None,
+                    max_batch=setting[1] if setting else None,
+                    threads=threads,
+                    bills=threads * bills_per_thread,
+                    bills_per_second=threads * bills_per_thread / elapsed,
+                    mean_batch=committer.bills / committer.batches if committer else 1.0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bill throughput with and without group commit")
+    parser.add_argument("--backends", nargs="+", default=["text", "sqlite"], choices=["text", "sqlite"])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--bills", type=int, default=50, help="bills saved by each thread")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    
+    report = [run_setting(backend, setting, args.threads, args.bills)
+              for backend in args.backends for setting in SETTINGS]
+    
+    columns = ["backend", "window_ms", "max_batch", "threads", "bills", "bills_per_second", "mean_batch"]
+    print("".join(f"{column:>18}" for column in columns))
+    for row in report:
+        print("".join(f"{row[column]:>18.1f}" if isinstance(row[column], float) else f"{str(row[column]):>18}"
+                      for column in columns))
+    
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import CATEGORIES, generate_products, make_data_dir
+from model.binary_storage import BinaryStorage, csv_to_binary
+from model.text_storage import TextStorage
+
+def timed(function, repeat=1):
+    """Run function repeat times and return the mean time in milliseconds"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+def bench_storage(storage, keys, rng):
+    """Time the catalog operations the cashier and admin screens use"""
+    results = {}
+    results["cold_load_ms"] = timed(storage.get_categories)
+    results["category_read_ms"] = timed(lambda: storage.get_products_by_category(rng.choice(CATEGORIES)), 20)
+    results["lookup_ms"] = timed(lambda: storage.get_product(*rng.choice(keys)), 1000)
+    results["stock_update_ms"] = timed(lambda: storage.update_stock(*rng.choice(keys), rng.randint(50, 5000)), 200)
+    results["checkout_ms"] = timed(lambda: storage.decrement_stock({key: 1 for key in rng.sample(keys, 5)}), 200)
+    return results
+
+def run(sizes, seed=0):
+    """Benchmark products.txt against products.bin at each catalog size"""
+    report = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            make_data_dir(data_dir, size, seed)
+            keys = [(category, name) for category, name, _, _ in generate_products(size, seed)]
+            csv_size = os.path.getsize(os.path.join(data_dir, "products.txt"))
+            
+            convert_ms = timed(lambda: csv_to_binary(os.path.join(data_dir, "products.txt"),
+                                                     os.path.join(data_dir, "products.bin")))
+            binary_size = os.path.getsize(os.path.join(data_dir, "products.bin"))
+            
+            text = TextStorage(data_dir)
+            text.ledger_compact_threshold = 1 << 40  # Measure the ledger, not compaction
+            report.append(dict(format="csv", size=size, file_bytes=csv_size,
+                               **bench_storage(text, keys, random.Random(seed))))
+            
+            binary = BinaryStorage(data_dir)
+            report.append(dict(format="binary", size=size, file_bytes=binary_size, convert_ms=convert_ms,
+                               **bench_storage(binary, keys, random.Random(seed))))
+            binary.close()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the CSV and binary product catalog formats")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    
+    report = run(args.sizes)
+    
+    columns = ["format", "size", "file_bytes", "cold_load_ms", "category_read_ms",
+               "lookup_ms", "stock_update_ms", "checkout_ms"]
+    print("".join(f"{column:>18}" for column in columns))
+    for row in report:
+        print("".join(f"{row[column]:>18.3f}" if isinstance(row[column], float) else f"{row[column]:>18}"
+                      for column in columns))
+    
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_products
+from model.search_index import SearchIndex
+
+def queries(keys, rng, count):
+    """Make type-ahead queries: name prefixes, single words and misspelled words"""
+    made = []
+    for _ in range(count):
+        name = rng.choice(keys)[1].lower()
+        kind = rng.randrange(3)
+        if kind == 0:
+            made.append(name[:rng.randint(1, len(name))])
+        elif kind == 1:
+            made.append(rng.choice(name.split()))
+        else:
+            word = rng.choice(name.split())
+            position = rng.randrange(len(word))
+            made.append(word[:position] + word[position + 1:] or word)
+    return made
+
+def run(sizes, count=1000, seed=0):
+    """Time building the index and searching it at each catalog size"""
+    report = []
+    for size in sizes:
+        rng = random.Random(seed)
+        keys = [(category, name) for category, name, _, _ in generate_products(size, seed)]
+        
+        start = time.perf_counter()
+        index = SearchIndex(keys)
+        build_ms = (time.perf_counter() - start) * 1000
+        
+        times = []
+        for query in queries(keys, rng, count):
+            start = time.perf_counter()
+            index.search(query, 20)
+            times.append((time.perf_counter() - start) * 1000)
+        times.sort()
+        
+        start = time.perf_counter()
+        for i in range(100):
+            index.add(("Toys", f"Benchmark Kite {i}"))
+        add_ms = (time.perf_counter() - start) * 1000 / 100
+        
+        report.append(dict(size=size, build_ms=build_ms, add_ms=add_ms,
+                           median_ms=times[len(times) // 2],
+                           p99_ms=times[int(len(times) * 0.99)],
+                           max_ms=times[-1]))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the type-ahead product search index")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    
+    report = run(args.sizes, args.queries)
+    
+    columns = ["size", "build_ms", "add_ms", "median_ms", "p99_ms", "max_ms"]
+    print("".join(f"{column:>14}" for column in columns))
+    for row in report:
+        print("".join(f"{row[column]:>14.3f}" if isinstance(row[column], float) else f"{row[column]:>14}"
+                      for column in columns))
+    
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import CATEGORIES, generate_products, make_data_dir, write_bills, write_cashiers
+
+# A later run is a regression when its median is this many times the baseline's
+REGRESSION_THRESHOLD = 1.25
+# Cases faster than this are too noisy to flag
+REGRESSION_FLOOR_MS = 0.05
+
+def measure(function, repeat):
+    """Run function repeat times and return (median, p95) in milliseconds"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[min(len(times) - 1, int(len(times) * 0.95))]
+
+def prepare_backend(backend, data_dir):
+    """Convert the synthetic text data for the backend, as main.py does on first start"""
+    os.environ["SMARTMART_STORAGE"] = backend
+    os.environ.pop("SMARTMART_DB", None)
+    if backend == "binary":
+        from model.binary_storage import csv_to_binary
+        csv_to_binary(os.path.join(data_dir, "products.txt"), os.path.join(data_dir, "products.bin"))
+    elif backend == "sqlite":
+        from migrate_data import migrate
+        migrate(data_dir)
+
+def bench_cases(products, cashiers, seed):
+    """Time each model and controller operation on the data directory in the current directory"""
+    from controller.admin_controller import AdminController
+    from controller.auth_controller import AuthController
+    from controller.cashier_controller import CashierController
+    from model.bill_model import Bill
+    from model.product_model import ProductModel
+    from model.user_model import User
+    
+    rng = random.Random(seed)
+    keys = [(category, name) for category, name, _, _ in products]
+    results = {}
+    
+    def load_catalog():
+        ProductModel().get_categories()
+    results["catalog_load"] = measure(load_catalog, 3)
+    
+    controller = CashierController(User("cashier00000", "", "cashier"))
+    controller.product_model.warm_indexes()
+    results["category_filter"] = measure(
+        lambda: controller.get_products_by_category(rng.choice(CATEGORIES)), 10)
+    results["category_page"] = measure(
+        lambda: controller.get_products_page(rng.choice(CATEGORIES), rng.randrange(1000), 50, "price"), 100)
+    results["product_lookup"] = measure(lambda: controller.get_product(*rng.choice(keys)), 1000)
+    
+    def add_to_cart():
+        if len(controller.get_cart_items()) >= 50:
+            controller.new_bill(controller.current_bill.cashier)
+        controller.add_to_cart(controller.get_product(*rng.choice(keys)), 1)
+    results["add_to_cart"] = measure(add_to_cart, 1000)
+    
+    def save_bill():
+        bill = Bill(controller.current_bill.cashier)
+        for key in rng.sample(keys, 3):
+            bill.add_item(controller.get_product(*key), 1)
+        bill.apply_payment_method(rng.choice(["cash", "card"]))
+        success, message = controller.bill_model.save_bill(bill)
+        if not success:
+            raise RuntimeError(message)
+    results["save_bill"] = measure(save_bill, 50)
+    
+    results["stock_update"] = measure(
+        lambda: controller.product_model.update_stock(*rng.choice(keys), rng.randint(50, 5000)), 200)
+    controller.close()
+    
+    def first_login():
+        if not AuthController().login(f"cashier{rng.randrange(cashiers):05d}", "cashier123", "cashier"):
+            raise RuntimeError("Login failed")
+    results["login_first"] = measure(first_login, 3)
+    
+    auth = AuthController()
+    auth.login("cashier00000", "cashier123", "cashier")
+    results["login"] = measure(lambda: auth.login("cashier00000", "cashier123", "cashier"), 1000)
+    
+    results["dashboard"] = measure(lambda: AdminController().get_dashboard_snapshot(), 3)
+    return results
+
+def run(product_sizes, bill_sizes, backend="text", cashiers=1000, seed=0):
+    """Run every case on synthetic data at each catalog and bill history size"""
+    from model.user_model import hash_password
+    password_hash = hash_password("cashier123")
+    start_dir = os.getcwd()
+    report = []
+    for product_count in product_sizes:
+        products = list(generate_products(product_count, seed))
+        for bill_count in bill_sizes:
+            with tempfile.TemporaryDirectory() as root:
+                data_dir = make_data_dir(os.path.join(root, "data"), product_count, seed)
+                write_bills(data_dir, bill_count, products, seed)
+                write_cashiers(os.path.join(data_dir, "cashiers.txt"), cashiers, password_hash)
+                prepare_backend(backend, data_dir)
+                
+                # The controllers open data/ in the working directory
+                os.chdir(root)
+                try:
+                    cases = bench_cases(products, cashiers, seed)
+                finally:
+                    os.chdir(start_dir)
+            for case, (median_ms, p95_ms) in cases.items():
+                report.append(dict(case=case, backend=backend, products=product_count, bills=bill_count,
+                                   median_ms=median_ms, p95_ms=p95_ms))
+    return report
+
+def compare(baseline, report, threshold=REGRESSION_THRESHOLD, floor_ms=REGRESSION_FLOOR_MS):
+    """Find the cases whose median got slower than threshold times the baseline's"""
+    key = lambda row: (row["case"], row["backend"], row["products"], row["bills"])
+    before = {key(row): row for row in baseline}
+    regressions = []
+    for row in report:
+        old = before.get(key(row))
+        if old is None or row["median_ms"] < floor_ms:
+            continue
+        if row["median_ms"] > old["median_ms"] * threshold:
+            regressions.append(dict(row, baseline_ms=old["median_ms"],
+                                    ratio=row["median_ms"] / max(old["median_ms"], 1e-9)))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the models and controllers on synthetic data")
+    parser.add_argument("--products", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--bills", type=int, nargs="+", default=[10000, 1000000])
+    parser.add_argument("--backend", default="text", choices=["text", "binary", "sqlite"])
+    parser.add_argument("--cashiers", type=int, default=1000)
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run; exit 1 if a case got slower")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="slowdown ratio that counts as a regression")
+    args = parser.parse_args()
+    
+    report = run(args.products, args.bills, args.backend, args.cashiers)
+    
+    columns = ["case", "backend", "products", "bills", "median_ms", "p95_ms"]
+    print("".join(f"{column:>16}" for column in columns))
+    for row in report:
+        print("".join(f"{row[column]:>16.3f}" if isinstance(row[column], float) else f"{row[column]:>16}"
+                      for column in columns))
+    
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({"created": datetime.datetime.now().isoformat(timespec="seconds"),
+                       "python": platform.python_version(),
+                       "platform": platform.platform(),
+                       "results": report}, file, indent=2)
+    
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(baseline, report, args.threshold)
+        for row in regressions:
+            print(f"REGRESSION {row['case']} ({row['backend']}, {row['products']} products, {row['bills']} bills): "
+                  f"{row['baseline_ms']:.3f} ms -> {row['median_ms']:.3f} ms ({row['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_suite import prepare_backend
+from benchmarks.synthetic import make_data_dir
+
+def simulate_cashier(number, settings, barrier, results):
+    """Work one till: browse, fill a basket, pick cash or card and save, until the run ends
+    
+    settings holds bills, duration, rate, basket, hot and seed (see main).
+    Each checkout is timed from save_bill until the bill is reported saved.
+    The outcome is put on results as a dict.
+    """
+    from controller.cashier_controller import CashierController
+    from model.user_model import User
+    
+    rng = random.Random(settings["seed"] + number)
+    controller = CashierController(User(f"load{number:03d}", "", "cashier"))
+    categories = controller.get_categories()
+    hot = None
+    if settings["hot"]:
+        hot = [(product.category, product.name) for product in controller.product_model.get_all_products()
+               [:settings["hot"]]]
+    outcome = dict(number=number, latencies=[], bill_numbers=[], sold={}, rejected=0, errors=[])
+    
+    def saved(success, message, bill):
+        if success:
+            outcome["bill_numbers"].append(bill.number)
+            for item in bill.items:
+                key = (item.product.category, item.product.name)
+                outcome["sold"][key] = outcome["sold"].get(key, 0) + item.quantity
+        elif "Insufficient stock" in message or "Product not found" in message:
+            outcome["rejected"] += 1
+        else:
+            outcome["errors"].append(message)
+    
+    barrier.wait()
+    outcome["started"] = time.time()
+    deadline = outcome["started"] + settings["duration"] if settings["duration"] else None
+    interval = 1 / settings["rate"] if settings["rate"] else 0
+    next_bill = time.perf_counter()
+    count = 0
+    while (count < settings["bills"]) if deadline is None else (time.time() < deadline):
+        if interval:
+            time.sleep(max(0, next_bill - time.perf_counter()))
+            next_bill += interval
+        
+        # Browse a page of a category, then fill the basket from it (or from the hot products)
+        category = rng.choice(categories)
+        total, page = controller.get_products_page(category, 0, 50)
+        if total > 50:
+            total, page = controller.get_products_page(category, rng.randrange(total - 49), 50)
+        for _ in range(rng.randint(1, settings["basket"])):
+            product = controller.get_product(*rng.choice(hot)) if hot else rng.choice(page)
+            controller.add_to_cart(product, rng.randint(1, 3))
+        if not controller.get_cart_items():
+            # Everything picked was sold out
+            outcome["rejected"] += 1
+            count += 1
+            continue
+        controller.apply_payment_method(rng.choice(["cash", "card"]))
+        
+        start = time.perf_counter()
+        controller.save_bill(saved)
+        controller.flush_commits()
+        outcome["latencies"].append((time.perf_counter() - start) * 1000)
+        count += 1
+        
+        # A bill that was rejected comes back as the current bill; drop it
+        controller.new_bill(controller.current_bill.cashier)
+    outcome["finished"] = time.time()
+    controller.close()
+    results.put(outcome)
+
+def run_process_cashier(number, settings, root, barrier, results):
+    """Entry point of a cashier process; the controllers open data/ in the working directory"""
+    os.chdir(root)
+    simulate_cashier(number, settings, barrier, results)
+
+def run_cashiers(root, cashiers, mode, settings):
+    """Run the simulated cashiers as threads or processes and collect their outcomes"""
+    if mode == "thread":
+        import queue
+        barrier, results = threading.Barrier(cashiers), queue.Queue()
+        start_dir = os.getcwd()
+        os.chdir(root)
+        try:
+            workers = [threading.Thread(target=simulate_cashier, args=(number, settings, barrier, results))
+                       for number in range(cashiers)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        finally:
+            os.chdir(start_dir)
+        return [results.get() for _ in range(cashiers)]
+    
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(cashiers), context.Queue()
+    workers = [context.Process(target=run_process_cashier, args=(number, settings, root, barrier, results))
+               for number in range(cashiers)]
+    for worker in workers:
+        worker.start()
+    # Read the results before joining, so no process blocks on a full queue
+    outcomes = [results.get() for _ in range(cashiers)]
+    for worker in workers:
+        worker.join()
+    return outcomes
+
+def check_consistency(storage, stock_before, numbers_before, outcomes):
+    """Compare the stored stock and bills with what the cashiers were told was saved"""
+    problems = []
+    sold = {}
+    for outcome in outcomes:
+        for key, quantity in outcome["sold"].items():
+            sold[key] = sold.get(key, 0) + quantity
+    for product in storage.get_all_products():
+        key = (product.category, product.name)
+        expected = stock_before.get(key, 0) - sold.get(key, 0)
+        if product.stock != expected:
+            problems.append(f"Stock of {product.name} is {product.stock}, expected {expected}")
+    
+    reported = [number for outcome in outcomes for number in outcome["bill_numbers"]]
+    stored = [record["number"] for record in storage.iter_bills()]
+    for label, numbers in (("reported", reported), ("stored", stored)):
+        seen = set()
+        for number in numbers:
+            if number in seen:
+                problems.append(f"Bill number {number} {label} more than once")
+            seen.add(number)
+    new = set(stored) - numbers_before
+    for number in sorted(set(reported) - new):
+        problems.append(f"Bill {number} was reported saved but is not stored")
+    for number in sorted(new - set(reported)):
+        problems.append(f"Bill {number} is stored but was not reported saved")
+    if new and len(new) != max(new) - min(new) + 1:
+        problems.append(f"Bill numbers {min(new)}-{max(new)} have {max(new) - min(new) + 1 - len(new)} gaps")
+    return problems
+
+def percentile(values, fraction):
+    """Get a percentile of a sorted list"""
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+def run(root, cashiers, mode, settings):
+    """Drive the tills against the data directory in root and summarise throughput, latency and consistency"""
+    from model.storage import open_storage
+    storage = open_storage(os.path.join(root, "data"))
+    stock_before = {(product.category, product.name): product.stock for product in storage.get_all_products()}
+    numbers_before = {record["number"] for record in storage.iter_bills()}
+    
+    outcomes = run_cashiers(root, cashiers, mode, settings)
+    
+    storage = open_storage(os.path.join(root, "data"))
+    problems = check_consistency(storage, stock_before, numbers_before, outcomes)
+    latencies = sorted(latency for outcome in outcomes for latency in outcome["latencies"])
+    saved = sum(len(outcome["bill_numbers"]) for outcome in outcomes)
+    elapsed = max(outcome["finished"] for outcome in outcomes) - min(outcome["started"] for outcome in outcomes)
+    summary = dict(backend=os.environ.get("SMARTMART_STORAGE", "text"), mode=mode, cashiers=cashiers,
+                   saved=saved, rejected=sum(outcome["rejected"] for outcome in outcomes),
+                   errors=sum(len(outcome["errors"]) for outcome in outcomes),
+                   seconds=elapsed, bills_per_second=saved / elapsed if elapsed else 0.0,
+                   p50_ms=percentile(latencies, 0.50), p95_ms=percentile(latencies, 0.95),
+                   p99_ms=percentile(latencies, 0.99), inconsistencies=len(problems))
+    return summary, problems, [error for outcome in outcomes for error in outcome["errors"]]
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate busy tills saving bills against one data directory")
+    parser.add_argument("--root", help="directory holding the data/ folder to use (default: a fresh "
+                                       "synthetic one); set SMARTMART_STORAGE for other backends")
+    parser.add_argument("--products", type=int, default=10000, help="size of the synthetic catalog")
+    parser.add_argument("--cashiers", type=int, default=8)
+    parser.add_argument("--mode", default="process", choices=["process", "thread"])
+    parser.add_argument("--bills", type=int, default=100, help="bills saved by each cashier")
+    parser.add_argument("--duration", type=float, default=0, help="run for this many seconds instead of --bills")
+    parser.add_argument("--rate", type=float, default=0, help="bills per second per cashier (0: as fast as possible)")
+    parser.add_argument("--basket", type=int, default=5, help="most products in one basket")
+    parser.add_argument("--hot", type=int, default=0, help="only sell the first N products, so tills compete for stock")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args()
+    
+    settings = dict(bills=args.bills, duration=args.duration, rate=args.rate, basket=args.basket,
+                    hot=args.hot, seed=args.seed)
+    if args.root:
+        summary, problems, errors = run(os.path.abspath(args.root), args.cashiers, args.mode, settings)
+    else:
+        with tempfile.TemporaryDirectory() as root:
+            data_dir = make_data_dir(os.path.join(root, "data"), args.products, args.seed)
+            prepare_backend(os.environ.get("SMARTMART_STORAGE", "text").lower(), data_dir)
+            summary, problems, errors = run(root, args.cashiers, args.mode, settings)
+    
+    for column, value in summary.items():
+        print(f"{column:>18}  {value:.3f}" if isinstance(value, float) else f"{column:>18}  {value}")
+    for message in errors[:10]:
+        print(f"ERROR {message}")
+    for problem in problems[:20]:
+        print(f"INCONSISTENT {problem}")
+    
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(dict(summary, problems=problems, error_messages=errors), file, indent=2)
+
+if __name__ == "__main__":
+    main()
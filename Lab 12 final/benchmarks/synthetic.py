@@ -0,0 +1,75 @@
+import datetime
+import json
+import os
+import random
+
+CATEGORIES = ["Electronics", "Clothing", "Groceries", "Home Decor", "Books",
+              "Toys", "Sports", "Garden", "Beauty", "Automotive"]
+
+def product_name(category, number):
+    """Name the nth synthetic product of a category"""
+    return f"{category} Item {number:07d}"
+
+def generate_products(count, seed=0):
+    """Yield (category, name, price, stock) tuples for a synthetic catalog"""
+    rng = random.Random(seed)
+    for number in range(count):
+        category = CATEGORIES[number % len(CATEGORIES)]
+        yield category, product_name(category, number), round(rng.uniform(0.5, 2000.0), 2), rng.randint(50, 5000)
+
+def write_products_csv(path, count, seed=0):
+    """Write a synthetic products.txt with count products"""
+    with open(path, 'w') as file:
+        for category, name, price, stock in generate_products(count, seed):
+            file.write(f"{category},{name},{price},{stock}\n")
+
+def generate_bills(count, products, seed=0, days=365):
+    """Yield bill records (see Bill.to_record) spread over the last days days, today included
+    
+    products is a list of (category, name, price, stock) tuples to sell from.
+    """
+    rng = random.Random(seed)
+    today = datetime.datetime.combine(datetime.date.today(), datetime.time(9))
+    for number in range(1, count + 1):
+        items = []
+        for category, name, price, _ in rng.sample(products, rng.randint(1, 5)):
+            quantity = rng.randint(1, 3)
+            items.append({"category": category, "name": name, "price": price,
+                          "quantity": quantity, "subtotal": round(price * quantity, 2)})
+        total = round(sum(item["subtotal"] for item in items), 2)
+        payment_method = rng.choice(["cash", "card"])
+        discount = round(total * 0.1, 2) if payment_method == "card" else 0.0
+        timestamp = today - datetime.timedelta(days=rng.randrange(days), seconds=rng.randrange(12 * 3600))
+        yield {"number": number, "cashier": f"cashier{rng.randrange(100):05d}",
+               "timestamp": timestamp.isoformat(timespec="seconds"), "payment_method": payment_method,
+               "total": total, "discount": discount, "final_amount": round(total - discount, 2),
+               "items": items}
+
+def write_bills(path, count, products, seed=0):
+    """Write a synthetic bill history (bills.txt, bills.jsonl and the bill sequence) into a data directory"""
+    last_number = 0
+    with open(os.path.join(path, "bills.jsonl"), 'w') as records, open(os.path.join(path, "bills.txt"), 'w') as summaries:
+        for record in generate_bills(count, products, seed):
+            records.write(json.dumps(record, separators=(",", ":")) + "\n")
+            summaries.write(f"Bill {record['number']}: {record['final_amount']:.2f}\n")
+            last_number = record["number"]
+    with open(os.path.join(path, "bills.txt.seq"), 'w') as file:
+        file.write(str(last_number))
+
+def write_cashiers(path, count, password_hash):
+    """Write a cashiers.txt with count accounts that all share one stored password hash"""
+    with open(path, 'w') as file:
+        for number in range(count):
+            file.write(f"cashier{number:05d},{password_hash}\n")
+
+def make_data_dir(path, product_count, seed=0):
+    """Create a data directory with a synthetic catalog and the default accounts"""
+    os.makedirs(path, exist_ok=True)
+    write_products_csv(os.path.join(path, "products.txt"), product_count, seed)
+    with open(os.path.join(path, "admin.txt"), 'w') as file:
+        file.write("admin,admin123\n")
+    with open(os.path.join(path, "cashiers.txt"), 'w') as file:
+        file.write("john,john123\nmary,mary123\nalex,alex123\n")
+    with open(os.path.join(path, "bills.txt"), 'w') as file:
+        pass
+    return path
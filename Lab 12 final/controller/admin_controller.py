@@ -1,10 +1,58 @@
+import datetime
 from model.user_model import UserModel
 from model.product_model import ProductModel
+from model.bill_model import BillModel
+from monitoring.metrics import instrument
 
+# Products with less stock than this count as low stock on the dashboard
+LOW_STOCK_THRESHOLD = 10
+
+@instrument
 class AdminController:
     def __init__(self):
-        self.user_model = UserModel()
         self.product_model = ProductModel()
+        self.user_model = UserModel(self.product_model.storage)
+        self.bill_model = BillModel(self.product_model)
+        
+        # Last dashboard snapshot and the data version it was built from
+        self._dashboard = None
+        self._dashboard_version = None
+    
+    # Dashboard
+    def get_dashboard_snapshot(self):
+        """Get every dashboard figure in one call
+        
+        The catalog is walked once for the product, category, stock value
+        and low stock figures. The result is reused until the stored data
+        changes or the day rolls over.
+        """
+        today = datetime.date.today().isoformat()
+        version = (today, self.product_model.data_version())
+        if self._dashboard is not None and version == self._dashboard_version:
+            return self._dashboard
+        
+        categories = set()
+        stock_value = 0.0
+        low_stock = 0
+        products = self.product_model.get_all_products()
+        for product in products:
+            categories.add(product.category)
+            stock_value += product.price * product.stock
+            if product.stock < LOW_STOCK_THRESHOLD:
+                low_stock += 1
+        bills_today, sales_today = self.bill_model.get_sales_for_day(today)
+        
+        self._dashboard = {
+            "cashiers": len(self.user_model.get_all_cashiers()),
+            "products": len(products),
+            "categories": len(categories),
+            "stock_value": stock_value,
+            "low_stock": low_stock,
+            "bills_today": bills_today,
+            "sales_today": sales_today,
+        }
+        self._dashboard_version = version
+        return self._dashboard
     
     # Cashier management
     def get_all_cashiers(self):
@@ -36,13 +84,22 @@ class AdminController:
         """Get products by category"""
         return self.product_model.get_products_by_category(category)
     
-    def add_product(self, category, name, price, stock):
+    def get_products_page(self, category, offset, limit, sort_key=None):
+        """Get (total, products) for one page of a category (None for every product)"""
+        return self.product_model.get_products_page(category, offset, limit, sort_key)
+    
+    def get_product(self, category, name):
+        """Get a single product by category and name, or None if not found"""
+        return self.product_model.get_product(category, name)
+    
+    def add_product(self, category, name, price, stock, sku=None):
         """Add a new product"""
-        return self.product_model.add_product(category, name, price, stock)
+        return self.product_model.add_product(category, name, price, stock, sku)
     
-    def update_product(self, category, name, new_category, new_name, new_price, new_stock):
+    def update_product(self, category, name, new_category, new_name, new_price, new_stock, new_sku=None):
         """Update an existing product"""
-        return self.product_model.update_product(category, name, new_category, new_name, new_price, new_stock)
+        return self.product_model.update_product(category, name, new_category, new_name, new_price, new_stock,
+                                                 new_sku)
     
     def delete_product(self, category, name):
         """Delete a product"""
@@ -50,4 +107,23 @@ class AdminController:
     
     def update_stock(self, category, name, new_stock):
         """Update a product's stock"""
-        return self.product_model.update_stock(category, name, new_stock) 
\ No newline at end of file
+        return self.product_model.update_stock(category, name, new_stock)
+    
+    # Profiling
+    def toggle_profiling(self, memory=False):
+        """Start profiling this session, or stop it and write the profile"""
+        from monitoring.profiler import profiler
+        return profiler.toggle(memory)
+    
+    # Reports
+    def get_sales_report(self):
+        """Build a sales report over the whole bill history"""
+        try:
+            from model.analytics import SalesReport
+        except ImportError:
+            return False, "Sales reports need NumPy (pip install numpy)"
+        
+        try:
+            return True, SalesReport(self.bill_model.iter_bills())
+        except Exception as e:
+            return False, f"Error building sales report: {str(e)}"
\ No newline at end of file
@@ -1,9 +1,15 @@
 from model.user_model import UserModel
+from monitoring.metrics import instrument
 
+@instrument
 class AuthController:
-    def __init__(self):
+    def __init__(self, park_bills=True):
         self.user_model = UserModel()
         self.current_user = None
+        # Unfinished bills left by cashiers who logged out, by username;
+        # kept in memory until the cashier logs in again on this till
+        self.park_bills = park_bills
+        self.parked_bills = {}
     
     def login(self, username, password, role):
         """Authenticate user based on role"""
@@ -16,8 +22,20 @@ class AuthController:
     
     def logout(self):
         """Log out the current user"""
+        self.user_model.logout()
         self.current_user = None
     
+    def park_bill(self, bill):
+        """Keep a cashier's unfinished bill until they log in again"""
+        if self.park_bills and bill.items:
+            self.parked_bills[bill.cashier.username] = bill
+            return True
+        return False
+    
+    def resume_bill(self, username):
+        """Take back the bill a cashier parked, or None if there is none"""
+        return self.parked_bills.pop(username, None)
+    
     def get_current_user(self):
         """Get the currently logged in user"""
         return self.current_user
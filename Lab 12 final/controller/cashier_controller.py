@@ -1,11 +1,20 @@
+import threading
 from model.product_model import ProductModel
 from model.bill_model import Bill, BillModel
+from model.commit_worker import CommitWorker
+from monitoring.metrics import instrument
 
+@instrument
 class CashierController:
     def __init__(self, cashier_user):
         self.product_model = ProductModel()
-        self.bill_model = BillModel()
+        self.bill_model = BillModel(self.product_model)
         self.current_bill = Bill(cashier_user)
+        # Bills are saved on a background thread, in order
+        self.commits = CommitWorker(self.bill_model.save_bill)
+        # Build the search and SKU indexes in the background so the first
+        # keystroke or scan is fast
+        threading.Thread(target=self.product_model.warm_indexes, daemon=True).start()
     
     def get_categories(self):
         """Get all product categories"""
@@ -15,6 +24,29 @@ class CashierController:
         """Get products by category"""
         return self.product_model.get_products_by_category(category)
     
+    def get_products_page(self, category, offset, limit, sort_key=None):
+        """Get (total, products) for one page of a category"""
+        return self.product_model.get_products_page(category, offset, limit, sort_key)
+    
+    def search(self, query, limit=20):
+        """Get up to limit products matching a type-ahead query, best match first"""
+        return self.product_model.search(query, limit)
+    
+    def get_product(self, category, name):
+        """Get a single product by category and name, or None if not found"""
+        return self.product_model.get_product(category, name)
+    
+    def scan(self, code, qty=1):
+        """Add the product with a scanned SKU or barcode to the current bill
+        
+        The barcode is looked up in the in-memory SKU index and the product,
+        with its current stock, is read from storage.
+        """
+        product = self.product_model.get_product_by_sku(code.strip())
+        if product is None:
+            return False, f"Unknown barcode: {code.strip()}"
+        return self.current_bill.add_item(product, qty)
+    
     def add_to_cart(self, product, quantity):
         """Add a product to the current bill"""
         return self.current_bill.add_item(product, quantity)
@@ -35,9 +67,62 @@ class CashierController:
         """Apply payment method and calculate final amount"""
         return self.current_bill.apply_payment_method(method)
     
-    def save_bill(self):
-        """Save the current bill"""
-        return self.bill_model.save_bill(self.current_bill)
+    def save_bill(self, on_done=None):
+        """Queue the current bill to be saved in the background and start a new one
+        
+        on_done(success, message, bill) is called from poll_commits() once
+        the bill is saved or has failed. A bill that fails is put back as
+        the current bill if that is still empty, so it can be fixed and
+        saved again.
+        """
+        bill = self.current_bill
+        if not bill.items:
+            return False, "Cart is empty"
+        self.current_bill = Bill(bill.cashier)
+        
+        def finished(success, message):
+            # Only back to the same cashier; another may have taken over the till
+            if (not success and not self.current_bill.items
+                    and self.current_bill.cashier.username == bill.cashier.username):
+                self.current_bill = bill
+            if on_done is not None:
+                on_done(success, message, bill)
+        
+        self.commits.submit(bill, finished)
+        return True, "Bill queued for saving"
+    
+    def poll_commits(self):
+        """Report bills that finished saving; call this from the UI thread"""
+        return self.commits.poll()
+    
+    def pending_commits(self):
+        """Number of bills still being saved"""
+        return self.commits.pending
+    
+    def flush_commits(self, timeout=None):
+        """Wait for queued bills to be saved and report them; False if timeout ran out first"""
+        done = self.commits.flush(timeout)
+        self.commits.poll()
+        return done
+    
+    def close(self, timeout=None):
+        """Finish saving queued bills and report them; False if timeout ran out first"""
+        done = self.commits.close(timeout)
+        self.commits.poll()
+        return done
+    
+    def switch_cashier(self, cashier_user, bill=None):
+        """Hand the till to another cashier and return the bill that was open
+        
+        The new cashier continues bill (one they parked earlier) or starts
+        an empty one. The catalog and the commit worker stay loaded; the
+        search and SKU indexes are resynced in the background if the data
+        changed while the till was idle.
+        """
+        previous = self.current_bill
+        self.current_bill = bill if bill is not None else Bill(cashier_user)
+        threading.Thread(target=self.product_model.warm_indexes, daemon=True).start()
+        return previous
     
     def new_bill(self, cashier_user):
         """Create a new bill"""
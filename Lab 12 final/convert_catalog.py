@@ -0,0 +1,23 @@
+import argparse
+from model.binary_storage import binary_to_csv, csv_to_binary, upgrade_binary
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the product catalog between products.txt and products.bin")
+    parser.add_argument("direction", choices=["to-binary", "to-csv", "upgrade"])
+    parser.add_argument("--csv", default="data/products.txt", help="CSV catalog (default: data/products.txt)")
+    parser.add_argument("--binary", default="data/products.bin", help="binary catalog (default: data/products.bin)")
+    args = parser.parse_args()
+    
+    if args.direction == "to-binary":
+        count = csv_to_binary(args.csv, args.binary)
+        print(f"Wrote {count} products to {args.binary}")
+    elif args.direction == "upgrade":
+        count = upgrade_binary(args.binary)
+        print(f"Upgraded {count} products in {args.binary}" if count is not None
+              else f"{args.binary} is already current")
+    else:
+        count = binary_to_csv(args.binary, args.csv)
+        print(f"Wrote {count} products to {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,50 @@
+import argparse
 import os
 import tkinter as tk
 from controller.auth_controller import AuthController
 from controller.admin_controller import AdminController
 from controller.cashier_controller import CashierController
+from model.user_model import hash_password
+from monitoring.profiler import PROFILE_ON_START, profiler
 from view.login_view import LoginView
 from view.admin_view import AdminView
 from view.cashier_view import CashierView
 
 class SmartMartApplication:
-    def __init__(self):
-        """Initialize the Smart Mart System application"""
+    def __init__(self, server=None):
+        """Initialize the Smart Mart System application, or its data server when server options are given"""
         # Create necessary directories if they don't exist
         self.create_directories()
         
         # Create initial data files if they don't exist
         self.create_data_files()
         
+        # In server mode this process owns data/ and the tills connect to it
+        if server is not None:
+            from server.api_server import run_server
+            run_server(server.host, server.port, server.socket)
+            return
+        
+        # SMARTMART_PROFILE profiles the whole session; the admin panel can
+        # also start and stop a profile at any time (Ctrl+Shift+P)
+        if PROFILE_ON_START not in ("", "0", "false", "no"):
+            profiler.start(memory=PROFILE_ON_START == "memory")
+        
         # Initialize controllers
         self.auth_controller = AuthController()
         
+        # One window for the whole session; views are swapped inside it.
+        # The login and cashier views are kept between logins, so the
+        # catalog and its indexes stay warm across shift changes.
+        self.root = tk.Tk()
+        self.root.protocol("WM_DELETE_WINDOW", self.quit)
+        self.current_view = None
+        self.login_view = None
+        self.cashier_view = None
+        
         # Start with login view
         self.show_login()
+        self.root.mainloop()
     
     def create_directories(self):
         """Create necessary directories if they don't exist"""
@@ -31,17 +55,22 @@ class SmartMartApplication:
     
     def create_data_files(self):
         """Create initial data files if they don't exist"""
+        backend = os.environ.get("SMARTMART_STORAGE", "text").lower()
+        # Tills that use a server keep no data of their own
+        if backend == "remote":
+            return
+        
         # admin.txt
         if not os.path.exists("data/admin.txt"):
             with open("data/admin.txt", "w") as f:
-                f.write("admin,admin123\n")
+                f.write(f"admin,{hash_password('admin123')}\n")
         
         # cashiers.txt
         if not os.path.exists("data/cashiers.txt"):
             with open("data/cashiers.txt", "w") as f:
-                f.write("john,john123\n")
-                f.write("mary,mary123\n")
-                f.write("alex,alex123\n")
+                f.write(f"john,{hash_password('john123')}\n")
+                f.write(f"mary,{hash_password('mary123')}\n")
+                f.write(f"alex,{hash_password('alex123')}\n")
         
         # products.txt
         if not os.path.exists("data/products.txt"):
@@ -81,20 +110,42 @@ class SmartMartApplication:
         if not os.path.exists("data/bills.txt"):
             with open("data/bills.txt", "w") as f:
                 pass  # Create empty file
+        
+        # products.bin, converted from products.txt the first time it is used
+        if backend == "binary" and not os.path.exists("data/products.bin"):
+            from model.binary_storage import csv_to_binary
+            csv_to_binary("data/products.txt", "data/products.bin")
+        elif backend == "binary":
+            # Files written before products had SKUs are converted in place
+            from model.binary_storage import upgrade_binary
+            upgrade_binary("data/products.bin")
+        
+        # smartmart.db, seeded from the text files the first time SQLite is used
+        if backend == "sqlite":
+            database = os.environ.get("SMARTMART_DB", "data/smartmart.db")
+            if not os.path.exists(database):
+                from migrate_data import migrate
+                migrate("data", database)
+    
+    def show_view(self, view):
+        """Swap the view shown in the window"""
+        if self.current_view is not None and self.current_view is not view:
+            self.current_view.hide()
+        self.current_view = view
+        view.show()
     
     def show_login(self):
         """Show the login view"""
-        self.current_view = LoginView(self.login)
-        self.current_view.run()
+        if self.login_view is None:
+            self.login_view = LoginView(self.login, self.root)
+        self.login_view.reset_fields()
+        self.show_view(self.login_view)
     
     def login(self, username, password, role):
         """Handle login attempts"""
         success = self.auth_controller.login(username, password, role)
         
         if success:
-            # Close login view
-            self.current_view.close()
-            
             # Show appropriate view based on role
             if self.auth_controller.is_admin():
                 self.show_admin()
@@ -106,20 +157,37 @@ class SmartMartApplication:
     def show_admin(self):
         """Show the admin view"""
         admin_controller = AdminController()
-        self.current_view = AdminView(admin_controller, self.logout)
-        self.current_view.run()
+        self.show_view(AdminView(admin_controller, self.logout, self.root))
     
     def show_cashier(self):
-        """Show the cashier view"""
+        """Show the cashier view, with the bill this cashier parked if there is one"""
         cashier_user = self.auth_controller.get_current_user()
-        cashier_controller = CashierController(cashier_user)
-        self.current_view = CashierView(cashier_controller, self.logout)
-        self.current_view.run()
+        parked_bill = self.auth_controller.resume_bill(cashier_user.username)
+        if self.cashier_view is None:
+            cashier_controller = CashierController(cashier_user)
+            self.cashier_view = CashierView(cashier_controller, self.logout, self.root)
+        self.cashier_view.switch_cashier(cashier_user, parked_bill)
+        self.show_view(self.cashier_view)
     
     def logout(self):
-        """Handle logout and return to login screen"""
+        """Handle logout and return to login screen, parking an open cashier bill"""
+        if self.current_view is self.cashier_view and self.cashier_view is not None:
+            self.auth_controller.park_bill(self.cashier_view.cashier_controller.current_bill)
         self.auth_controller.logout()
         self.show_login()
+    
+    def quit(self):
+        """Save queued bills, then close the window"""
+        if self.cashier_view is not None:
+            self.cashier_view.finish_commits()
+        self.root.destroy()
 
 if __name__ == "__main__":
-    app = SmartMartApplication() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Smart Mart System")
+    parser.add_argument("--server", action="store_true",
+                        help="serve data/ to tills started with SMARTMART_STORAGE=remote, without a window")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    args = parser.parse_args()
+    app = SmartMartApplication(args if args.server else None) 
\ No newline at end of file
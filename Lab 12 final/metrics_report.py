@@ -0,0 +1,49 @@
+import argparse
+import json
+from monitoring.metrics import METRICS_FILE, merge_snapshots, read_snapshots
+
+SORT_KEYS = ("total", "calls", "p50", "p95", "p99", "max", "name")
+
+def report_rows(counters, histograms):
+    """Get one row per timed method: calls, errors, total and latency percentiles in milliseconds"""
+    rows = []
+    for name, histogram in histograms.items():
+        rows.append({"name": name, "calls": histogram.count, "errors": counters.get(f"{name}.errors", 0),
+                     "total": histogram.total * 1000,
+                     "p50": histogram.percentile(0.50) * 1000,
+                     "p95": histogram.percentile(0.95) * 1000,
+                     "p99": histogram.percentile(0.99) * 1000,
+                     "max": histogram.max * 1000})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Print per-method call counts and latencies from a metrics file")
+    parser.add_argument("--file", default=METRICS_FILE, help=f"metrics file (default: {METRICS_FILE})")
+    parser.add_argument("--sort", default="total", choices=SORT_KEYS)
+    parser.add_argument("--top", type=int, default=0, help="only show this many methods")
+    parser.add_argument("--json", action="store_true", help="print the rows as JSON")
+    args = parser.parse_args()
+    
+    snapshots = read_snapshots(args.file)
+    if not snapshots:
+        print(f"No metrics in {args.file}. Run the application with SMARTMART_METRICS=1 first.")
+        return
+    
+    counters, histograms = merge_snapshots(snapshots)
+    rows = sorted(report_rows(counters, histograms), key=lambda row: row[args.sort],
+                  reverse=args.sort != "name")
+    if args.top:
+        rows = rows[:args.top]
+    
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    
+    print(f"{'method':<40}{'calls':>10}{'errors':>8}{'total ms':>12}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'max ms':>10}")
+    for row in rows:
+        print(f"{row['name']:<40}{row['calls']:>10}{row['errors']:>8}{row['total']:>12.1f}{row['p50']:>10.3f}"
+              f"{row['p95']:>10.3f}{row['p99']:>10.3f}{row['max']:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+import argparse
+import os
+from model.sqlite_storage import SQLiteStorage
+from model.text_storage import TextStorage
+
+def migrate(data_dir="data", database=None):
+    """Import the text data files in data_dir into a SQLite database"""
+    database = database or os.path.join(data_dir, "smartmart.db")
+    
+    source = TextStorage(data_dir)
+    target = SQLiteStorage(database)
+    try:
+        return target.import_text_data(source)
+    finally:
+        target.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Import Smart Mart text data files into SQLite")
+    parser.add_argument("--data-dir", default="data", help="directory holding the .txt data files")
+    parser.add_argument("--database", default=None, help="SQLite database to create or update "
+                                                         "(default: <data-dir>/smartmart.db)")
+    args = parser.parse_args()
+    
+    print(f"Importing text data from '{args.data_dir}'...")
+    counts = migrate(args.data_dir, args.database)
+    
+    print(f"Imported {counts['products']} products, {counts['cashiers']} cashiers, "
+          f"{counts['admin']} admin account and {counts['bills']} bills.")
+    print("Run with SMARTMART_STORAGE=sqlite to use the database.")
+
+if __name__ == "__main__":
+    main()
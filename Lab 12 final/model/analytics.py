@@ -0,0 +1,135 @@
+from array import array
+import numpy as np
+
+class SalesReport:
+    """Bill history held as NumPy column arrays for fast sales reports
+    
+    Records (see Bill.to_record) are streamed once into compact typed
+    columns: one row per bill and one row per line item. Text fields such
+    as the cashier, payment method, day and product are stored as integer
+    codes into label lists, so every report is a bincount over a code
+    column instead of a Python loop over bills.
+    
+    Line revenue is net of the bill's card discount: each line's subtotal
+    is scaled by final_amount / total of its bill. Payment methods are
+    grouped in lower case, as Bill does when it applies the card discount,
+    so "Card" and "card" are one method.
+    """
+    
+    def __init__(self, records):
+        self.days, self.cashiers, self.payment_methods = [], [], []
+        self.categories, self.products = [], []
+        day_codes, cashier_codes, payment_codes = {}, {}, {}
+        category_codes, product_codes, product_categories = {}, {}, array('i')
+        
+        bill_day, bill_cashier, bill_payment = array('i'), array('i'), array('i')
+        bill_total, bill_discount, bill_final = array('d'), array('d'), array('d')
+        line_bill, line_product, line_quantity, line_subtotal = array('q'), array('i'), array('q'), array('d')
+        
+        def code(codes, labels, label):
+            if label not in codes:
+                codes[label] = len(labels)
+                labels.append(label)
+            return codes[label]
+        
+        for record in records:
+            bill_index = len(bill_final)
+            timestamp = record.get("timestamp")
+            bill_day.append(code(day_codes, self.days, timestamp[:10] if timestamp else None))
+            bill_cashier.append(code(cashier_codes, self.cashiers, record.get("cashier")))
+            payment_method = record.get("payment_method")
+            bill_payment.append(code(payment_codes, self.payment_methods,
+                                     payment_method.lower() if payment_method else payment_method))
+            final_amount = record["final_amount"]
+            bill_total.append(record.get("total") or final_amount)
+            bill_discount.append(record.get("discount") or 0.0)
+            bill_final.append(final_amount)
+            
+            for item in record.get("items", ()):
+                key = (item["category"], item["name"])
+                if key not in product_codes:
+                    product_codes[key] = len(self.products)
+                    self.products.append(key)
+                    product_categories.append(code(category_codes, self.categories, item["category"]))
+                line_bill.append(bill_index)
+                line_product.append(product_codes[key])
+                line_quantity.append(item["quantity"])
+                line_subtotal.append(item["subtotal"])
+        
+        # Bill columns
+        self.bill_day = np.frombuffer(bill_day, dtype=np.int32)
+        self.bill_cashier = np.frombuffer(bill_cashier, dtype=np.int32)
+        self.bill_payment = np.frombuffer(bill_payment, dtype=np.int32)
+        self.bill_total = np.frombuffer(bill_total, dtype=np.float64)
+        self.bill_discount = np.frombuffer(bill_discount, dtype=np.float64)
+        self.bill_final = np.frombuffer(bill_final, dtype=np.float64)
+        
+        # Line item columns
+        self.line_bill = np.frombuffer(line_bill, dtype=np.int64)
+        self.line_product = np.frombuffer(line_product, dtype=np.int32)
+        self.line_quantity = np.frombuffer(line_quantity, dtype=np.int64)
+        self.line_subtotal = np.frombuffer(line_subtotal, dtype=np.float64)
+        self.product_category = np.frombuffer(product_categories, dtype=np.int32)
+        
+        # Share of each bill actually paid, spread over its lines
+        paid_share = np.divide(self.bill_final, self.bill_total,
+                               out=np.ones_like(self.bill_final), where=self.bill_total != 0)
+        self.line_revenue = self.line_subtotal * paid_share[self.line_bill]
+    
+    @property
+    def bill_count(self):
+        """Number of bills in the report"""
+        return len(self.bill_final)
+    
+    @property
+    def line_count(self):
+        """Number of line items in the report"""
+        return len(self.line_subtotal)
+    
+    def _group(self, codes, labels, weights):
+        """Sum weights per code; return [(label, total), ...] with the largest first"""
+        totals = np.bincount(codes, weights=weights, minlength=len(labels))
+        order = np.argsort(-totals, kind="stable")
+        return [(labels[i], float(totals[i])) for i in order]
+    
+    def total_revenue(self):
+        """Total amount paid over all bills"""
+        return float(self.bill_final.sum())
+    
+    def revenue_by_day(self):
+        """Get [(YYYY-MM-DD, revenue), ...] in date order (undated bills last)"""
+        return sorted(self._group(self.bill_day, self.days, self.bill_final),
+                      key=lambda row: (row[0] is None, row[0] or ""))
+    
+    def revenue_by_cashier(self):
+        """Get [(cashier, revenue), ...] with the highest revenue first"""
+        return self._group(self.bill_cashier, self.cashiers, self.bill_final)
+    
+    def revenue_by_payment_method(self):
+        """Get [(payment method, revenue), ...] with the highest revenue first"""
+        return self._group(self.bill_payment, self.payment_methods, self.bill_final)
+    
+    def revenue_by_category(self):
+        """Get [(category, revenue), ...] from line items, with the highest revenue first"""
+        return self._group(self.product_category[self.line_product], self.categories, self.line_revenue)
+    
+    def top_products(self, n=10, by="revenue"):
+        """Get the top n [((category, name), quantity, revenue), ...] by revenue or quantity"""
+        quantities = np.bincount(self.line_product, weights=self.line_quantity, minlength=len(self.products))
+        revenues = np.bincount(self.line_product, weights=self.line_revenue, minlength=len(self.products))
+        ranking = quantities if by == "quantity" else revenues
+        
+        n = min(n, len(self.products))
+        if n <= 0:
+            return []
+        # Partition out the top n first so only those are sorted
+        top = np.argpartition(-ranking, n - 1)[:n]
+        top = top[np.argsort(-ranking[top], kind="stable")]
+        return [(self.products[i], int(quantities[i]), float(revenues[i])) for i in top]
+    
+    def card_discount_total(self):
+        """Total discount given on card payments"""
+        if "card" not in self.payment_methods:
+            return 0.0
+        card = self.payment_methods.index("card")
+        return float(self.bill_discount[self.bill_payment == card].sum())
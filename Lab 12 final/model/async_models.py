@@ -0,0 +1,102 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+# Threads shared by every async model. Model calls mostly wait on disk
+# (or on the server in remote mode), so there can be more than cores.
+MAX_WORKERS = int(os.environ.get("SMARTMART_ASYNC_WORKERS", "8"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Get the thread pool shared by the async models, starting it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="model-io")
+        return _executor
+
+class AsyncModel:
+    """Awaitable front for a model, for code running on an asyncio loop
+    
+    Every public method of the wrapped model can be awaited with the same
+    arguments:
+        products = AsyncProductModel()
+        laptop = await products.get_product("Electronics", "Laptop")
+    The call runs on a bounded thread pool (get_executor() unless an
+    executor is given), so the loop keeps serving other requests while it
+    waits on disk, and at most MAX_WORKERS calls run at once. Other
+    attributes are read straight from the model, which is shared with any
+    synchronous caller.
+    """
+    
+    def __init__(self, model, executor=None):
+        self.model = model
+        self.executor = executor
+    
+    async def run(self, function, *args, **kwargs):
+        """Run any blocking function on the pool and wait for its result"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor or get_executor(),
+                                          functools.partial(function, *args, **kwargs))
+    
+    def __getattr__(self, name):
+        attribute = getattr(self.model, name)
+        if name.startswith("_") or not callable(attribute):
+            return attribute
+        
+        @functools.wraps(attribute)
+        async def call(*args, **kwargs):
+            return await self.run(attribute, *args, **kwargs)
+        
+        # Kept, so later lookups do not build the wrapper again
+        setattr(self, name, call)
+        return call
+
+class AsyncProductModel(AsyncModel):
+    """Awaitable ProductModel"""
+    
+    def __init__(self, model=None, executor=None):
+        if model is None:
+            from model.product_model import ProductModel
+            model = ProductModel()
+        super().__init__(model, executor)
+
+class AsyncUserModel(AsyncModel):
+    """Awaitable UserModel"""
+    
+    def __init__(self, model=None, executor=None):
+        if model is None:
+            from model.user_model import UserModel
+            model = UserModel()
+        super().__init__(model, executor)
+
+class AsyncBillModel(AsyncModel):
+    """Awaitable BillModel; iter_bills is an async generator
+    
+    A BillModel made here saves with group commit and no wait window, so
+    bills saved concurrently share a write instead of queueing on the file
+    locks one by one.
+    """
+    
+    def __init__(self, model=None, executor=None):
+        if model is None:
+            from model.bill_model import BillModel
+            model = BillModel()
+            if model.group_commit is None:
+                model.use_group_commit(0)
+        super().__init__(model, executor)
+    
+    async def iter_bills(self, chunk_size=1000):
+        """Stream every saved bill as a dict, oldest first, reading chunk_size bills per pool call"""
+        records = self.model.iter_bills()
+        while True:
+            chunk = await self.run(lambda: list(islice(records, chunk_size)))
+            if not chunk:
+                return
+            for record in chunk:
+                yield record
@@ -1,80 +1,233 @@
+import os
+from decimal import Decimal, ROUND_HALF_UP
+from itertools import islice
+from monitoring.metrics import instrument
+
+CARD_DISCOUNT_PERCENT = 10
+
+def to_cents(amount):
+    """Convert a dollar amount to whole cents, rounding half a cent up"""
+    # Going through the decimal text keeps 1.005 at 101 cents, not 100
+    return int(Decimal(str(amount)).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
 class BillItem:
+    __slots__ = ("product", "quantity", "price_cents")
+    
     def __init__(self, product, quantity):
         self.product = product
         self.quantity = quantity
-        self.subtotal = product.price * quantity
+        self.price_cents = to_cents(product.price)
+    
+    @property
+    def subtotal_cents(self):
+        return self.price_cents * self.quantity
+    
+    @property
+    def subtotal(self):
+        return self.subtotal_cents / 100
 
 class Bill:
+    """A bill being rung up
+    
+    Lines are kept in a dict keyed by (category, name) in the order they
+    were first added, so adding a product already on the bill raises its
+    quantity instead of adding a second line. Money is kept in integer
+    cents with a running total, so adding or removing a line is O(1) and
+    totals never pick up float rounding; total, discount and final_amount
+    give dollars for display and for the bill records. number is set once
+    the bill has been saved.
+    """
+    
+    __slots__ = ("cashier", "payment_method", "total_cents", "number", "_lines")
+    
     def __init__(self, cashier):
         self.cashier = cashier
-        self.items = []
-        self.total = 0.0
         self.payment_method = None
-        self.discount = 0.0
-        self.final_amount = 0.0
+        self.total_cents = 0
+        self.number = None
+        self._lines = {}  # (category, name) -> BillItem
+    
+    @property
+    def items(self):
+        """The bill's lines, in the order they were added"""
+        return list(self._lines.values())
+    
+    @property
+    def discount_cents(self):
+        if self.payment_method is not None and self.payment_method.lower() == "card":
+            # Card payments get a discount, rounded to the nearest cent
+            return (self.total_cents * CARD_DISCOUNT_PERCENT + 50) // 100
+        return 0
+    
+    @property
+    def final_amount_cents(self):
+        return self.total_cents - self.discount_cents
+    
+    @property
+    def total(self):
+        return self.total_cents / 100
+    
+    @property
+    def discount(self):
+        return self.discount_cents / 100
+    
+    @property
+    def final_amount(self):
+        return self.final_amount_cents / 100
     
     def add_item(self, product, quantity):
-        if quantity > product.stock:
-            return False, f"Insufficient stock. Available: {product.stock}"
+        key = (product.category, product.name)
+        line = self._lines.get(key)
+        in_bill = line.quantity if line is not None else 0
+        if in_bill + quantity > product.stock:
+            return False, f"Insufficient stock. Available: {product.stock - in_bill}"
         
-        item = BillItem(product, quantity)
-        self.items.append(item)
-        self.calculate_total()
+        if line is None:
+            line = self._lines[key] = BillItem(product, 0)
+        line.quantity += quantity
+        self.total_cents += line.price_cents * quantity
         return True, f"{quantity} x {product.name} added to bill"
     
+    def set_quantity(self, key, quantity):
+        """Change the quantity of the line for a (category, name) key; 0 removes it"""
+        line = self._lines.get(key)
+        if line is None:
+            return False, "Item not in bill"
+        if quantity <= 0:
+            return self.remove_line(key)
+        if quantity > line.product.stock:
+            return False, f"Insufficient stock. Available: {line.product.stock}"
+        
+        self.total_cents += line.price_cents * (quantity - line.quantity)
+        line.quantity = quantity
+        return True, "Quantity updated"
+    
+    def remove_line(self, key):
+        """Remove the line for a (category, name) key"""
+        line = self._lines.pop(key, None)
+        if line is None:
+            return False, "Item not in bill"
+        self.total_cents -= line.subtotal_cents
+        return True, "Item removed from bill"
+    
     def remove_item(self, index):
-        if 0 <= index < len(self.items):
-            del self.items[index]
-            self.calculate_total()
-            return True, "Item removed from bill"
+        if 0 <= index < len(self._lines):
+            return self.remove_line(next(islice(self._lines, index, None)))
         return False, "Invalid item index"
     
     def calculate_total(self):
-        self.total = sum(item.subtotal for item in self.items)
         return self.total
     
     def apply_payment_method(self, method):
+        # The discount follows the total, so later changes to the bill keep it right
         self.payment_method = method
-        if method.lower() == "card":
-            self.discount = self.total * 0.10  # 10% discount for card payment
-        else:
-            self.discount = 0.0
-            
-        self.final_amount = self.total - self.discount
         return self.final_amount
+    
+    def to_record(self, number, timestamp):
+        """Describe the bill as a plain dict, as stored by the bill history"""
+        return {
+            "number": number,
+            "cashier": self.cashier.username,
+            "timestamp": timestamp,
+            "payment_method": self.payment_method,
+            "total": self.total,
+            "discount": self.discount,
+            "final_amount": self.final_amount,
+            "items": [{
+                "category": item.product.category,
+                "name": item.product.name,
+                "price": item.price_cents / 100,
+                "quantity": item.quantity,
+                "subtotal": item.subtotal,
+            } for item in self._lines.values()],
+        }
+    
+    @classmethod
+    def from_record(cls, record):
+        """Rebuild a bill from a dict made by to_record, without checking stock"""
+        from model.product_model import Product
+        from model.user_model import User
+        bill = cls(User(record["cashier"], "", "cashier"))
+        bill.payment_method = record["payment_method"]
+        bill.number = record["number"]
+        for item in record["items"]:
+            line = BillItem(Product(item["category"], item["name"], item["price"], 0), item["quantity"])
+            bill._lines[(item["category"], item["name"])] = line
+            bill.total_cents += line.subtotal_cents
+        return bill
 
+@instrument
 class BillModel:
-    def __init__(self):
-        self.bills_file = "data/bills.txt"
+    def __init__(self, product_model=None):
+        # Share the caller's catalog when given so stock changes are seen at once
+        if product_model is None:
+            from model.product_model import ProductModel
+            product_model = ProductModel()
+        self.product_model = product_model
+        self.storage = product_model.storage
+        self.group_commit = None
+        
+        # SMARTMART_GROUP_COMMIT_MS turns on group commit with that window
+        window_ms = os.environ.get("SMARTMART_GROUP_COMMIT_MS")
+        if window_ms:
+            self.use_group_commit(float(window_ms) / 1000,
+                                  int(os.environ.get("SMARTMART_GROUP_COMMIT_MAX", "64")))
+    
+    def use_group_commit(self, window=0.001, max_batch=64):
+        """Save bills in batches shared with other threads (see GroupCommitter)
+        
+        Each save still returns only once its bill is durable, but bills
+        saved by several threads within window seconds share one write and
+        one fsync per file.
+        """
+        from model.group_commit import GroupCommitter
+        self.group_commit = GroupCommitter(self.storage, window, max_batch)
+    
+    @property
+    def bills_file(self):
+        """Path of bills.txt when running on text storage"""
+        return self.storage.bills_file
+    
+    @bills_file.setter
+    def bills_file(self, path):
+        self.storage.bills_file = path
     
     def save_bill(self, bill):
-        """Save bill details to bills.txt"""
+        """Save the bill and take its items off stock
+        
+        Every line is checked against current stock before anything is
+        written, and the bill and its stock changes are committed together,
+        so a failure never leaves stock half-decremented. On success the
+        bill's number is set on bill.number.
+        """
         try:
-            # Get the current bill number
-            bill_number = self.get_next_bill_number()
+            # Lines are already one per product
+            quantities = {(item.product.category, item.product.name): item.quantity for item in bill.items}
             
-            # Save bill summary
-            with open(self.bills_file, 'a') as file:
-                file.write(f"Bill {bill_number}: {bill.final_amount:.2f}\n")
-                
-            # Update product stock
-            from model.product_model import ProductModel
-            product_model = ProductModel()
+            if self.group_commit is not None:
+                success, result = self.group_commit.save(bill, quantities)
+            else:
+                success, result = self.storage.save_bill(bill, quantities)
+            if not success:
+                return False, f"Error saving bill: {result}"
             
-            for item in bill.items:
-                product = item.product
-                new_stock = product.stock - item.quantity
-                product_model.update_stock(product.category, product.name, new_stock)
-                
-            return True, f"Bill {bill_number} saved successfully"
+            bill.number = result
+            return True, f"Bill {result} saved successfully"
         except Exception as e:
             return False, f"Error saving bill: {str(e)}"
     
+    def iter_bills(self):
+        """Stream every saved bill as a dict (see Bill.to_record), oldest first
+        
+        Records are read one at a time, so memory use stays flat however
+        long the bill history is.
+        """
+        return self.storage.iter_bills()
+    
+    def get_sales_for_day(self, day):
+        """Get (bill count, amount paid) for the bills saved on a YYYY-MM-DD day"""
+        return self.storage.get_sales_for_day(day)
+    
     def get_next_bill_number(self):
-        """Get the next bill number by counting existing bills"""
-        try:
-            with open(self.bills_file, 'r') as file:
-                lines = file.readlines()
-                return len(lines) + 1
-        except FileNotFoundError:
-            return 1 
\ No newline at end of file
+        """Allocate the next bill number without scanning bill history"""
+        return self.storage.next_bill_number()
@@ -0,0 +1,453 @@
+import mmap
+import os
+import struct
+from model.file_lock import FileLock
+from model.product_model import Product
+from model.storage import parse_sort_key
+from model.text_storage import TextStorage, format_product
+
+# products.bin layout: a 16-byte header followed by fixed-size records
+#   header: magic, format version, record size, record count, generation
+#   record: category, name (UTF-8, NUL padded), price, stock, flags, SKU
+# The generation goes up whenever a product is renamed or deleted in place,
+# which tells other processes to rebuild their name-to-offset index.
+# Version 1 records had no SKU; upgrade_binary() converts such files.
+HEADER = struct.Struct("<4sHHII")
+RECORD = struct.Struct("<32s64sdiB3x24s")
+RECORD_V1 = struct.Struct("<32s64sdiB3x")
+STOCK = struct.Struct("<i")
+COUNT = struct.Struct("<I")
+MAGIC = b"SMPC"
+VERSION = 2
+COUNT_OFFSET = 8
+GENERATION_OFFSET = 12
+STOCK_OFFSET = 32 + 64 + 8
+FLAGS_OFFSET = STOCK_OFFSET + 4
+FLAG_DELETED = 1
+
+def encode_product(product, flags=0):
+    """Pack a product into one fixed-size record"""
+    category = product.category.encode()
+    name = product.name.encode()
+    sku = (product.sku or "").encode()
+    if len(category) > 32 or len(name) > 64:
+        raise ValueError(f"Category or name too long for the binary catalog: {product.category}/{product.name}")
+    if len(sku) > 24:
+        raise ValueError(f"SKU too long for the binary catalog: {product.sku}")
+    return RECORD.pack(category, name, float(product.price), int(product.stock), flags, sku)
+
+def decode_product(record):
+    """Unpack one record (bytes or a memoryview slice) into a Product"""
+    category, name, price, stock, _, sku = RECORD.unpack(record)
+    return Product(category.rstrip(b"\0").decode(), name.rstrip(b"\0").decode(), price, stock,
+                   sku.rstrip(b"\0").decode())
+
+def csv_to_binary(csv_path, binary_path):
+    """Convert a products.txt catalog to products.bin; returns the product count"""
+    source = TextStorage(os.path.dirname(csv_path) or ".")
+    source.products_file = csv_path
+    products = source.get_all_products()
+    
+    temp_path = f"{binary_path}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(products), 0))
+        for product in products:
+            file.write(encode_product(product))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, binary_path)
+    return len(products)
+
+def binary_to_csv(binary_path, csv_path):
+    """Convert a products.bin catalog back to products.txt; returns the product count"""
+    storage = BinaryStorage(os.path.dirname(binary_path) or ".")
+    storage.products_file = binary_path
+    products = storage.get_all_products()
+    storage.close()
+    
+    temp_path = f"{csv_path}.tmp"
+    with open(temp_path, 'w') as file:
+        for product in products:
+            file.write(f"{format_product(product)}\n")
+    os.replace(temp_path, csv_path)
+    return len(products)
+
+def upgrade_binary(binary_path):
+    """Rewrite a version 1 products.bin in the current format
+    
+    Returns the number of products converted, or None if the file is
+    missing or already current. Deleted records are dropped on the way.
+    """
+    with FileLock(binary_path):
+        try:
+            with open(binary_path, 'rb') as file:
+                data = file.read()
+        except FileNotFoundError:
+            return None
+        magic, version, record_size, count, _ = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != 1 or record_size != RECORD_V1.size:
+            return None
+        
+        view = memoryview(data)[HEADER.size:HEADER.size + count * RECORD_V1.size]
+        records = [fields for fields in RECORD_V1.iter_unpack(view) if not fields[4] & FLAG_DELETED]
+        view.release()
+        
+        temp_path = f"{binary_path}.tmp"
+        with open(temp_path, 'wb') as file:
+            file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(records), 0))
+            for category, name, price, stock, _ in records:
+                file.write(RECORD.pack(category, name, price, stock, 0, b""))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, binary_path)
+    return len(records)
+
+class BinaryStorage(TextStorage):
+    """Text storage with the catalog in a fixed-width, memory-mapped products.bin
+    
+    Every product is a fixed-size record, so changing its stock is a
+    four-byte write into the shared mapping instead of a file rewrite, and
+    other processes mapping the same file see it at once. A name-to-offset
+    index is built when the file is mapped and extended as records are
+    appended. Deleted products are flagged and dropped by compact().
+    
+    Multi-record stock changes are first written to products.bin.journal,
+    so a crash part-way through a checkout is rolled forward by the next
+    writer instead of leaving stock half-decremented. A checkout's bill
+    records go in the same journal, and it is only removed once they are
+    in the bill files.
+    """
+    
+    def __init__(self, data_dir="data"):
+        super().__init__(data_dir)
+        self.products_file = os.path.join(data_dir, "products.bin")
+        
+        self._file = None
+        self._map = None
+        self._mapped_signature = None
+        self._mapped_count = 0
+        self._mapped_generation = 0
+        self._record_index = {}      # (category, name) -> record offset
+        self._category_offsets = {}  # category -> [record offset, ...]
+        self._writes = 0
+        self._page_orders = {}       # (category, sort_key) -> (token, [record offset, ...])
+    
+    def data_version(self):
+        # Counts in-place writes too, which may not move the mtime of products.bin
+        return super().data_version() + (self._writes,)
+    
+    def catalog_version(self):
+        # Records are appended, or renamed and deleted with a generation bump;
+        # stock is written in place without touching either
+        with FileLock(self.products_file, shared=True):
+            if not self._refresh_mapping():
+                return None
+            return (self._mapped_signature[1], self._mapped_count, self._mapped_generation)
+    
+    def close(self):
+        """Unmap products.bin"""
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._file = None
+        self._map = None
+        self._mapped_signature = None
+        self._mapped_count = 0
+        self._mapped_generation = 0
+        self._record_index = {}
+        self._category_offsets = {}
+    
+    def _journal_file(self):
+        """Get the path of the redo journal for multi-record stock changes"""
+        return f"{self.products_file}.journal"
+    
+    def _record_offset(self, position):
+        """Get the byte offset of the record at a position"""
+        return HEADER.size + position * RECORD.size
+    
+    def _refresh_mapping(self):
+        """Map products.bin and index any records not seen yet"""
+        try:
+            stat = os.stat(self.products_file)
+        except FileNotFoundError:
+            print("Products file not found.")
+            self.close()
+            return False
+        
+        signature = (self.products_file, stat.st_ino, stat.st_size)
+        if self._mapped_signature is None or signature[:2] != self._mapped_signature[:2]:
+            # A different file (first open, or replaced by compact()): start over
+            self.close()
+            self._map_file()
+        elif signature != self._mapped_signature:
+            # Another writer appended records: map the longer file
+            self._map.close()
+            self._file.close()
+            self._map_file()
+        
+        magic, version, record_size, count, generation = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            raise ValueError(f"{self.products_file} is not a version {VERSION} binary catalog"
+                             f"{' (run upgrade_binary on it)' if version == 1 else ''}")
+        if count == self._mapped_count and generation == self._mapped_generation:
+            self._mapped_signature = signature
+            return True
+        if generation != self._mapped_generation:
+            # Products were renamed or deleted by another writer
+            self._mapped_count = 0
+            self._record_index = {}
+            self._category_offsets = {}
+        
+        # Index only the records appended since the last refresh
+        start = self._mapped_count
+        view = memoryview(self._map)[self._record_offset(start):self._record_offset(count)]
+        for position, fields in enumerate(RECORD.iter_unpack(view), start=start):
+            if fields[4] & FLAG_DELETED:
+                continue
+            category = fields[0].rstrip(b"\0").decode()
+            name = fields[1].rstrip(b"\0").decode()
+            offset = self._record_offset(position)
+            self._record_index[(category, name)] = offset
+            self._category_offsets.setdefault(category, []).append(offset)
+        view.release()
+        
+        self._mapped_count = count
+        self._mapped_generation = generation
+        self._mapped_signature = signature
+        return True
+    
+    def _map_file(self):
+        """Open and map products.bin"""
+        self._file = open(self.products_file, 'r+b')
+        self._map = mmap.mmap(self._file.fileno(), 0)
+    
+    def _bump_generation(self):
+        """Tell other processes their name-to-offset index is out of date"""
+        self._mapped_generation += 1
+        COUNT.pack_into(self._map, GENERATION_OFFSET, self._mapped_generation)
+    
+    def _mark_written(self):
+        """Flush the mapping and let data_version() readers see an in-place write"""
+        self._map.flush()
+        self._writes += 1
+        os.utime(self.products_file)
+    
+    def _read(self, offset):
+        """Decode the record at an offset straight from the mapping"""
+        with memoryview(self._map)[offset:offset + RECORD.size] as record:
+            return decode_product(record)
+    
+    def _write_stock(self, offset, stock):
+        """Overwrite a record's stock in place"""
+        STOCK.pack_into(self._map, offset + STOCK_OFFSET, int(stock))
+    
+    def _recover_journal(self):
+        """Finish a multi-record stock change interrupted by a crash"""
+        journal_file = self._journal_file()
+        if not os.path.exists(journal_file):
+            return
+        with open(journal_file, 'r') as file:
+            lines = file.read().splitlines()
+        if lines and lines[-1] == "commit":
+            bills = []
+            for line in lines[:-1]:
+                if line.startswith("bill,"):
+                    bills.append(line[len("bill,"):])
+                    continue
+                offset, stock = line.split(',')
+                self._write_stock(int(offset), int(stock))
+            self._mark_written()
+            # Raises, keeping the journal, if the bill files still cannot be written
+            self._write_bill_files(bills)
+        os.remove(journal_file)
+    
+    def _write_stock_batch(self, changes, bills=()):
+        """Apply {offset: new_stock} through the redo journal, with the bill records it commits"""
+        with open(self._journal_file(), 'w') as file:
+            file.writelines(f"{offset},{stock}\n" for offset, stock in changes.items())
+            file.writelines(f"bill,{record}\n" for record in bills)
+            file.write("commit\n")
+            file.flush()
+            os.fsync(file.fileno())
+        
+        for offset, stock in changes.items():
+            self._write_stock(offset, stock)
+        self._mark_written()
+        if bills and not self._write_committed_bills(bills):
+            return  # The next writer finishes them from the journal
+        os.remove(self._journal_file())
+    
+    # Products
+    def get_all_products(self):
+        with FileLock(self.products_file, shared=True):
+            if not self._refresh_mapping():
+                return []
+            return [self._read(offset) for offset in sorted(self._record_index.values())]
+    
+    def get_product(self, category, name):
+        with FileLock(self.products_file, shared=True):
+            if not self._refresh_mapping():
+                return None
+            offset = self._record_index.get((category, name))
+            return self._read(offset) if offset is not None else None
+    
+    def get_products_by_category(self, category):
+        with FileLock(self.products_file, shared=True):
+            if not self._refresh_mapping():
+                return []
+            return [self._read(offset) for offset in self._category_offsets.get(category, [])]
+    
+    def get_categories(self):
+        with FileLock(self.products_file, shared=True):
+            if not self._refresh_mapping():
+                return []
+            return sorted(category for category, offsets in self._category_offsets.items() if offsets)
+    
+    def get_products_page(self, category, offset, limit, sort_key=None):
+        field, descending = parse_sort_key(sort_key)
+        with FileLock(self.products_file, shared=True):
+            if not self._refresh_mapping():
+                return 0, []
+            
+            # An order stays valid until products are added, renamed or
+            # deleted; one sorted by stock also until any stock is written
+            token = (self._mapped_signature, self._mapped_count, self._mapped_generation)
+            if field == "stock":
+                token += (self._writes, os.stat(self.products_file).st_mtime_ns)
+            cached = self._page_orders.get((category, sort_key))
+            if cached is not None and cached[0] == token:
+                offsets = cached[1]
+            else:
+                if category is None:
+                    offsets = sorted(self._record_index.values())
+                else:
+                    offsets = list(self._category_offsets.get(category, []))
+                if field is not None:
+                    offsets.sort(key=lambda record: getattr(self._read(record), field), reverse=descending)
+                self._page_orders[(category, sort_key)] = (token, offsets)
+            
+            return len(offsets), [self._read(record) for record in offsets[offset:offset + limit]]
+    
+    def add_product(self, product):
+        record = encode_product(product)
+        with FileLock(self.products_file):
+            if not os.path.exists(self.products_file):
+                with open(self.products_file, 'wb') as file:
+                    file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0, 0))
+            self._refresh_mapping()
+            if (product.category, product.name) in self._record_index:
+                return False
+            
+            count = self._mapped_count
+            with open(self.products_file, 'r+b') as file:
+                file.seek(self._record_offset(count))
+                file.write(record)
+                file.seek(COUNT_OFFSET)
+                file.write(COUNT.pack(count + 1))
+                file.flush()
+                os.fsync(file.fileno())
+            self._refresh_mapping()
+        return True
+    
+    def update_product(self, category, name, product):
+        record = encode_product(product)
+        with FileLock(self.products_file):
+            if not self._refresh_mapping():
+                return False
+            offset = self._record_index.pop((category, name), None)
+            if offset is None:
+                return False
+            
+            self._map[offset:offset + RECORD.size] = record
+            self._bump_generation()
+            self._mark_written()
+            
+            self._category_offsets[category].remove(offset)
+            self._record_index[(product.category, product.name)] = offset
+            offsets = self._category_offsets.setdefault(product.category, [])
+            offsets.append(offset)
+            offsets.sort()
+        return True
+    
+    def delete_product(self, category, name):
+        with FileLock(self.products_file):
+            if not self._refresh_mapping():
+                return False
+            offset = self._record_index.pop((category, name), None)
+            if offset is None:
+                return False
+            
+            self._map[offset + FLAGS_OFFSET] = FLAG_DELETED
+            self._bump_generation()
+            self._mark_written()
+            self._category_offsets[category].remove(offset)
+        return True
+    
+    def update_stock(self, category, name, new_stock):
+        with FileLock(self.products_file):
+            if not self._refresh_mapping():
+                return False
+            offset = self._record_index.get((category, name))
+            if offset is None:
+                return False
+            
+            self._recover_journal()
+            self._write_stock(offset, new_stock)
+            self._mark_written()
+        return True
+    
+    def decrement_stock(self, quantities):
+        with FileLock(self.products_file):
+            if not self._refresh_mapping():
+                return False, "Products file not found"
+            self._recover_journal()
+            
+            # Validate every line before writing anything
+            changes = {}
+            for (category, name), quantity in quantities.items():
+                offset = self._record_index.get((category, name))
+                if offset is None:
+                    return False, f"Product not found: {name}"
+                stock = STOCK.unpack_from(self._map, offset + STOCK_OFFSET)[0]
+                if quantity > stock:
+                    return False, f"Insufficient stock for {name}. Available: {stock}"
+                changes[offset] = stock - quantity
+            
+            self._write_stock_batch(changes)
+        return True, "Stock updated successfully"
+    
+    def _commit_bills(self, quantities, records):
+        """Take quantities off stock and record the bills in one journal commit"""
+        changes = {}
+        for key, quantity in quantities.items():
+            offset = self._record_index[key]
+            changes[offset] = STOCK.unpack_from(self._map, offset + STOCK_OFFSET)[0] - quantity
+        self._write_stock_batch(changes, records)
+    
+    def _finish_committed_bills(self):
+        if self._refresh_mapping():
+            self._recover_journal()
+    
+    def compact(self):
+        """Rewrite products.bin without the records of deleted products"""
+        try:
+            with FileLock(self.products_file):
+                if not self._refresh_mapping():
+                    return True, "Nothing to compact"
+                self._recover_journal()
+                offsets = sorted(self._record_index.values())
+                if len(offsets) == self._mapped_count:
+                    return True, "Nothing to compact"
+                
+                temp_path = f"{self.products_file}.tmp"
+                with open(temp_path, 'wb') as file:
+                    file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, len(offsets), 0))
+                    for offset in offsets:
+                        file.write(self._map[offset:offset + RECORD.size])
+                    file.flush()
+                    os.fsync(file.fileno())
+                self.close()
+                os.replace(temp_path, self.products_file)
+            return True, "Catalog compacted successfully"
+        except Exception as e:
+            return False, f"Error compacting catalog: {str(e)}"
@@ -0,0 +1,81 @@
+import atexit
+import queue
+import threading
+
+class CommitWorker:
+    """Run save jobs on a background thread, one at a time, in the order submitted
+    
+    submit() returns at once, so the UI thread never waits on disk. Each
+    finished job's (success, message) result is queued, and poll() runs the
+    job's callback on the thread that calls it: a Tk view calls poll() from
+    an after() loop, so callbacks never touch widgets from the worker.
+    
+    A job is durable once its callback reports success. Jobs still queued
+    are finished by flush() or close(), which also runs at interpreter exit.
+    """
+    
+    def __init__(self, save):
+        self.save = save
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+    
+    @property
+    def pending(self):
+        """Number of jobs submitted but not finished yet"""
+        return self._pending
+    
+    def submit(self, item, on_done=None):
+        """Queue save(item); on_done(success, message) is run by a later poll()"""
+        if self._closed:
+            raise RuntimeError("Commit worker is closed")
+        with self._idle:
+            self._pending += 1
+        self._jobs.put((item, on_done))
+    
+    def _run(self):
+        """Save queued jobs until close() queues None"""
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            item, on_done = job
+            try:
+                result = self.save(item)
+            except Exception as e:
+                result = (False, f"Error saving: {str(e)}")
+            self._results.put((on_done, result))
+            with self._idle:
+                self._pending -= 1
+                self._idle.notify_all()
+    
+    def poll(self):
+        """Run the callbacks of finished jobs on this thread; return how many jobs finished"""
+        finished = 0
+        while True:
+            try:
+                on_done, (success, message) = self._results.get_nowait()
+            except queue.Empty:
+                return finished
+            finished += 1
+            if on_done is not None:
+                on_done(success, message)
+    
+    def flush(self, timeout=None):
+        """Wait until every submitted job has finished; False if timeout ran out first"""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+    
+    def close(self, timeout=None):
+        """Finish the queued jobs and stop the worker thread"""
+        if not self._closed:
+            self._closed = True
+            self._jobs.put(None)
+            atexit.unregister(self.close)
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
@@ -0,0 +1,136 @@
+import os
+import stat
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+def lock_file(file, shared=False):
+    """Block until this process holds a lock on an open file
+    
+    Windows has no shared locks, so shared=True falls back to an exclusive
+    lock there.
+    """
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        return
+    
+    # msvcrt locks a byte range from the current position and gives up after
+    # about ten seconds, so lock the first byte and keep retrying
+    file.seek(0)
+    while True:
+        try:
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            continue
+
+def unlock_file(file):
+    """Release a lock taken with lock_file"""
+    if fcntl is not None:
+        fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+    else:
+        file.seek(0)
+        msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def open_locked(path):
+    """Open (creating if needed) a file for read/write and lock it exclusively"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    file = os.fdopen(fd, 'r+')
+    try:
+        lock_file(file)
+    except Exception:
+        file.close()
+        raise
+    return file
+
+class _HeldLock:
+    """Per-process state of one lock file"""
+    def __init__(self):
+        self.thread_lock = threading.RLock()
+        self.file = None
+        self.depth = 0
+        self.shared = False
+
+_held_locks = {}
+_held_locks_guard = threading.Lock()
+
+class FileLock:
+    """Advisory lock on <path>.lock, shared between processes
+    
+    Readers take it shared and writers exclusive. A thread that already
+    holds the lock can take it again (an exclusive holder may nest shared
+    sections), and threads of one process take turns on it. The lock file
+    is kept open so taking the lock costs a couple of system calls.
+    """
+    
+    def __init__(self, path, shared=False):
+        self.lock_path = os.path.abspath(f"{path}.lock")
+        self.shared = shared
+        self._held = None
+    
+    def __enter__(self):
+        with _held_locks_guard:
+            held = _held_locks.setdefault(self.lock_path, _HeldLock())
+        held.thread_lock.acquire()
+        
+        if held.depth == 0:
+            try:
+                if held.file is None:
+                    held.file = open(self.lock_path, 'a+')
+                lock_file(held.file, self.shared)
+            except FileNotFoundError:
+                # The data directory does not exist, so there is nothing to protect
+                pass
+            except Exception:
+                held.thread_lock.release()
+                raise
+            held.shared = self.shared
+        elif held.shared and not self.shared:
+            held.thread_lock.release()
+            raise RuntimeError(f"Cannot upgrade a shared lock to exclusive: {self.lock_path}")
+        
+        held.depth += 1
+        self._held = held
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        held = self._held
+        self._held = None
+        held.depth -= 1
+        if held.depth == 0 and held.file is not None:
+            unlock_file(held.file)
+        held.thread_lock.release()
+        return False
+
+def atomic_write(path, lines):
+    """Replace a file's contents so readers only ever see the old or new version
+    
+    The lines are written to a temp file in the same directory, flushed to
+    disk and then swapped in with os.replace. The caller should hold an
+    exclusive FileLock on path.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+        
+        # mkstemp creates the file private to this user; keep the old permissions
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+        os.chmod(temp_path, mode)
+        
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,65 @@
+import threading
+import time
+
+class GroupCommitter:
+    """Gather bill saves from many threads into batches written together
+    
+    save() queues a bill and blocks until the batch holding it is durable.
+    A background thread takes the first waiting bill, keeps the batch open
+    for up to window seconds or until max_batch bills are waiting, and
+    hands it to storage.save_bills(), which makes one write and one fsync
+    per file for the whole batch. Bills that arrive while a batch is being
+    written start the next batch, so under load batches fill up without
+    waiting, and a lone bill waits at most window.
+    
+    Terminals in separate processes each batch their own bills; the
+    storage's file locks order the batches between them.
+    """
+    
+    def __init__(self, storage, window=0.001, max_batch=64):
+        self.storage = storage
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0  # Batches written so far
+        self.bills = 0    # Bills written so far
+        self._waiting = []  # [(bill, quantities, slot), ...] in arrival order
+        self._ready = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+    
+    def save(self, bill, quantities):
+        """Save one bill as part of a batch; returns (True, bill_number) or (False, reason)"""
+        slot = {"done": threading.Event(), "result": None}
+        with self._ready:
+            self._waiting.append((bill, quantities, slot))
+            self._ready.notify_all()
+        slot["done"].wait()
+        return slot["result"]
+    
+    def _next_batch(self):
+        """Wait for the first bill, then for the window to close or the batch to fill"""
+        with self._ready:
+            self._ready.wait_for(lambda: self._waiting)
+            deadline = time.monotonic() + self.window
+            while len(self._waiting) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._ready.wait(remaining)
+            batch = self._waiting[:self.max_batch]
+            del self._waiting[:self.max_batch]
+            return batch
+    
+    def _run(self):
+        """Write batches for as long as the process runs"""
+        while True:
+            batch = self._next_batch()
+            try:
+                results = self.storage.save_bills([(bill, quantities) for bill, quantities, _ in batch])
+            except Exception as e:
+                results = [(False, str(e))] * len(batch)
+            self.batches += 1
+            self.bills += len(batch)
+            for (_, _, slot), result in zip(batch, results):
+                slot["result"] = result
+                slot["done"].set()
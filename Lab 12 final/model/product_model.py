@@ -1,98 +1,217 @@
+import threading
+from model.search_index import SearchIndex
+from model.storage import open_storage
+from monitoring.metrics import instrument
+
 class Product:
-    def __init__(self, category, name, price, stock):
+    def __init__(self, category, name, price, stock, sku=None):
         self.category = category
         self.name = name
         self.price = float(price)
         self.stock = int(stock)
+        # Barcode or stock keeping unit; optional, unique across the catalog
+        self.sku = sku or None
 
+@instrument
 class ProductModel:
-    def __init__(self):
-        self.products_file = "data/products.txt"
+    def __init__(self, storage=None):
+        # Text files by default; see model/storage.py for the other backends
+        self.storage = storage if storage is not None else open_storage()
+        # Name search and SKU indexes, built on first use and kept up to
+        # date by the add, update and delete calls below
+        self._search_index = None
+        self._search_version = None  # catalog_version() the search index was synced at
+        self._skus = None  # sku -> (category, name)
+        self._skus_version = None  # catalog_version() the SKU index was built at
+        self._search_lock = threading.RLock()
+    
+    @property
+    def products_file(self):
+        """Path of products.txt when running on text storage"""
+        return self.storage.products_file
+    
+    @products_file.setter
+    def products_file(self, path):
+        self.storage.products_file = path
+    
+    def data_version(self):
+        """Get a token that changes whenever the stored data changes"""
+        return self.storage.data_version()
     
     def get_all_products(self):
-        """Get all products from products.txt"""
-        products = []
-        try:
-            with open(self.products_file, 'r') as file:
-                for line in file:
-                    if line.strip():
-                        category, name, price, stock = line.strip().split(',')
-                        products.append(Product(category, name, price, stock))
-        except FileNotFoundError:
-            print("Products file not found.")
-        return products
+        """Get all products"""
+        return self.storage.get_all_products()
+    
+    def get_products_page(self, category, offset, limit, sort_key=None):
+        """Get (total, products) for one page of a category (None for every product)
+        
+        sort_key is "category", "name", "price" or "stock", with a leading
+        "-" for descending order; None keeps catalog order.
+        """
+        return self.storage.get_products_page(category, offset, limit, sort_key)
+    
+    def get_product(self, category, name):
+        """Get a single product by category and name, or None if not found"""
+        return self.storage.get_product(category, name)
     
     def get_products_by_category(self, category):
         """Get products filtered by category"""
-        return [p for p in self.get_all_products() if p.category == category]
+        return self.storage.get_products_by_category(category)
     
     def get_categories(self):
         """Get unique categories from products"""
-        products = self.get_all_products()
-        return sorted(list(set(p.category for p in products)))
+        return self.storage.get_categories()
+    
+    def _search(self):
+        """Get the search index, built on first use and resynced when products change elsewhere"""
+        with self._search_lock:
+            version = self.storage.catalog_version()
+            if self._search_index is None:
+                self._search_index = SearchIndex(
+                    (product.category, product.name) for product in self.get_all_products())
+            elif version != self._search_version:
+                # Changed by another process, or by a call that bypassed _reindex:
+                # only the names that came or went are indexed again
+                keys = [(product.category, product.name) for product in self.get_all_products()]
+                for key in self._search_index.keys() - set(keys):
+                    self._search_index.remove(key)
+                for key in keys:
+                    self._search_index.add(key)
+            self._search_version = version
+            return self._search_index
+    
+    def _sku_index(self):
+        """Get the SKU -> (category, name) dict, rebuilt when products are added, changed or deleted elsewhere"""
+        with self._search_lock:
+            version = self.storage.catalog_version()
+            if self._skus is None or version != self._skus_version:
+                self._skus = {product.sku: (product.category, product.name)
+                              for product in self.get_all_products() if product.sku}
+            self._skus_version = version
+            return self._skus
     
-    def add_product(self, category, name, price, stock):
-        """Add a new product to products.txt"""
+    def _reindex(self, old, new):
+        """Move a product from old to new in the in-memory indexes (either may be None)
+        
+        The indexes then record the new catalog_version(), so the change
+        made here is not synced from storage again.
+        """
+        with self._search_lock:
+            old_key = (old.category, old.name) if old is not None else None
+            new_key = (new.category, new.name) if new is not None else None
+            if self._search_index is not None:
+                if old_key != new_key:
+                    if old_key is not None:
+                        self._search_index.remove(old_key)
+                    if new_key is not None:
+                        self._search_index.add(new_key)
+                self._search_version = self.storage.catalog_version()
+            if self._skus is not None:
+                if old is not None and old.sku:
+                    self._skus.pop(old.sku, None)
+                if new is not None and new.sku:
+                    self._skus[new.sku] = new_key
+                self._skus_version = self.storage.catalog_version()
+    
+    def warm_indexes(self):
+        """Build or resync the search and SKU indexes now rather than on next use"""
+        self._search()
+        self._sku_index()
+    
+    def search(self, query, limit=20):
+        """Get up to limit products whose names match query, best match first
+        
+        Names starting with the query come first, then names with a word
+        starting with it, then close spellings. The index is resynced with
+        the catalog whenever catalog_version() changes, so products added or
+        removed through any model or process are found by the next search,
+        while sales and stock changes leave it alone.
+        """
+        with self._search_lock:
+            keys = self._search().search(query, limit)
+        products = []
+        for category, name in keys:
+            product = self.get_product(category, name)
+            if product is not None:
+                products.append(product)
+        return products
+    
+    def get_product_by_sku(self, sku):
+        """Get the product with a SKU or barcode, or None if there is none
+        
+        The SKU is looked up in memory and only the one product is read
+        from storage, so a scan is quick and its stock is current.
+        """
+        key = self._sku_index().get(sku)
+        if key is None:
+            return None
+        product = self.get_product(*key)
+        # Checked in case the product changed after the index was synced
+        return product if product is not None and product.sku == sku else None
+    
+    def add_product(self, category, name, price, stock, sku=None):
+        """Add a new product to the catalog"""
         try:
-            # Check if product already exists
-            products = self.get_all_products()
-            for product in products:
-                if product.category == category and product.name == name:
-                    return False, "Product already exists in this category"
-            
-            # Add new product
-            with open(self.products_file, 'a') as file:
-                file.write(f"{category},{name},{price},{stock}\n")
+            if sku and self.get_product_by_sku(sku) is not None:
+                return False, "SKU already in use"
+            product = Product(category, name, price, stock, sku)
+            if not self.storage.add_product(product):
+                return False, "Product already exists in this category"
+            self._reindex(None, product)
             return True, "Product added successfully"
         except Exception as e:
             return False, f"Error adding product: {str(e)}"
     
-    def update_product(self, category, name, new_category, new_name, new_price, new_stock):
-        """Update an existing product's details"""
-        products = self.get_all_products()
-        found = False
-        
+    def update_product(self, category, name, new_category, new_name, new_price, new_stock, new_sku=None):
+        """Update an existing product's details; new_sku None keeps its SKU, "" clears it"""
         try:
-            with open(self.products_file, 'w') as file:
-                for product in products:
-                    if product.category == category and product.name == name:
-                        file.write(f"{new_category},{new_name},{new_price},{new_stock}\n")
-                        found = True
-                    else:
-                        file.write(f"{product.category},{product.name},{product.price},{product.stock}\n")
+            old = self.get_product(category, name)
+            if old is None:
+                return False, "Product not found"
+            if new_sku is None:
+                new_sku = old.sku
+            owner = self.get_product_by_sku(new_sku) if new_sku else None
+            if owner is not None and (owner.category, owner.name) != (category, name):
+                return False, "SKU already in use"
+            
+            product = Product(new_category, new_name, new_price, new_stock, new_sku)
+            found = self.storage.update_product(category, name, product)
+            if found:
+                self._reindex(old, product)
             return found, "Product updated successfully" if found else "Product not found"
         except Exception as e:
             return False, f"Error updating product: {str(e)}"
     
     def delete_product(self, category, name):
-        """Delete a product from products.txt"""
-        products = self.get_all_products()
-        found = False
-        
+        """Delete a product from the catalog"""
         try:
-            with open(self.products_file, 'w') as file:
-                for product in products:
-                    if not (product.category == category and product.name == name):
-                        file.write(f"{product.category},{product.name},{product.price},{product.stock}\n")
-                    else:
-                        found = True
+            old = self.get_product(category, name)
+            found = self.storage.delete_product(category, name)
+            if found:
+                self._reindex(old, None)
             return found, "Product deleted successfully" if found else "Product not found"
         except Exception as e:
             return False, f"Error deleting product: {str(e)}"
     
+    def decrement_stock(self, quantities):
+        """Take several quantities off stock in one commit
+        
+        quantities maps (category, name) to the quantity sold. Either every
+        decrement is applied or none is.
+        """
+        try:
+            return self.storage.decrement_stock(quantities)
+        except Exception as e:
+            return False, f"Error updating stock: {str(e)}"
+    
     def update_stock(self, category, name, new_stock):
         """Update a product's stock"""
-        products = self.get_all_products()
-        found = False
-        
         try:
-            with open(self.products_file, 'w') as file:
-                for product in products:
-                    if product.category == category and product.name == name:
-                        file.write(f"{product.category},{product.name},{product.price},{new_stock}\n")
-                        found = True
-                    else:
-                        file.write(f"{product.category},{product.name},{product.price},{product.stock}\n")
+            found = self.storage.update_stock(category, name, new_stock)
             return found, "Stock updated successfully" if found else "Product not found"
         except Exception as e:
-            return False, f"Error updating stock: {str(e)}" 
\ No newline at end of file
+            return False, f"Error updating stock: {str(e)}"
+    
+    def compact(self):
+        """Fold incremental stock changes back into the main catalog store"""
+        return self.storage.compact()
@@ -0,0 +1,275 @@
+import http.client
+import json
+import socket
+import threading
+import uuid
+from model.bill_model import Bill
+from model.product_model import Product
+from model.storage import Storage
+from model.user_model import User
+
+DEFAULT_SERVER = "127.0.0.1:8765"
+
+# Calls that change nothing, so they can be sent again if the connection drops
+READ_CALLS = frozenset({
+    "get_all_products", "get_product", "get_products_by_category", "get_categories",
+    "get_products_page", "data_version", "catalog_version", "get_all_cashiers", "get_sales_for_day"})
+# Calls sent with a request_id the server remembers, so sending one again
+# gets back the first answer instead of saving the bills twice
+KEYED_CALLS = frozenset({"save_bill", "save_bills"})
+
+def encode(value):
+    """Turn storage arguments and results into plain JSON data
+    
+    Products, users and bills are tagged so decode can rebuild them (users
+    without their password, which is never sent), and
+    dicts with tuple keys, such as {(category, name): quantity}, are sent
+    as lists of pairs. A list of products, such as the whole catalog, is
+    sent as one tagged list of rows, which is much quicker to encode and
+    decode than a tag per product.
+    """
+    if isinstance(value, Product):
+        return {"__product__": [value.category, value.name, value.price, value.stock, value.sku]}
+    if isinstance(value, User):
+        return {"__user__": [value.username, value.role]}
+    if isinstance(value, Bill):
+        return {"__bill__": value.to_record(None, None)}
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: encode(item) for key, item in value.items()}
+        return {"__pairs__": [[encode(key), encode(item)] for key, item in value.items()]}
+    if isinstance(value, (list, tuple, range)):
+        if value and all(isinstance(item, Product) for item in value):
+            return {"__products__": [[product.category, product.name, product.price, product.stock, product.sku]
+                                     for product in value]}
+        return [encode(item) for item in value]
+    return value
+
+def decode(value):
+    """Rebuild the objects in data made by encode; tuples come back as lists"""
+    if isinstance(value, list):
+        return [decode(item) for item in value]
+    if isinstance(value, dict):
+        if "__products__" in value:
+            return [Product(*row) for row in value["__products__"]]
+        if "__product__" in value:
+            return Product(*value["__product__"])
+        if "__user__" in value:
+            username, role = value["__user__"]
+            return User(username, "", role)
+        if "__bill__" in value:
+            return Bill.from_record(value["__bill__"])
+        if "__pairs__" in value:
+            return {tuple(key) if isinstance(key, list) else key: decode(item)
+                    for key, item in value["__pairs__"]}
+        return {key: decode(item) for key, item in value.items()}
+    return value
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket"""
+    
+    def __init__(self, path, timeout):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+    
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+class RemoteStorage(Storage):
+    """Storage kept by a Smart Mart server (see server/api_server.py)
+    
+    Every call is sent to the server, which owns the one copy of the
+    catalog, accounts and bills that all tills share. address is
+    "host:port" or "unix:/path/to/socket". Each thread keeps its own
+    connection open between calls.
+    
+    Calls need a login. UserModel sends logins to the server (see
+    authenticate), and the session token it gets back is used by every
+    RemoteStorage in the process that talks to the same server, until
+    logout(). The server only accepts the calls the logged-in role needs.
+    """
+    
+    verifies_logins = True
+    # Session token by server address, shared by the models of one till
+    _tokens = {}
+    
+    def __init__(self, address=DEFAULT_SERVER, timeout=30):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+        self._server_id = None  # Server-Id of the last answer, which changes when the server restarts
+    
+    def _connect(self):
+        """Open a new connection to the server"""
+        if self.address.startswith("unix:"):
+            return _UnixHTTPConnection(self.address[len("unix:"):], self.timeout)
+        host, _, port = self.address.rpartition(":")
+        return http.client.HTTPConnection(host or "127.0.0.1", int(port), timeout=self.timeout)
+    
+    def _headers(self):
+        """Get the request headers, with the session token once logged in"""
+        headers = {"Content-Type": "application/json"}
+        token = self._tokens.get(self.address)
+        if token is not None:
+            headers["Authorization"] = f"Bearer {token}"
+        return headers
+    
+    def _post(self, path, payload, resend=False):
+        """Send a JSON payload to the server; returns (status, decoded answer)
+        
+        A kept connection may have been dropped by a restarted server, and
+        then the request may or may not have been carried out. Only when
+        resend is set, for requests that are safe to repeat, is it sent
+        once more on a new connection. A request with a request_id is sent
+        again with the Server-Id last seen, so a restarted server, which no
+        longer knows the id, refuses it rather than saving twice.
+        """
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        connection = getattr(self._local, "connection", None)
+        for reused in ((True, False) if connection is not None and resend else (False,)):
+            if connection is None:
+                connection = self._local.connection = self._connect()
+            try:
+                connection.request("POST", path, body, self._headers())
+                response = connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError) as e:
+                connection.close()
+                connection = self._local.connection = None
+                if not reused:
+                    raise ConnectionError(f"Lost the connection to the server at {self.address}: {str(e)}")
+                if "request_id" in payload:
+                    body = json.dumps(dict(payload, server_id=self._server_id), separators=(",", ":")).encode("utf-8")
+            except OSError as e:
+                connection.close()
+                self._local.connection = None
+                raise ConnectionError(f"Cannot reach the server at {self.address}: {str(e)}")
+        self._server_id = response.getheader("Server-Id", self._server_id)
+        return response.status, json.loads(data)
+    
+    def _call(self, method, *args):
+        """Run a storage method on the server and return its result"""
+        request = {"args": encode(args)}
+        if method in KEYED_CALLS:
+            request["request_id"] = uuid.uuid4().hex
+        status, payload = self._post(f"/call/{method}", request, resend=method in READ_CALLS | KEYED_CALLS)
+        if status in (401, 403):
+            raise PermissionError(payload.get("error", "Not allowed"))
+        if status != 200:
+            raise RuntimeError(payload.get("error", f"Server error {status}"))
+        return decode(payload["result"])
+    
+    # Session
+    def authenticate(self, username, password, role):
+        status, payload = self._post("/login", {"username": username, "password": password, "role": role})
+        if status == 401:
+            return None
+        if status != 200:
+            raise RuntimeError(payload.get("error", f"Server error {status}"))
+        self._tokens[self.address] = payload["token"]
+        return User(username, password, role)
+    
+    def logout(self):
+        if self.address in self._tokens:
+            self._post("/logout", {})
+            self._tokens.pop(self.address, None)
+    
+    # Products
+    def get_all_products(self):
+        return self._call("get_all_products")
+    
+    def get_product(self, category, name):
+        return self._call("get_product", category, name)
+    
+    def get_products_by_category(self, category):
+        return self._call("get_products_by_category", category)
+    
+    def get_categories(self):
+        return self._call("get_categories")
+    
+    def get_products_page(self, category, offset, limit, sort_key=None):
+        return self._call("get_products_page", category, offset, limit, sort_key)
+    
+    def add_product(self, product):
+        return self._call("add_product", product)
+    
+    def update_product(self, category, name, product):
+        return self._call("update_product", category, name, product)
+    
+    def delete_product(self, category, name):
+        return self._call("delete_product", category, name)
+    
+    def update_stock(self, category, name, new_stock):
+        return self._call("update_stock", category, name, new_stock)
+    
+    def decrement_stock(self, quantities):
+        raise PermissionError("Tills take stock off by saving bills")
+    
+    def data_version(self):
+        return self._call("data_version")
+    
+    def catalog_version(self):
+        return self._call("catalog_version")
+    
+    # Users; passwords stay on the server, which checks logins itself
+    def get_user(self, username, role):
+        raise PermissionError("Accounts are kept by the server")
+    
+    def get_all_users(self):
+        raise PermissionError("Accounts are kept by the server")
+    
+    def replace_password(self, username, role, old_password, new_password):
+        raise PermissionError("Accounts are kept by the server")
+    
+    def get_all_cashiers(self):
+        return self._call("get_all_cashiers")
+    
+    def add_cashier(self, username, password):
+        return self._call("add_cashier", username, password)
+    
+    def update_cashier(self, old_username, new_username, new_password):
+        return self._call("update_cashier", old_username, new_username, new_password)
+    
+    def delete_cashier(self, username):
+        return self._call("delete_cashier", username)
+    
+    # Bills
+    def next_bill_number(self):
+        raise PermissionError("Bill numbers are given out by the server when a bill is saved")
+    
+    def save_bill(self, bill, quantities):
+        return self._call("save_bill", bill, quantities)
+    
+    def save_bills(self, batch):
+        return self._call("save_bills", batch)
+    
+    def iter_bills(self):
+        # Streamed as one JSON bill per line on a connection of its own,
+        # so a long history is never held in memory on either side
+        connection = self._connect()
+        try:
+            try:
+                connection.request("GET", "/bills", headers=self._headers())
+                response = connection.getresponse()
+                if response.status != 200:
+                    error = json.loads(response.read()).get("error", f"Server error {response.status}")
+            except OSError as e:
+                raise ConnectionError(f"Cannot reach the server at {self.address}: {str(e)}")
+            if response.status in (401, 403):
+                raise PermissionError(error)
+            if response.status != 200:
+                raise RuntimeError(error)
+            try:
+                for line in response:
+                    if line.strip():
+                        yield json.loads(line)
+            except OSError as e:
+                raise ConnectionError(f"Lost the connection to the server at {self.address}: {str(e)}")
+        finally:
+            connection.close()
+    
+    def get_sales_for_day(self, day):
+        return self._call("get_sales_for_day", day)
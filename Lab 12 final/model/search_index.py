@@ -0,0 +1,232 @@
+import bisect
+import heapq
+import sys
+from array import array
+
+def normalize(text):
+    """Lower-case text and collapse its whitespace"""
+    return " ".join(text.lower().split())
+
+def trigrams(word):
+    """Get the set of three-letter slices of a word, padded at the ends
+    
+    The start gets two pads so a word's first letter counts twice: typos
+    are rarer there, and short words still share enough slices to match.
+    """
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchIndex:
+    """In-memory product name index for type-ahead search
+    
+    Products are found three ways, best first:
+    - full names starting with the query;
+    - names with a word starting with the query;
+    - fuzzy matches: every query word is matched against the vocabulary of
+      name words by shared trigrams, so "lptop" still finds "Laptop".
+    
+    Names and words are kept in sorted lists (bisected for prefixes) with
+    the product id of each entry in a parallel array. Trigram postings are
+    kept per distinct word, not per product, so they stay small when many
+    products share their words.
+    
+    Products get integer ids. Removing a product only marks its id dead,
+    and search skips dead ids; the index is rebuilt once dead ids pile up.
+    """
+    
+    # Fuzzy matching counts at most this many trigram postings per query word
+    FUZZY_BUDGET = 5000
+    # ... keeps this many similar vocabulary words per query word
+    FUZZY_WORDS = 8
+    # ... and scores at most this many candidate products
+    FUZZY_CANDIDATES = 300
+    # Words (and names, on average over the query) must be at least this similar
+    FUZZY_THRESHOLD = 0.4
+    
+    def __init__(self, keys=()):
+        self.rebuild(keys)
+    
+    def rebuild(self, keys):
+        """Index every (category, name) key from scratch"""
+        self._keys = []        # id -> (category, name), None once removed
+        self._ids = {}         # (category, name) -> id
+        self._vocabulary = []  # word id -> word
+        self._word_ids = {}    # word -> word id
+        self._trigrams = {}    # trigram -> array('i') of word ids
+        self._dead = 0
+        
+        names = []
+        words = []
+        for key in keys:
+            if key in self._ids:
+                continue
+            product_id = self._new_id(key)
+            name, name_words = self._tokens_of(key)
+            names.append((name, product_id))
+            words.extend((word, product_id) for word in name_words)
+        names.sort()
+        words.sort()
+        
+        self._names = [name for name, _ in names]
+        self._name_ids = array('i', (product_id for _, product_id in names))
+        self._words = [word for word, _ in words]
+        self._word_product_ids = array('i', (product_id for _, product_id in words))
+    
+    def __len__(self):
+        return len(self._ids)
+    
+    def __contains__(self, key):
+        return key in self._ids
+    
+    def keys(self):
+        """Get a view of the indexed (category, name) keys"""
+        return self._ids.keys()
+    
+    def _new_id(self, key):
+        """Give a key the next product id"""
+        product_id = len(self._keys)
+        self._keys.append(key)
+        self._ids[key] = product_id
+        return product_id
+    
+    def _tokens_of(self, key):
+        """Get (normalized full name, set of its words), adding new words to the vocabulary"""
+        name = normalize(key[1])
+        words = set()
+        for word in name.split():
+            if word not in self._word_ids:
+                # Interned, so a word shared by many products is stored once
+                word = sys.intern(word)
+                word_id = self._word_ids[word] = len(self._vocabulary)
+                self._vocabulary.append(word)
+                for gram in trigrams(word):
+                    postings = self._trigrams.get(gram)
+                    if postings is None:
+                        postings = self._trigrams[gram] = array('i')
+                    postings.append(word_id)
+            words.add(word)
+        return name, words
+    
+    def add(self, key):
+        """Index one (category, name) key"""
+        if key in self._ids:
+            return
+        product_id = self._new_id(key)
+        name, words = self._tokens_of(key)
+        
+        position = bisect.bisect_right(self._names, name)
+        self._names.insert(position, name)
+        self._name_ids.insert(position, product_id)
+        for word in words:
+            position = bisect.bisect_right(self._words, word)
+            self._words.insert(position, word)
+            self._word_product_ids.insert(position, product_id)
+    
+    def remove(self, key):
+        """Drop one (category, name) key from the index"""
+        product_id = self._ids.pop(key, None)
+        if product_id is None:
+            return
+        self._keys[product_id] = None
+        self._dead += 1
+        if self._dead > 1000 and self._dead > len(self._ids):
+            self.rebuild([key for key in self._keys if key is not None])
+    
+    def search(self, query, limit=20):
+        """Get up to limit (category, name) keys matching query, best first"""
+        query = normalize(query)
+        if not query or limit <= 0:
+            return []
+        
+        results = []
+        seen = set()
+        for tokens, ids in ((self._names, self._name_ids), (self._words, self._word_product_ids)):
+            position = bisect.bisect_left(tokens, query)
+            while position < len(tokens) and len(results) < limit:
+                if not tokens[position].startswith(query):
+                    break
+                product_id = ids[position]
+                position += 1
+                if self._keys[product_id] is not None and product_id not in seen:
+                    seen.add(product_id)
+                    results.append(self._keys[product_id])
+        
+        if len(results) < limit:
+            for product_id in self._fuzzy(query.split(), limit - len(results), seen):
+                results.append(self._keys[product_id])
+        return results
+    
+    def _similar_words(self, query_word):
+        """Get {vocabulary word: similarity} for the words most like query_word"""
+        grams = trigrams(query_word)
+        postings = sorted((self._trigrams[gram] for gram in grams if gram in self._trigrams), key=len)
+        
+        # Count shared trigrams, rarest first, within a fixed budget
+        counts = {}
+        budget = self.FUZZY_BUDGET
+        for word_ids in postings:
+            if budget <= 0:
+                break
+            for word_id in word_ids[:budget]:
+                counts[word_id] = counts.get(word_id, 0) + 1
+            budget -= len(word_ids)
+        
+        similar = {}
+        for word_id, _ in heapq.nlargest(self.FUZZY_WORDS * 4, counts.items(), key=lambda item: item[1]):
+            word = self._vocabulary[word_id]
+            word_grams = trigrams(word)
+            # Dice coefficient: shared slices over the average slice count
+            score = 2 * len(grams & word_grams) / (len(grams) + len(word_grams))
+            if score >= self.FUZZY_THRESHOLD:
+                similar[word] = score
+        return dict(heapq.nlargest(self.FUZZY_WORDS, similar.items(), key=lambda item: item[1]))
+    
+    def _products_with(self, word):
+        """Get the (start, end) range of word in the sorted word list"""
+        return bisect.bisect_left(self._words, word), bisect.bisect_right(self._words, word)
+    
+    def _fuzzy(self, query_words, limit, exclude):
+        """Get up to limit product ids whose name words resemble the query words"""
+        similar = [self._similar_words(word) for word in query_words]
+        if not any(similar):
+            return []
+        if len(similar) == 1:
+            return self._fuzzy_word(similar[0], limit, exclude)
+        
+        # Draw candidates from the query word whose similar words are rarest
+        def product_count(words):
+            return sum(end - start for start, end in map(self._products_with, words)) or len(self._words) + 1
+        rarest = min(similar, key=product_count)
+        candidates = set()
+        for word in sorted(rarest, key=rarest.get, reverse=True):
+            start, end = self._products_with(word)
+            candidates.update(self._word_product_ids[start:min(end, start + self.FUZZY_CANDIDATES)])
+            if len(candidates) >= self.FUZZY_CANDIDATES:
+                break
+        
+        # Score each candidate by how well its words cover every query word
+        scored = []
+        for product_id in candidates:
+            key = self._keys[product_id]
+            if key is None or product_id in exclude:
+                continue
+            words = normalize(key[1]).split()
+            score = sum(max((scores.get(word, 0.0) for word in words), default=0.0)
+                        for scores in similar) / len(similar)
+            if score >= self.FUZZY_THRESHOLD:
+                scored.append((-score, key[1], product_id))
+        return [product_id for _, _, product_id in heapq.nsmallest(limit, scored)]
+    
+    def _fuzzy_word(self, similar, limit, exclude):
+        """Get up to limit product ids for a one-word query, most similar word first"""
+        # A product scores as its best similar word, so no per-product scoring
+        results = []
+        for word in sorted(similar, key=lambda word: (-similar[word], word)):
+            start, end = self._products_with(word)
+            for product_id in self._word_product_ids[start:end]:
+                if self._keys[product_id] is not None and product_id not in exclude:
+                    exclude.add(product_id)
+                    results.append(product_id)
+                    if len(results) >= limit:
+                        return results
+        return results
@@ -0,0 +1,398 @@
+import datetime
+import sqlite3
+import threading
+from contextlib import contextmanager
+from model.product_model import Product
+from model.storage import Storage, parse_sort_key
+from model.user_model import User
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    stock INTEGER NOT NULL,
+    sku TEXT,
+    UNIQUE (category, name)
+);
+CREATE INDEX IF NOT EXISTS idx_products_category ON products (category);
+CREATE INDEX IF NOT EXISTS idx_products_name ON products (name);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products (price);
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL,
+    UNIQUE (role, username)
+);
+
+CREATE TABLE IF NOT EXISTS bills (
+    number INTEGER PRIMARY KEY,
+    cashier TEXT,
+    created_at TEXT,
+    payment_method TEXT,
+    total REAL,
+    discount REAL,
+    final_amount REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bills_created_at ON bills (created_at);
+
+CREATE TABLE IF NOT EXISTS bill_lines (
+    bill_number INTEGER NOT NULL REFERENCES bills (number),
+    line INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    quantity INTEGER NOT NULL,
+    subtotal REAL NOT NULL,
+    PRIMARY KEY (bill_number, line)
+);
+CREATE INDEX IF NOT EXISTS idx_bill_lines_product ON bill_lines (category, name);
+
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+class SQLiteStorage(Storage):
+    """Storage in a single SQLite database (WAL mode, indexed tables)
+    
+    Every write is a targeted UPDATE/INSERT/DELETE inside a transaction, so
+    nothing is rewritten wholesale and several terminals can share the
+    database file.
+    """
+    
+    def __init__(self, database="data/smartmart.db"):
+        self.database = database
+        self._lock = threading.RLock()
+        self._commits = 0
+        self._connection = sqlite3.connect(database, timeout=30, isolation_level=None,
+                                           check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._upgrade_schema()
+    
+    def _upgrade_schema(self):
+        """Bring a database created by an older version up to the current schema"""
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(products)")]
+        if "sku" not in columns:
+            self._connection.execute("ALTER TABLE products ADD COLUMN sku TEXT")
+        # Products without a SKU (NULL) do not clash with each other
+        self._connection.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_products_sku ON products (sku)")
+    
+    @contextmanager
+    def _transaction(self):
+        """Run a block inside one write transaction, rolling back on error"""
+        with self._lock:
+            cursor = self._connection.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+            self._commits += 1
+    
+    def _query(self, sql, params=()):
+        """Run a read-only query and return all rows"""
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._connection.close()
+    
+    def data_version(self):
+        # PRAGMA data_version only moves for commits made by other connections
+        return (self._query("PRAGMA data_version")[0][0], self._commits)
+    
+    def catalog_version(self):
+        rows = self._query("SELECT value FROM sequences WHERE name = 'catalog'")
+        return rows[0][0] if rows else 0
+    
+    def _bump_catalog(self, cursor):
+        """Move catalog_version() on inside an open transaction that added, changed or deleted a product"""
+        cursor.execute("INSERT OR IGNORE INTO sequences (name, value) VALUES ('catalog', 0)")
+        cursor.execute("UPDATE sequences SET value = value + 1 WHERE name = 'catalog'")
+    
+    # Products
+    def get_all_products(self):
+        rows = self._query("SELECT category, name, price, stock, sku FROM products ORDER BY id")
+        return [Product(*row) for row in rows]
+    
+    def get_product(self, category, name):
+        rows = self._query("SELECT category, name, price, stock, sku FROM products "
+                           "WHERE category = ? AND name = ?", (category, name))
+        return Product(*rows[0]) if rows else None
+    
+    def get_products_by_category(self, category):
+        rows = self._query("SELECT category, name, price, stock, sku FROM products "
+                           "WHERE category = ? ORDER BY id", (category,))
+        return [Product(*row) for row in rows]
+    
+    def get_categories(self):
+        return [row[0] for row in self._query("SELECT DISTINCT category FROM products ORDER BY category")]
+    
+    def get_products_page(self, category, offset, limit, sort_key=None):
+        field, descending = parse_sort_key(sort_key)
+        where, params = ("WHERE category = ? ", (category,)) if category is not None else ("", ())
+        order = f"{field} {'DESC' if descending else 'ASC'}, id" if field is not None else "id"
+        
+        with self._lock:
+            total = self._connection.execute(f"SELECT COUNT(*) FROM products {where}", params).fetchone()[0]
+            rows = self._connection.execute(f"SELECT category, name, price, stock, sku FROM products {where}"
+                                            f"ORDER BY {order} LIMIT ? OFFSET ?",
+                                            params + (limit, offset)).fetchall()
+        return total, [Product(*row) for row in rows]
+    
+    def add_product(self, product):
+        with self._transaction() as cursor:
+            cursor.execute("INSERT OR IGNORE INTO products (category, name, price, stock, sku) "
+                           "VALUES (?, ?, ?, ?, ?)",
+                           (product.category, product.name, product.price, product.stock, product.sku))
+            if cursor.rowcount != 1:
+                return False
+            self._bump_catalog(cursor)
+            return True
+    
+    def update_product(self, category, name, product):
+        with self._transaction() as cursor:
+            cursor.execute("UPDATE products SET category = ?, name = ?, price = ?, stock = ?, sku = ? "
+                           "WHERE category = ? AND name = ?",
+                           (product.category, product.name, product.price, product.stock, product.sku,
+                            category, name))
+            if cursor.rowcount != 1:
+                return False
+            self._bump_catalog(cursor)
+            return True
+    
+    def delete_product(self, category, name):
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM products WHERE category = ? AND name = ?", (category, name))
+            if cursor.rowcount != 1:
+                return False
+            self._bump_catalog(cursor)
+            return True
+    
+    def update_stock(self, category, name, new_stock):
+        with self._transaction() as cursor:
+            cursor.execute("UPDATE products SET stock = ? WHERE category = ? AND name = ?",
+                           (int(new_stock), category, name))
+            return cursor.rowcount == 1
+    
+    def _decrement_stock(self, cursor, quantities):
+        """Validate and apply stock decrements inside an open transaction"""
+        for (category, name), quantity in quantities.items():
+            row = cursor.execute("SELECT stock FROM products WHERE category = ? AND name = ?",
+                                 (category, name)).fetchone()
+            if row is None:
+                return False, f"Product not found: {name}"
+            if quantity > row[0]:
+                return False, f"Insufficient stock for {name}. Available: {row[0]}"
+        
+        cursor.executemany("UPDATE products SET stock = stock - ? WHERE category = ? AND name = ?",
+                           [(quantity, category, name) for (category, name), quantity in quantities.items()])
+        return True, "Stock updated successfully"
+    
+    def decrement_stock(self, quantities):
+        with self._transaction() as cursor:
+            return self._decrement_stock(cursor, quantities)
+    
+    # Users
+    def get_user(self, username, role):
+        rows = self._query("SELECT username, password, role FROM users WHERE username = ? AND role = ?",
+                           (username, role))
+        return User(*rows[0]) if rows else None
+    
+    def get_all_cashiers(self):
+        rows = self._query("SELECT username, password, role FROM users WHERE role = 'cashier' ORDER BY id")
+        return [User(*row) for row in rows]
+    
+    def get_all_users(self):
+        rows = self._query("SELECT username, password, role FROM users ORDER BY role = 'cashier', id")
+        return [User(*row) for row in rows]
+    
+    def add_cashier(self, username, password):
+        with self._transaction() as cursor:
+            cursor.execute("INSERT OR IGNORE INTO users (username, password, role) VALUES (?, ?, 'cashier')",
+                           (username, password))
+            return cursor.rowcount == 1
+    
+    def update_cashier(self, old_username, new_username, new_password):
+        with self._transaction() as cursor:
+            cursor.execute("UPDATE users SET username = ?, password = ? WHERE username = ? AND role = 'cashier'",
+                           (new_username, new_password, old_username))
+            return cursor.rowcount == 1
+    
+    def delete_cashier(self, username):
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM users WHERE username = ? AND role = 'cashier'", (username,))
+            return cursor.rowcount == 1
+    
+    def replace_password(self, username, role, old_password, new_password):
+        with self._transaction() as cursor:
+            cursor.execute("UPDATE users SET password = ? WHERE username = ? AND role = ? AND password = ?",
+                           (new_password, username, role, old_password))
+            return cursor.rowcount == 1
+    
+    def set_admin(self, username, password):
+        """Create or replace the admin account"""
+        with self._transaction() as cursor:
+            cursor.execute("DELETE FROM users WHERE role = 'admin'")
+            cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, 'admin')",
+                           (username, password))
+    
+    # Bills
+    def _next_bill_number(self, cursor):
+        """Allocate a bill number inside an open transaction"""
+        cursor.execute("INSERT OR IGNORE INTO sequences (name, value) "
+                       "SELECT 'bill', COALESCE(MAX(number), 0) FROM bills")
+        cursor.execute("UPDATE sequences SET value = value + 1 WHERE name = 'bill'")
+        return cursor.execute("SELECT value FROM sequences WHERE name = 'bill'").fetchone()[0]
+    
+    def next_bill_number(self):
+        with self._transaction() as cursor:
+            return self._next_bill_number(cursor)
+    
+    def _insert_bill(self, cursor, bill, bill_number, created_at):
+        """Insert a bill and its lines inside an open transaction"""
+        cursor.execute("INSERT INTO bills (number, cashier, created_at, payment_method, total, discount, "
+                       "final_amount) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                       (bill_number, bill.cashier.username, created_at,
+                        bill.payment_method, bill.total, bill.discount, bill.final_amount))
+        cursor.executemany("INSERT INTO bill_lines (bill_number, line, category, name, price, quantity, "
+                           "subtotal) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           [(bill_number, line, item.product.category, item.product.name,
+                             item.product.price, item.quantity, item.subtotal)
+                            for line, item in enumerate(bill.items, start=1)])
+    
+    def save_bill(self, bill, quantities):
+        return self.save_bills([(bill, quantities)])[0]
+    
+    def save_bills(self, batch):
+        # One transaction, so one WAL commit, for the whole batch; a bill
+        # that fails its stock check changes nothing, so it needs no savepoint
+        results = []
+        with self._transaction() as cursor:
+            created_at = datetime.datetime.now().isoformat()
+            for bill, quantities in batch:
+                success, message = self._decrement_stock(cursor, quantities)
+                if not success:
+                    results.append((False, message))
+                    continue
+                bill_number = self._next_bill_number(cursor)
+                self._insert_bill(cursor, bill, bill_number, created_at)
+                results.append((True, bill_number))
+        return results
+    
+    def iter_bills(self):
+        # A separate connection streams rows without holding the shared one
+        connection = sqlite3.connect(self.database, timeout=30)
+        try:
+            rows = connection.execute(
+                "SELECT b.number, b.cashier, b.created_at, b.payment_method, b.total, b.discount, "
+                "b.final_amount, l.category, l.name, l.price, l.quantity, l.subtotal "
+                "FROM bills b LEFT JOIN bill_lines l ON l.bill_number = b.number "
+                "ORDER BY b.number, l.line")
+            record = None
+            for row in rows:
+                if record is None or record["number"] != row[0]:
+                    if record is not None:
+                        yield record
+                    record = {"number": row[0], "cashier": row[1], "timestamp": row[2],
+                              "payment_method": row[3], "total": row[4], "discount": row[5],
+                              "final_amount": row[6], "items": []}
+                if row[7] is not None:
+                    record["items"].append({"category": row[7], "name": row[8], "price": row[9],
+                                            "quantity": row[10], "subtotal": row[11]})
+            if record is not None:
+                yield record
+        finally:
+            connection.close()
+    
+    def get_sales_for_day(self, day):
+        next_day = (datetime.date.fromisoformat(day) + datetime.timedelta(days=1)).isoformat()
+        rows = self._query("SELECT COUNT(*), COALESCE(SUM(final_amount), 0) FROM bills "
+                           "WHERE created_at >= ? AND created_at < ?", (day, next_day))
+        return rows[0][0], float(rows[0][1])
+    
+    def import_text_data(self, text_storage):
+        """Copy products, users and bill history from a TextStorage
+        
+        Returns a dict with the number of records imported of each kind.
+        """
+        counts = {"products": 0, "cashiers": 0, "admin": 0, "bills": 0}
+        
+        with self._transaction() as cursor:
+            for product in text_storage.get_all_products():
+                cursor.execute("INSERT OR REPLACE INTO products (category, name, price, stock, sku) "
+                               "VALUES (?, ?, ?, ?, ?)",
+                               (product.category, product.name, product.price, product.stock, product.sku))
+                counts["products"] += 1
+            
+            for cashier in text_storage.get_all_cashiers():
+                cursor.execute("INSERT OR REPLACE INTO users (username, password, role) "
+                               "VALUES (?, ?, 'cashier')", (cashier.username, cashier.password))
+                counts["cashiers"] += 1
+            
+            try:
+                with open(text_storage.admin_file, 'r') as file:
+                    admin_data = file.read().strip().split(',')
+                if len(admin_data) >= 2:
+                    cursor.execute("DELETE FROM users WHERE role = 'admin'")
+                    cursor.execute("INSERT INTO users (username, password, role) VALUES (?, ?, 'admin')",
+                                   (admin_data[0], admin_data[1]))
+                    counts["admin"] = 1
+            except FileNotFoundError:
+                pass
+            
+            # Full records from bills.jsonl first, with their line items
+            used = {row[0] for row in cursor.execute("SELECT number FROM bills")}
+            for record in text_storage.iter_bills():
+                if record["number"] in used:
+                    continue
+                cursor.execute("INSERT INTO bills (number, cashier, created_at, payment_method, total, "
+                               "discount, final_amount) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (record["number"], record["cashier"], record["timestamp"],
+                                record["payment_method"], record["total"], record["discount"],
+                                record["final_amount"]))
+                cursor.executemany("INSERT INTO bill_lines (bill_number, line, category, name, price, "
+                                   "quantity, subtotal) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                   [(record["number"], line, item["category"], item["name"], item["price"],
+                                     item["quantity"], item["subtotal"])
+                                    for line, item in enumerate(record["items"], start=1)])
+                used.add(record["number"])
+                counts["bills"] += 1
+            detailed = set(used)
+            
+            # bills.txt only holds "Bill N: amount"; bills already imported in
+            # full are skipped and repeated numbers get fresh ones
+            try:
+                with open(text_storage.bills_file, 'r') as file:
+                    records = [line.strip() for line in file if line.strip()]
+            except FileNotFoundError:
+                records = []
+            for record in records:
+                label, _, amount = record.partition(':')
+                number = label.replace("Bill", "").strip()
+                number = int(number) if number.isdigit() else 0
+                if number in detailed:
+                    detailed.discard(number)
+                    continue
+                if number <= 0 or number in used:
+                    number = max(used, default=0) + 1
+                cursor.execute("INSERT INTO bills (number, final_amount) VALUES (?, ?)",
+                               (number, float(amount)))
+                used.add(number)
+                counts["bills"] += 1
+            
+            cursor.execute("INSERT OR REPLACE INTO sequences (name, value) VALUES ('bill', ?)",
+                           (max(used, default=0),))
+        
+        return counts
@@ -0,0 +1,199 @@
+import os
+from abc import ABC, abstractmethod
+
+# Fields get_products_page can sort on; prefix one with "-" for descending
+SORT_KEYS = ("category", "name", "price", "stock")
+
+def parse_sort_key(sort_key):
+    """Split a sort key such as "-price" into (field, descending); None keeps catalog order"""
+    if sort_key is None:
+        return None, False
+    field = sort_key.lstrip("-")
+    if field not in SORT_KEYS:
+        raise ValueError(f"Cannot sort products by {sort_key}")
+    return field, sort_key.startswith("-")
+
+class Storage(ABC):
+    """Interface the models use to persist products, users and bills
+    
+    TextStorage keeps the original data/*.txt files and SQLiteStorage keeps
+    everything in one SQLite database. Models only talk to this interface,
+    so either backend can sit underneath the controllers unchanged.
+    
+    A backend cannot be created until it implements every abstract method;
+    the other methods have working defaults.
+    """
+    
+    # Products
+    @abstractmethod
+    def get_all_products(self):
+        """Get every product in catalog order"""
+    
+    @abstractmethod
+    def get_product(self, category, name):
+        """Get a single product, or None if not found"""
+    
+    @abstractmethod
+    def get_products_by_category(self, category):
+        """Get the products in one category"""
+    
+    @abstractmethod
+    def get_categories(self):
+        """Get the sorted list of categories"""
+    
+    def get_products_page(self, category, offset, limit, sort_key=None):
+        """Get (total, products) for one page of a category, or of every product if category is None
+        
+        sort_key is one of SORT_KEYS, optionally prefixed with "-" for
+        descending order; None keeps catalog order.
+        """
+        field, descending = parse_sort_key(sort_key)
+        products = self.get_products_by_category(category) if category is not None else self.get_all_products()
+        if field is not None:
+            products.sort(key=lambda product: getattr(product, field), reverse=descending)
+        return len(products), products[offset:offset + limit]
+    
+    @abstractmethod
+    def add_product(self, product):
+        """Add a product; return False if it already exists"""
+    
+    @abstractmethod
+    def update_product(self, category, name, product):
+        """Replace a product's details; return False if it was not found"""
+    
+    @abstractmethod
+    def delete_product(self, category, name):
+        """Delete a product; return False if it was not found"""
+    
+    @abstractmethod
+    def update_stock(self, category, name, new_stock):
+        """Set a product's stock; return False if it was not found"""
+    
+    @abstractmethod
+    def decrement_stock(self, quantities):
+        """Take {(category, name): quantity} off stock, all or nothing
+        
+        Returns (success, message). Checkouts use save_bill instead, which
+        commits the bill with its stock changes.
+        """
+    
+    def compact(self):
+        """Reclaim space used by incremental writes"""
+        return True, "Nothing to compact"
+    
+    @abstractmethod
+    def data_version(self):
+        """Get a cheap token that changes whenever products, users or bills change"""
+    
+    def catalog_version(self):
+        """Get a cheap token that changes whenever a product is added, renamed, deleted or given a new SKU
+        
+        Stock changes and bills may leave it alone, so indexes of names and
+        SKUs keyed on it are not rebuilt after every checkout.
+        """
+        return self.data_version()
+    
+    # Users
+    # Set by backends that check passwords themselves; UserModel then logs
+    # in through authenticate() instead of reading the accounts
+    verifies_logins = False
+    
+    def authenticate(self, username, password, role):
+        """Check a login where the accounts are kept; return the User or None"""
+        raise NotImplementedError
+    
+    def logout(self):
+        """End the session started by authenticate()"""
+    
+    @abstractmethod
+    def get_user(self, username, role):
+        """Get a user with its stored password, or None if not found"""
+    
+    @abstractmethod
+    def get_all_cashiers(self):
+        """Get every cashier account"""
+    
+    @abstractmethod
+    def get_all_users(self):
+        """Get every account, admins and cashiers, with its stored password"""
+    
+    def users_version(self):
+        """Get a cheap token that changes whenever an account changes"""
+        return self.data_version()
+    
+    @abstractmethod
+    def add_cashier(self, username, password):
+        """Add a cashier; return False if the username is taken"""
+    
+    @abstractmethod
+    def update_cashier(self, old_username, new_username, new_password):
+        """Update a cashier; return False if it was not found"""
+    
+    @abstractmethod
+    def delete_cashier(self, username):
+        """Delete a cashier; return False if it was not found"""
+    
+    @abstractmethod
+    def replace_password(self, username, role, old_password, new_password):
+        """Replace an account's stored password if it is still old_password; return False otherwise"""
+    
+    # Bills
+    @abstractmethod
+    def next_bill_number(self):
+        """Allocate the next bill number"""
+    
+    @abstractmethod
+    def save_bill(self, bill, quantities):
+        """Record a bill and take its items off stock in one commit
+        
+        Returns (True, bill_number) or (False, reason).
+        """
+    
+    def save_bills(self, batch):
+        """Save a batch of (bill, quantities) pairs, committing them together
+        
+        Each bill is checked against the stock left by the bills before it,
+        so one failing bill does not fail the others. Returns one
+        (True, bill_number) or (False, reason) per bill, in order.
+        """
+        return [self.save_bill(bill, quantities) for bill, quantities in batch]
+    
+    @abstractmethod
+    def iter_bills(self):
+        """Yield every saved bill as a dict (see Bill.to_record), oldest first"""
+    
+    def get_sales_for_day(self, day):
+        """Get (bill count, amount paid) for the bills saved on a YYYY-MM-DD day"""
+        count, total = 0, 0.0
+        for record in self.iter_bills():
+            if (record.get("timestamp") or "").startswith(day):
+                count += 1
+                total += record["final_amount"]
+        return count, total
+
+def open_storage(data_dir="data"):
+    """Open the storage backend chosen by the SMARTMART_STORAGE environment variable
+    
+    "text" (the default) uses the files in data_dir. "binary" is the same
+    but keeps the catalog in the memory-mapped data_dir/products.bin.
+    "sqlite" uses the database named by SMARTMART_DB, or data_dir/smartmart.db.
+    "remote" uses a Smart Mart server at SMARTMART_SERVER ("host:port" or
+    "unix:/path"), which keeps the data for every till; data_dir is unused.
+    """
+    backend = os.environ.get("SMARTMART_STORAGE", "text").lower()
+    
+    if backend == "sqlite":
+        from model.sqlite_storage import SQLiteStorage
+        database = os.environ.get("SMARTMART_DB", os.path.join(data_dir, "smartmart.db"))
+        return SQLiteStorage(database)
+    elif backend == "binary":
+        from model.binary_storage import BinaryStorage
+        return BinaryStorage(data_dir)
+    elif backend == "remote":
+        from model.remote_storage import DEFAULT_SERVER, RemoteStorage
+        return RemoteStorage(os.environ.get("SMARTMART_SERVER", DEFAULT_SERVER))
+    elif backend == "text":
+        from model.text_storage import TextStorage
+        return TextStorage(data_dir)
+    
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,667 @@
+import datetime
+import json
+import os
+import threading
+import zlib
+from model.file_lock import FileLock, atomic_write, open_locked, unlock_file
+from model.product_model import Product
+from model.storage import Storage, parse_sort_key
+from model.user_model import User
+
+def format_product(product):
+    """Format a product as a category,name,price,stock[,sku] line (without the newline)"""
+    line = f"{product.category},{product.name},{product.price},{product.stock}"
+    return f"{line},{product.sku}" if product.sku else line
+
+class TextStorage(Storage):
+    """Storage on the flat text files in data/
+    
+    The catalog is a products.txt snapshot of category,name,price,stock
+    lines, with the product's SKU as an optional fifth field, plus a stock
+    ledger. Stock changes and new products are appended to
+    products.txt.ledger as small batches instead of rewriting products.txt:
+        
+        base,<crc32 of the products.txt it applies to>
+        begin
+        add,Electronics,Laptop,-2
+        set,Books,Cookbook,40
+        new,Toys,Kite,12.5,8,4006381333931
+        bill,{"number":7,"cashier":"john",...}
+        commit
+    
+    Only batches ending in "commit" are applied, so a torn write is ignored.
+    A checkout commits its stock changes and its bill records in one batch;
+    the bill files are written after that, and if a crash gets in between,
+    the next write finishes them from the ledger. Once the ledger passes
+    ledger_compact_threshold bytes it is folded back into a fresh
+    products.txt in the background.
+    
+    Bills are kept twice: a "Bill N: amount" summary line in bills.txt and a
+    full JSON record, line items included, in bills.jsonl.
+    
+    Several terminals can share one data directory: every file has a
+    <file>.lock taken shared for reads and exclusive for writes, and files
+    that are rewritten are replaced atomically, never truncated in place.
+    """
+    
+    def __init__(self, data_dir="data"):
+        self.products_file = os.path.join(data_dir, "products.txt")
+        self.admin_file = os.path.join(data_dir, "admin.txt")
+        self.cashiers_file = os.path.join(data_dir, "cashiers.txt")
+        self.bills_file = os.path.join(data_dir, "bills.txt")
+        self.ledger_compact_threshold = 256 * 1024
+        self._compaction_thread = None
+        
+        # In-memory catalog, rebuilt only when products.txt changes on disk
+        self._snapshot_signature = None
+        self._snapshot_crc = 0
+        self._ledger_id = None
+        self._ledger_offset = 0
+        self._products = []
+        self._index = {}        # (category, name) -> Product
+        self._by_category = {}  # category -> [Product, ...]
+        self._categories = []
+        self._sorted = {}       # (category, sort_key) -> sorted [Product, ...]
+        self._ledger_bills = []  # Bill records of the last ledger batch that had any
+        self._new_products = 0   # "new" ledger records applied since products.txt was read
+        self._bills_written_through = 0  # Highest bill number known to be in the bill files
+        
+        # username -> cashier, reread only when cashiers.txt changes on disk
+        self._cashiers = {}
+        self._cashiers_signature = None
+        
+        # Running totals for get_sales_for_day, read on from _sales_offset
+        self._sales_day = None
+        self._sales_file = None
+        self._sales_offset = 0
+        self._sales_totals = (0, 0.0)
+    
+    def data_version(self):
+        return tuple(self._file_signature(path) for path in (
+            self.products_file, self._ledger_file(), self.admin_file,
+            self.cashiers_file, self.bills_file, self._records_file()))
+    
+    def catalog_version(self):
+        # Products are only renamed or deleted by rewriting products.txt, and
+        # only added by "new" ledger records; stock and bill records do not count
+        self._load_catalog()
+        return (self._snapshot_signature, self._new_products)
+    
+    # Catalog snapshot and ledger
+    def _ledger_file(self):
+        """Get the path of the stock ledger that sits next to products.txt"""
+        return f"{self.products_file}.ledger"
+    
+    def _file_signature(self, path):
+        """Get a cheap fingerprint of a file (path, mtime, size and inode)"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (path, stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _load_catalog(self):
+        """Bring the in-memory catalog up to date with products.txt and its ledger"""
+        with FileLock(self.products_file, shared=True):
+            snapshot = self._file_signature(self.products_file)
+            ledger = self._file_signature(self._ledger_file())
+            
+            if snapshot is None or snapshot != self._snapshot_signature:
+                self._reload_catalog(snapshot)
+            elif self._ledger_id is not None and (
+                    ledger is None or ledger[3] != self._ledger_id or ledger[2] < self._ledger_offset):
+                # The ledger was compacted or replaced by another writer
+                self._reload_catalog(snapshot)
+            elif ledger is not None and ledger[2] > self._ledger_offset:
+                # Only new ledger batches need to be folded in
+                self._replay_ledger()
+    
+    def _reload_catalog(self, snapshot):
+        """Parse products.txt into the in-memory indexes and replay the ledger"""
+        products = []
+        index = {}
+        by_category = {}
+        crc = 0
+        try:
+            with open(self.products_file, 'r') as file:
+                for line in file:
+                    crc = zlib.crc32(line.encode(), crc)
+                    if line.strip():
+                        product = Product(*line.strip().split(','))
+                        products.append(product)
+                        index[(product.category, product.name)] = product
+                        by_category.setdefault(product.category, []).append(product)
+        except FileNotFoundError:
+            print("Products file not found.")
+        
+        self._products = products
+        self._index = index
+        self._by_category = by_category
+        self._categories = sorted(by_category)
+        self._sorted = {}
+        self._snapshot_signature = snapshot
+        self._snapshot_crc = crc
+        self._ledger_id = None
+        self._ledger_offset = 0
+        self._ledger_bills = []
+        self._new_products = 0
+        
+        if os.path.exists(self._ledger_file()):
+            self._replay_ledger()
+    
+    def _replay_ledger(self):
+        """Apply every committed ledger batch past the last one applied"""
+        ledger_file = self._ledger_file()
+        with open(ledger_file, 'rb') as file:
+            ledger_id = os.fstat(file.fileno()).st_ino
+            
+            if self._ledger_offset == 0:
+                header = file.readline()
+                if header.decode().strip() != f"base,{self._snapshot_crc}":
+                    # Left over from a compaction that already folded it in
+                    file.close()
+                    print("Stock ledger does not match products.txt; moving it aside.")
+                    try:
+                        os.replace(ledger_file, f"{ledger_file}.stale")
+                    except FileNotFoundError:
+                        pass  # Another reader got there first
+                    return
+                self._ledger_offset = file.tell()
+            
+            file.seek(self._ledger_offset)
+            batch = None
+            for raw_line in file:
+                line = raw_line.decode().strip()
+                if line == "begin":
+                    batch = []
+                elif line == "commit" and raw_line.endswith(b"\n"):
+                    if batch is not None:
+                        self._apply_batch(batch)
+                    batch = None
+                    self._ledger_offset = file.tell()
+                elif batch is not None:
+                    # Bill records are JSON, so only their tag is split off
+                    batch.append(line.split(',', 1) if line.startswith("bill,") else line.split(','))
+        
+        self._ledger_id = ledger_id
+    
+    def _apply_batch(self, batch):
+        """Apply one committed batch of ledger records to the catalog"""
+        self._sorted = {}
+        bills = []
+        for record in batch:
+            op = record[0]
+            if op == "new" and len(record) in (5, 6):
+                product = Product(*record[1:])
+                category, name = product.category, product.name
+                if (category, name) in self._index:
+                    continue
+                self._products.append(product)
+                self._index[(category, name)] = product
+                if category not in self._by_category:
+                    self._categories = sorted(self._categories + [category])
+                self._by_category.setdefault(category, []).append(product)
+                self._new_products += 1
+            elif op in ("add", "set") and len(record) == 4:
+                _, category, name, value = record
+                product = self._index.get((category, name))
+                if product is None:
+                    continue
+                if op == "add":
+                    product.stock += int(value)
+                else:
+                    product.stock = int(value)
+            elif op == "bill" and len(record) == 2:
+                bills.append(record[1])
+        if bills:
+            self._ledger_bills = bills
+    
+    def _append_ledger(self, records):
+        """Append one committed batch of records to the ledger"""
+        payload = "begin\n" + "".join(f"{record}\n" for record in records) + "commit\n"
+        
+        with open(self._ledger_file(), 'a+b') as file:
+            file.seek(0, os.SEEK_END)
+            if file.tell() == 0:
+                payload = f"base,{self._snapshot_crc}\n" + payload
+            else:
+                # Never glue a batch onto a torn line from an earlier crash
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    payload = "\n" + payload
+            file.write(payload.encode())
+            file.flush()
+            os.fsync(file.fileno())
+            ledger_size = file.tell()
+        
+        # Fold our own batch in (reads only the new tail of the ledger)
+        self._load_catalog()
+        
+        if ledger_size > self.ledger_compact_threshold:
+            self._schedule_compaction()
+    
+    def _schedule_compaction(self):
+        """Compact the ledger on a background thread unless one is running"""
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+        self._compaction_thread.start()
+    
+    def _write_snapshot(self, products):
+        """Write products as a fresh products.txt and drop the folded ledger"""
+        # The ledger may hold the only copy of the last bills
+        self._finish_committed_bills()
+        try:
+            atomic_write(self.products_file, [f"{format_product(product)}\n" for product in products])
+            # A crash here leaves a ledger whose base no longer matches; it is ignored
+            if os.path.exists(self._ledger_file()):
+                os.remove(self._ledger_file())
+        finally:
+            self._snapshot_signature = None
+    
+    def compact(self):
+        """Fold the stock ledger back into a fresh products.txt snapshot"""
+        try:
+            with FileLock(self.products_file):
+                self._load_catalog()
+                if self._ledger_id is None:
+                    return True, "Nothing to compact"
+                self._write_snapshot(self._products)
+            return True, "Catalog compacted successfully"
+        except Exception as e:
+            return False, f"Error compacting catalog: {str(e)}"
+    
+    # Products
+    def get_all_products(self):
+        self._load_catalog()
+        return list(self._products)
+    
+    def get_product(self, category, name):
+        self._load_catalog()
+        return self._index.get((category, name))
+    
+    def get_products_by_category(self, category):
+        self._load_catalog()
+        return list(self._by_category.get(category, []))
+    
+    def get_categories(self):
+        self._load_catalog()
+        return list(self._categories)
+    
+    def get_products_page(self, category, offset, limit, sort_key=None):
+        field, descending = parse_sort_key(sort_key)
+        self._load_catalog()
+        products = self._products if category is None else self._by_category.get(category, [])
+        if field is not None:
+            # Sorted orders are kept until the catalog changes, so paging
+            # through them does not sort again for every page
+            key = (category, sort_key)
+            if key not in self._sorted:
+                self._sorted[key] = sorted(products, key=lambda product: getattr(product, field),
+                                           reverse=descending)
+            products = self._sorted[key]
+        return len(products), products[offset:offset + limit]
+    
+    def add_product(self, product):
+        with FileLock(self.products_file):
+            if self.get_product(product.category, product.name) is not None:
+                return False
+            self._append_ledger([f"new,{format_product(product)}"])
+        return True
+    
+    def update_product(self, category, name, product):
+        with FileLock(self.products_file):
+            if self.get_product(category, name) is None:
+                return False
+            products = [product if (p.category == category and p.name == name) else p
+                        for p in self._products]
+            self._write_snapshot(products)
+        return True
+    
+    def delete_product(self, category, name):
+        with FileLock(self.products_file):
+            if self.get_product(category, name) is None:
+                return False
+            products = [p for p in self._products if not (p.category == category and p.name == name)]
+            self._write_snapshot(products)
+        return True
+    
+    def update_stock(self, category, name, new_stock):
+        with FileLock(self.products_file):
+            if self.get_product(category, name) is None:
+                return False
+            self._append_ledger([f"set,{category},{name},{int(new_stock)}"])
+        return True
+    
+    def decrement_stock(self, quantities):
+        with FileLock(self.products_file):
+            self._load_catalog()
+            
+            # Validate every line before writing anything
+            for (category, name), quantity in quantities.items():
+                product = self._index.get((category, name))
+                if product is None:
+                    return False, f"Product not found: {name}"
+                if quantity > product.stock:
+                    return False, f"Insufficient stock for {name}. Available: {product.stock}"
+            
+            self._append_ledger([f"add,{category},{name},{-quantity}"
+                                 for (category, name), quantity in quantities.items()])
+        return True, "Stock updated successfully"
+    
+    # Users
+    def get_user(self, username, role):
+        if role == 'admin':
+            try:
+                with FileLock(self.admin_file, shared=True), open(self.admin_file, 'r') as file:
+                    admin_data = file.read().strip().split(',')
+                    if len(admin_data) >= 2 and username == admin_data[0]:
+                        return User(admin_data[0], admin_data[1], 'admin')
+            except FileNotFoundError:
+                print("Admin file not found.")
+            return None
+        
+        return self._load_cashiers().get(username)
+    
+    def _load_cashiers(self):
+        """Get the username -> User index of cashiers.txt, reading the file again only if it changed"""
+        signature = self._file_signature(self.cashiers_file)
+        if signature is None or signature != self._cashiers_signature:
+            cashiers = {}
+            try:
+                with FileLock(self.cashiers_file, shared=True), open(self.cashiers_file, 'r') as file:
+                    for line in file:
+                        cashier_data = line.strip().split(',')
+                        if len(cashier_data) >= 2:
+                            cashiers.setdefault(cashier_data[0], User(cashier_data[0], cashier_data[1], 'cashier'))
+            except FileNotFoundError:
+                print("Cashiers file not found.")
+            self._cashiers = cashiers
+            self._cashiers_signature = signature
+        return self._cashiers
+    
+    def get_all_cashiers(self):
+        return list(self._load_cashiers().values())
+    
+    def get_all_users(self):
+        admins = []
+        try:
+            with FileLock(self.admin_file, shared=True), open(self.admin_file, 'r') as file:
+                admin_data = file.read().strip().split(',')
+                if len(admin_data) >= 2:
+                    admins.append(User(admin_data[0], admin_data[1], 'admin'))
+        except FileNotFoundError:
+            print("Admin file not found.")
+        return admins + self.get_all_cashiers()
+    
+    def users_version(self):
+        return (self._file_signature(self.admin_file), self._file_signature(self.cashiers_file))
+    
+    def add_cashier(self, username, password):
+        with FileLock(self.cashiers_file):
+            cashiers = self._load_cashiers()
+            if username in cashiers:
+                return False
+            with open(self.cashiers_file, 'a') as file:
+                file.write(f"{username},{password}\n")
+            # Nobody else can write while we hold the lock, so the index stays current
+            cashiers[username] = User(username, password, 'cashier')
+            self._cashiers_signature = self._file_signature(self.cashiers_file)
+        return True
+    
+    def _write_cashiers(self, cashiers):
+        """Replace cashiers.txt with the given accounts"""
+        atomic_write(self.cashiers_file, [f"{cashier.username},{cashier.password}\n" for cashier in cashiers])
+    
+    def update_cashier(self, old_username, new_username, new_password):
+        with FileLock(self.cashiers_file):
+            cashiers = self.get_all_cashiers()
+            if not any(cashier.username == old_username for cashier in cashiers):
+                return False
+            self._write_cashiers([User(new_username, new_password, 'cashier') if cashier.username == old_username
+                                  else cashier for cashier in cashiers])
+        return True
+    
+    def delete_cashier(self, username):
+        with FileLock(self.cashiers_file):
+            cashiers = self.get_all_cashiers()
+            if not any(cashier.username == username for cashier in cashiers):
+                return False
+            self._write_cashiers([cashier for cashier in cashiers if cashier.username != username])
+        return True
+    
+    def replace_password(self, username, role, old_password, new_password):
+        if role == 'admin':
+            with FileLock(self.admin_file):
+                admin = self.get_user(username, 'admin')
+                if admin is None or admin.password != old_password:
+                    return False
+                atomic_write(self.admin_file, [f"{username},{new_password}\n"])
+            return True
+        
+        with FileLock(self.cashiers_file):
+            cashiers = self.get_all_cashiers()
+            if not any(cashier.username == username and cashier.password == old_password for cashier in cashiers):
+                return False
+            self._write_cashiers([User(username, new_password, 'cashier') if cashier.username == username
+                                  else cashier for cashier in cashiers])
+        return True
+    
+    # Bills
+    def _sequence_file(self):
+        """Get the path of the bill number sequence that sits next to bills.txt"""
+        return f"{self.bills_file}.seq"
+    
+    def _count_existing_bills(self):
+        """Find the highest bill number already used in bills.txt"""
+        highest = 0
+        try:
+            with FileLock(self.bills_file, shared=True), open(self.bills_file, 'r') as file:
+                for count, line in enumerate(file, start=1):
+                    highest = max(highest, count)
+                    label = line.strip().split(':')[0].split(' ')
+                    if len(label) == 2 and label[0] == "Bill" and label[1].isdigit():
+                        highest = max(highest, int(label[1]))
+        except FileNotFoundError:
+            pass
+        return highest
+    
+    def next_bill_number(self):
+        """Allocate the next bill number from the persistent bill sequence
+        
+        The last number handed out is kept in bills.txt.seq and incremented
+        under an exclusive file lock, so terminals sharing the data directory
+        never get the same number. bills.txt is only scanned to seed the
+        sequence the first time it is used.
+        """
+        return self.next_bill_numbers(1)[0]
+    
+    def next_bill_numbers(self, count):
+        """Allocate count consecutive bill numbers with one sequence update"""
+        file = open_locked(self._sequence_file())
+        try:
+            last_number = file.read().strip()
+            if last_number.isdigit():
+                last_number = int(last_number)
+            else:
+                last_number = self._count_existing_bills()
+            
+            file.seek(0)
+            file.truncate()
+            file.write(str(last_number + count))
+            file.flush()
+            os.fsync(file.fileno())
+            return range(last_number + 1, last_number + count + 1)
+        finally:
+            unlock_file(file)
+            file.close()
+    
+    def _records_file(self):
+        """Get the path of the JSON Lines bill history that sits next to bills.txt"""
+        return f"{os.path.splitext(self.bills_file)[0]}.jsonl"
+    
+    def save_bill(self, bill, quantities):
+        return self.save_bills([(bill, quantities)])[0]
+    
+    def save_bills(self, batch):
+        results = [None] * len(batch)
+        with FileLock(self.products_file):
+            self._finish_committed_bills()
+            
+            # Check each bill against the stock the bills before it left
+            stock = {}
+            accepted = []
+            for position, (bill, quantities) in enumerate(batch):
+                for key, quantity in quantities.items():
+                    if key not in stock:
+                        product = self.get_product(*key)
+                        stock[key] = product.stock if product is not None else None
+                    if stock[key] is None:
+                        results[position] = (False, f"Product not found: {key[1]}")
+                        break
+                    if quantity > stock[key]:
+                        results[position] = (False, f"Insufficient stock for {key[1]}. Available: {stock[key]}")
+                        break
+                else:
+                    for key, quantity in quantities.items():
+                        stock[key] -= quantity
+                    accepted.append(position)
+            if not accepted:
+                return results
+            
+            total = {}
+            for position in accepted:
+                for key, quantity in batch[position][1].items():
+                    total[key] = total.get(key, 0) + quantity
+            
+            # Only take bill numbers once the stock check has passed
+            numbers = self.next_bill_numbers(len(accepted))
+            timestamp = datetime.datetime.now().isoformat(timespec="seconds")
+            records = [json.dumps(batch[position][0].to_record(bill_number, timestamp), separators=(",", ":"))
+                       for position, bill_number in zip(accepted, numbers)]
+            
+            # Once this returns the bills are saved, even if their files could not be written yet
+            self._commit_bills(total, records)
+            for position, bill_number in zip(accepted, numbers):
+                results[position] = (True, bill_number)
+        return results
+    
+    def _commit_bills(self, quantities, records):
+        """Take quantities off stock and record the bills in one ledger batch, then write the bill files"""
+        self._append_ledger([f"add,{category},{name},{-quantity}" for (category, name), quantity in quantities.items()]
+                            + [f"bill,{record}" for record in records])
+        self._write_committed_bills(records)
+    
+    def _write_committed_bills(self, records):
+        """Write the files of bills already committed; on failure the next write tries again"""
+        try:
+            self._write_bill_files(records)
+            return True
+        except OSError as e:
+            print(f"Saved bills not yet written to {self.bills_file}, will retry: {str(e)}")
+            return False
+    
+    def _finish_committed_bills(self):
+        """Write bills committed to the ledger whose files a crash left unwritten"""
+        self._load_catalog()
+        if self._ledger_bills:
+            self._write_bill_files(self._ledger_bills)
+    
+    def _last_bill_number(self):
+        """Get the number of the last complete record in bills.jsonl, or 0"""
+        try:
+            with open(self._records_file(), 'rb') as file:
+                position = file.seek(0, os.SEEK_END)
+                tail = b""
+                while position > 0:
+                    step = min(4096, position)
+                    position -= step
+                    file.seek(position)
+                    tail = file.read(step) + tail
+                    # Skip what follows the last newline, and a first line that may be cut
+                    lines = tail.split(b"\n")[:-1]
+                    for line in reversed(lines[1:] if position else lines):
+                        try:
+                            return json.loads(line)["number"]
+                        except (ValueError, KeyError, TypeError):
+                            continue
+        except FileNotFoundError:
+            pass
+        return 0
+    
+    def _write_bill_files(self, records):
+        """Append committed bill records (JSON text) and their summaries, skipping any already written
+        
+        Bill numbers are taken under the products lock, so bills.jsonl is in
+        number order and a record is already there if its number is not
+        past the last one.
+        """
+        parsed = [json.loads(record) for record in records]
+        if not parsed or parsed[-1]["number"] <= self._bills_written_through:
+            return
+        with FileLock(self.bills_file):
+            last = self._last_bill_number()
+            missing = [(record, text) for record, text in zip(parsed, records) if record["number"] > last]
+            lines = "".join(f"{text}\n" for _, text in missing)
+            summaries = "".join(f"Bill {record['number']}: {record['final_amount']:.2f}\n" for record, _ in missing)
+            # One write and one fsync per file for the whole batch
+            for path, text in ((self._records_file(), lines), (self.bills_file, summaries)):
+                if not text:
+                    continue
+                with open(path, 'a+b') as file:
+                    # Never glue a record onto a line torn by an earlier crash
+                    if file.seek(0, os.SEEK_END):
+                        file.seek(-1, os.SEEK_END)
+                        if file.read(1) != b"\n":
+                            text = "\n" + text
+                    file.write(text.encode())
+                    file.flush()
+                    os.fsync(file.fileno())
+        self._bills_written_through = parsed[-1]["number"]
+    
+    def iter_bills(self):
+        # Appends are whole lines, so no lock is needed; a line without its
+        # newline is a write still in progress (or torn by a crash) and is skipped
+        try:
+            with open(self._records_file(), 'r') as file:
+                for line in file:
+                    if line.endswith("\n") and line.strip():
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            continue
+        except FileNotFoundError:
+            return
+    
+    def get_sales_for_day(self, day):
+        # Only the records appended since the last call are read; a new day
+        # or a replaced bills.jsonl starts the count over
+        signature = self._file_signature(self._records_file())
+        if signature is None:
+            return 0, 0.0
+        if (day != self._sales_day or signature[::3] != self._sales_file
+                or signature[2] < self._sales_offset):
+            self._sales_day = day
+            self._sales_file = signature[::3]
+            self._sales_offset = 0
+            self._sales_totals = (0, 0.0)
+        
+        count, total = self._sales_totals
+        marker = f'"timestamp":"{day}'.encode()
+        with open(self._records_file(), 'rb') as file:
+            file.seek(self._sales_offset)
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break
+                self._sales_offset += len(line)
+                # Skip other days without parsing the JSON
+                if marker in line:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    count += 1
+                    total += record["final_amount"]
+        
+        self._sales_totals = (count, total)
+        return self._sales_totals
@@ -1,95 +1,159 @@
+import hashlib
+import hmac
+import os
+import threading
+from model.storage import open_storage
+from monitoring.metrics import instrument
+
+# Stored passwords look like pbkdf2_sha256$<iterations>$<salt hex>$<hash hex>;
+# anything else is a plaintext password from before hashing was added
+HASH_SCHEME = "pbkdf2_sha256"
+HASH_ITERATIONS = 200000
+
+def hash_password(password, salt=None, iterations=None):
+    """Hash a password with PBKDF2-SHA256 and a random salt for storage"""
+    salt = salt if salt is not None else os.urandom(16)
+    iterations = iterations or HASH_ITERATIONS
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, iterations)
+    return f"{HASH_SCHEME}${iterations}${salt.hex()}${digest.hex()}"
+
+def is_hashed(stored):
+    """Check whether a stored password is a hash rather than plaintext"""
+    return stored.startswith(f"{HASH_SCHEME}$")
+
+def verify_password(stored, password):
+    """Check a password against a stored hash (or a legacy plaintext password)"""
+    if not is_hashed(stored):
+        return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+    try:
+        _, iterations, salt, digest = stored.split("$")
+        expected = hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), bytes.fromhex(salt), int(iterations))
+    except ValueError:
+        return False
+    return hmac.compare_digest(expected.hex(), digest)
+
 class User:
     def __init__(self, username, password, role):
         self.username = username
         self.password = password
         self.role = role  # 'admin' or 'cashier'
 
+@instrument
 class UserModel:
-    def __init__(self):
-        self.admin_file = "data/admin.txt"
-        self.cashiers_file = "data/cashiers.txt"
+    def __init__(self, storage=None):
+        # Text files by default; see model/storage.py for the other backends
+        self.storage = storage if storage is not None else open_storage()
+        
+        # (role, username) -> User with its stored password, rebuilt when the accounts change
+        self._users = {}
+        self._users_version = None
+        self._lock = threading.RLock()
+        
+        # Logins that passed the slow hash check, so the same password is
+        # accepted again without rehashing: (role, username) -> (stored hash,
+        # keyed digest of the password). Only the digest is kept, never the password.
+        self._verified = {}
+        self._session_key = os.urandom(32)
     
-    def authenticate_admin(self, username, password):
-        """Authenticate admin credentials against admin.txt"""
+    @property
+    def admin_file(self):
+        """Path of admin.txt when running on text storage"""
+        return self.storage.admin_file
+    
+    @admin_file.setter
+    def admin_file(self, path):
+        self.storage.admin_file = path
+        self._users_version = None
+    
+    @property
+    def cashiers_file(self):
+        """Path of cashiers.txt when running on text storage"""
+        return self.storage.cashiers_file
+    
+    @cashiers_file.setter
+    def cashiers_file(self, path):
+        self.storage.cashiers_file = path
+        self._users_version = None
+    
+    def _index(self):
+        """Get the (role, username) -> User index, reloading it if the accounts changed"""
+        with self._lock:
+            version = self.storage.users_version()
+            if self._users_version is None or version != self._users_version:
+                self._users = {(user.role, user.username): user for user in self.storage.get_all_users()}
+                self._users_version = version
+            return self._users
+    
+    def _authenticate(self, username, password, role):
+        """Check a login against the index, hashing only on the first login of a session"""
+        if self.storage.verifies_logins:
+            # The server checks the password, and keeps the accounts to itself
+            return self.storage.authenticate(username, password, role)
+        
+        user = self._index().get((role, username))
+        if user is None:
+            return None
+        
+        key = (role, username)
+        digest = hmac.new(self._session_key, password.encode("utf-8"), hashlib.sha256).digest()
+        cached = self._verified.get(key)
+        if cached is None or cached[0] != user.password or not hmac.compare_digest(cached[1], digest):
+            if not verify_password(user.password, password):
+                return None
+            stored = user.password
+            if not is_hashed(stored):
+                stored = self._upgrade_password(user, password)
+            self._verified[key] = (stored, digest)
+        return User(username, password, role)
+    
+    def _upgrade_password(self, user, password):
+        """Replace a legacy plaintext password with its hash; returns the password now stored"""
+        hashed = hash_password(password)
         try:
-            with open(self.admin_file, 'r') as file:
-                admin_data = file.read().strip().split(',')
-                if len(admin_data) >= 2 and username == admin_data[0] and password == admin_data[1]:
-                    return User(username, password, 'admin')
-        except FileNotFoundError:
-            print("Admin file not found.")
-        return None
+            # Skipped if the password was changed since the index was loaded
+            if self.storage.replace_password(user.username, user.role, user.password, hashed):
+                return hashed
+        except Exception as e:
+            print(f"Error hashing the stored password of {user.username}: {str(e)}")
+        return user.password
+    
+    def authenticate_admin(self, username, password):
+        """Authenticate admin credentials"""
+        return self._authenticate(username, password, 'admin')
     
     def authenticate_cashier(self, username, password):
-        """Authenticate cashier credentials against cashiers.txt"""
-        try:
-            with open(self.cashiers_file, 'r') as file:
-                for line in file:
-                    cashier_data = line.strip().split(',')
-                    if len(cashier_data) >= 2 and username == cashier_data[0] and password == cashier_data[1]:
-                        return User(username, password, 'cashier')
-        except FileNotFoundError:
-            print("Cashiers file not found.")
-        return None
+        """Authenticate cashier credentials"""
+        return self._authenticate(username, password, 'cashier')
+    
+    def logout(self):
+        """End the login session kept by the storage, if it keeps one"""
+        self.storage.logout()
     
     def get_all_cashiers(self):
         """Get list of all cashiers"""
-        cashiers = []
-        try:
-            with open(self.cashiers_file, 'r') as file:
-                for line in file:
-                    if line.strip():
-                        username, password = line.strip().split(',')
-                        cashiers.append(User(username, password, 'cashier'))
-        except FileNotFoundError:
-            print("Cashiers file not found.")
-        return cashiers
+        return self.storage.get_all_cashiers()
     
     def add_cashier(self, username, password):
-        """Add a new cashier to cashiers.txt"""
+        """Add a new cashier"""
         try:
-            # Check if username already exists
-            cashiers = self.get_all_cashiers()
-            for cashier in cashiers:
-                if cashier.username == username:
-                    return False, "Username already exists"
-            
-            # Add new cashier
-            with open(self.cashiers_file, 'a') as file:
-                file.write(f"{username},{password}\n")
+            if not self.storage.add_cashier(username, hash_password(password)):
+                return False, "Username already exists"
             return True, "Cashier added successfully"
         except Exception as e:
             return False, f"Error adding cashier: {str(e)}"
     
     def update_cashier(self, old_username, new_username, new_password):
         """Update an existing cashier's details"""
-        cashiers = self.get_all_cashiers()
-        found = False
-        
         try:
-            with open(self.cashiers_file, 'w') as file:
-                for cashier in cashiers:
-                    if cashier.username == old_username:
-                        file.write(f"{new_username},{new_password}\n")
-                        found = True
-                    else:
-                        file.write(f"{cashier.username},{cashier.password}\n")
+            found = self.storage.update_cashier(old_username, new_username, hash_password(new_password))
             return found, "Cashier updated successfully" if found else "Cashier not found"
         except Exception as e:
             return False, f"Error updating cashier: {str(e)}"
     
     def delete_cashier(self, username):
-        """Delete a cashier from cashiers.txt"""
-        cashiers = self.get_all_cashiers()
-        found = False
-        
+        """Delete a cashier"""
         try:
-            with open(self.cashiers_file, 'w') as file:
-                for cashier in cashiers:
-                    if cashier.username != username:
-                        file.write(f"{cashier.username},{cashier.password}\n")
-                    else:
-                        found = True
+            found = self.storage.delete_cashier(username)
             return found, "Cashier deleted successfully" if found else "Cashier not found"
         except Exception as e:
-            return False, f"Error deleting cashier: {str(e)}" 
\ No newline at end of file
+            return False, f"Error deleting cashier: {str(e)}"
@@ -0,0 +1,267 @@
+import atexit
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+# Metrics are off unless SMARTMART_METRICS is set; classes are only wrapped
+# when they are on, so turning them off costs nothing on the hot paths
+ENABLED = os.environ.get("SMARTMART_METRICS", "").lower() not in ("", "0", "false", "no")
+METRICS_FILE = os.environ.get("SMARTMART_METRICS_FILE", os.path.join("data", "metrics.jsonl"))
+DUMP_INTERVAL = float(os.environ.get("SMARTMART_METRICS_INTERVAL", "60"))
+
+# Latency buckets: SUB_BUCKETS per power of two of microseconds, so a
+# percentile read from the buckets is within about 6% of the true value
+SUB_BUCKETS = 8
+
+class Histogram:
+    """Latency histogram with log-spaced buckets of fixed total size"""
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0    # Seconds
+        self.max = 0.0      # Seconds
+        self.buckets = {}   # Bucket index -> count
+    
+    @staticmethod
+    def bucket(seconds):
+        """Get the bucket index of a duration"""
+        mantissa, exponent = math.frexp(max(seconds * 1e6, 0.01))
+        return exponent * SUB_BUCKETS + int((mantissa * 2 - 1) * SUB_BUCKETS)
+    
+    @staticmethod
+    def bucket_value(index):
+        """Get the midpoint of a bucket in seconds"""
+        exponent, sub = divmod(index, SUB_BUCKETS)
+        return 2.0 ** (exponent - 1) * (1 + (sub + 0.5) / SUB_BUCKETS) / 1e6
+    
+    def record(self, seconds):
+        """Add one duration"""
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        index = self.bucket(seconds)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+    
+    def merge(self, other):
+        """Add the durations of another histogram to this one"""
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+    
+    def percentile(self, fraction):
+        """Estimate a percentile (0.5 for the median) in seconds, or 0.0 if empty"""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.bucket_value(index), self.max)
+        return self.max
+    
+    def to_dict(self):
+        """Describe the histogram as plain JSON-friendly data"""
+        return {"count": self.count, "total": self.total, "max": self.max,
+                "buckets": {str(index): count for index, count in self.buckets.items()}}
+    
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a histogram written by to_dict"""
+        histogram = cls()
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.max = data["max"]
+        histogram.buckets = {int(index): count for index, count in data["buckets"].items()}
+        return histogram
+
+class Registry:
+    """In-process counters and latency histograms, keyed by name"""
+    
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._dumper = None
+    
+    def count(self, name, amount=1):
+        """Add to a counter"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+    
+    def observe(self, name, seconds):
+        """Record one duration in a latency histogram"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.record(seconds)
+    
+    def histogram(self, name):
+        """Get a copy of a latency histogram, empty if nothing was recorded"""
+        with self._lock:
+            copy = Histogram()
+            if name in self._histograms:
+                copy.merge(self._histograms[name])
+            return copy
+    
+    def counter(self, name):
+        """Get a counter's value"""
+        with self._lock:
+            return self._counters.get(name, 0)
+    
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self.started = time.time()
+    
+    def snapshot(self):
+        """Get every counter and histogram as one JSON-friendly dict"""
+        with self._lock:
+            return {"time": time.time(), "pid": os.getpid(), "started": self.started,
+                    "counters": dict(self._counters),
+                    "histograms": {name: histogram.to_dict() for name, histogram in self._histograms.items()}}
+    
+    def dump(self, path=None):
+        """Append a snapshot to the metrics file as one JSON line"""
+        path = path or METRICS_FILE
+        line = json.dumps(self.snapshot(), separators=(",", ":")) + "\n"
+        # One write of a whole line, so terminals sharing the file do not interleave
+        with open(path, 'a') as file:
+            file.write(line)
+    
+    def start_dumping(self, path=None, interval=None):
+        """Dump a snapshot every interval seconds on a background thread, and once more at exit"""
+        if self._dumper is not None:
+            return
+        interval = interval or DUMP_INTERVAL
+        
+        def dump():
+            try:
+                self.dump(path)
+            except OSError as e:
+                print(f"Error writing metrics: {str(e)}")
+        
+        def run():
+            while True:
+                time.sleep(interval)
+                dump()
+        
+        self._dumper = threading.Thread(target=run, daemon=True)
+        self._dumper.start()
+        atexit.register(dump)
+
+registry = Registry()
+
+class _NullTimer:
+    """Context manager that does nothing, used when metrics are off"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_TIMER = _NullTimer()
+
+class _Timer:
+    """Context manager that records how long its block took"""
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback):
+        registry.observe(self.name, time.perf_counter() - self.start)
+        if exc_type is not None:
+            registry.count(f"{self.name}.errors")
+        return False
+
+def timer(name):
+    """Time a block: with timer("bill.save"): ..."""
+    return _Timer(name) if ENABLED else NULL_TIMER
+
+def _wrap(function, name):
+    """Wrap a function so each call is timed under name, and exceptions are counted"""
+    @functools.wraps(function)
+    def timed_call(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except BaseException:
+            registry.count(f"{name}.errors")
+            raise
+        finally:
+            registry.observe(name, time.perf_counter() - start)
+    return timed_call
+
+def timed(name=None, force=False):
+    """Decorator that times every call of a function; returns it unchanged when metrics are off"""
+    def decorate(function):
+        if not (ENABLED or force):
+            return function
+        return _wrap(function, name or function.__qualname__)
+    return decorate
+
+def instrument(cls=None, force=False):
+    """Class decorator that times every public method of a class
+    
+    Methods are named Class.method. Properties and names starting with an
+    underscore are left alone, and nothing is wrapped when metrics are off.
+    Generator methods are timed until they return their generator.
+    """
+    def decorate(cls):
+        if not (ENABLED or force):
+            return cls
+        for attribute, value in list(vars(cls).items()):
+            if attribute.startswith("_") or not callable(value) or isinstance(value, (staticmethod, classmethod)):
+                continue
+            setattr(cls, attribute, _wrap(value, f"{cls.__name__}.{attribute}"))
+        if ENABLED:
+            registry.start_dumping()
+        return cls
+    return decorate(cls) if cls is not None else decorate
+
+def read_snapshots(path):
+    """Read every snapshot in a metrics file, skipping lines that are cut short"""
+    snapshots = []
+    try:
+        with open(path, 'r') as file:
+            for line in file:
+                if line.endswith("\n") and line.strip():
+                    try:
+                        snapshots.append(json.loads(line))
+                    except ValueError:
+                        continue
+    except FileNotFoundError:
+        pass
+    return snapshots
+
+def merge_snapshots(snapshots):
+    """Combine the latest snapshot of every process into (counters, histograms)
+    
+    Snapshots are cumulative, so only the last one of each process run
+    (pid and start time) counts.
+    """
+    latest = {}
+    for snapshot in snapshots:
+        latest[(snapshot["pid"], snapshot["started"])] = snapshot
+    counters, histograms = {}, {}
+    for snapshot in latest.values():
+        for name, value in snapshot["counters"].items():
+            counters[name] = counters.get(name, 0) + value
+        for name, data in snapshot["histograms"].items():
+            histograms.setdefault(name, Histogram()).merge(Histogram.from_dict(data))
+    return counters, histograms
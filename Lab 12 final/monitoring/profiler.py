@@ -0,0 +1,120 @@
+import atexit
+import cProfile
+import datetime
+import io
+import os
+import pstats
+import time
+import tracemalloc
+
+# SMARTMART_PROFILE=1 profiles a session from startup; "memory" also traces allocations
+PROFILE_ON_START = os.environ.get("SMARTMART_PROFILE", "").lower()
+PROFILE_DIR = os.environ.get("SMARTMART_PROFILE_DIR", os.path.join("data", "profiles"))
+TOP_FUNCTIONS = 40
+
+class Profiler:
+    """Start and stop cProfile, and optionally tracemalloc, in a running session
+    
+    stop() writes, under a timestamped name in directory:
+        profile-<time>.prof         raw cProfile data, for pstats or snakeviz
+        profile-<time>.txt          the hottest functions by cumulative and own time
+        profile-<time>-memory.txt   top allocation sites, when memory was traced
+    
+    cProfile only sees the thread that called start(); for the Tk
+    application that is the UI thread, where checkouts are handled. Work on
+    background threads, such as bill saving, shows up in the metrics instead.
+    """
+    
+    def __init__(self, directory=PROFILE_DIR, top=TOP_FUNCTIONS):
+        self.directory = directory
+        self.top = top
+        self._profile = None
+        self._started = None
+        self._memory = False
+        self._exit_registered = False
+    
+    @property
+    def running(self):
+        """Whether a profile is being recorded"""
+        return self._profile is not None
+    
+    def start(self, memory=False):
+        """Start recording a profile"""
+        if self.running:
+            return False, "Profiling is already running"
+        try:
+            if memory and not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                self._memory = True
+            self._profile = cProfile.Profile()
+            self._started = time.time()
+            self._profile.enable()
+        except Exception as e:
+            self._profile = None
+            return False, f"Error starting profiler: {str(e)}"
+        if not self._exit_registered:
+            # A session that ends while profiling still writes its profile
+            atexit.register(self._stop_at_exit)
+            self._exit_registered = True
+        return True, "Profiling started" + (" with memory tracing" if self._memory else "")
+    
+    def stop(self):
+        """Stop recording and write the profile; returns (success, message naming the files)"""
+        if not self.running:
+            return False, "Profiling is not running"
+        self._profile.disable()
+        profile, self._profile = self._profile, None
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.datetime.fromtimestamp(self._started).strftime("%Y%m%d-%H%M%S")
+            base = os.path.join(self.directory, f"profile-{stamp}")
+            number = 1
+            while os.path.exists(f"{base}.prof"):
+                number += 1
+                base = os.path.join(self.directory, f"profile-{stamp}-{number}")
+            profile.dump_stats(f"{base}.prof")
+            with open(f"{base}.txt", 'w') as file:
+                file.write(self.summary(profile))
+            written = [f"{base}.prof", f"{base}.txt"]
+            if self._memory:
+                with open(f"{base}-memory.txt", 'w') as file:
+                    file.write(self.memory_summary())
+                written.append(f"{base}-memory.txt")
+            return True, f"Profile written to {', '.join(written)}"
+        except Exception as e:
+            return False, f"Error writing profile: {str(e)}"
+        finally:
+            if self._memory:
+                tracemalloc.stop()
+                self._memory = False
+    
+    def toggle(self, memory=False):
+        """Start profiling if it is off, otherwise stop it and write the profile"""
+        return self.stop() if self.running else self.start(memory)
+    
+    def summary(self, profile):
+        """Describe the hottest functions of a profile as text"""
+        started = datetime.datetime.fromtimestamp(self._started).isoformat(timespec="seconds")
+        out = io.StringIO()
+        out.write(f"Profile started {started}, {time.time() - self._started:.1f} s recorded\n")
+        for order, label in (("cumulative", "cumulative time"), ("tottime", "total time")):
+            out.write(f"\nTop {self.top} functions by {label}\n")
+            pstats.Stats(profile, stream=out).strip_dirs().sort_stats(order).print_stats(self.top)
+        return out.getvalue()
+    
+    def memory_summary(self):
+        """Describe the biggest allocation sites still alive, with current and peak traced memory"""
+        current, peak = tracemalloc.get_traced_memory()
+        out = io.StringIO()
+        out.write(f"Traced memory: {current / 1024:.0f} KiB now, {peak / 1024:.0f} KiB peak\n\n")
+        for statistic in tracemalloc.take_snapshot().statistics("lineno")[:self.top]:
+            out.write(f"{statistic}\n")
+        return out.getvalue()
+    
+    def _stop_at_exit(self):
+        """Write a profile that is still running when the interpreter exits"""
+        if self.running:
+            success, message = self.stop()
+            print(message)
+
+profiler = Profiler()
@@ -0,0 +1,362 @@
+import argparse
+import asyncio
+import json
+import os
+import secrets
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from itertools import islice
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.remote_storage import decode, encode
+from model.storage import open_storage
+from model.user_model import User, UserModel
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Largest request body accepted, in bytes
+MAX_BODY = 16 * 1024 * 1024
+# Bills sent per chunk while streaming the history
+STREAM_CHUNK = 1000
+# Answers to bill saves kept by request_id, for tills that send one again
+REPLAY_CACHE = 10000
+
+# Storage calls a till may make, by the role it logged in with: what the
+# cashier and admin screens do, and nothing else. Accounts are only read
+# here, by /login, and maintenance such as compact() is left to the server.
+CASHIER_CALLS = frozenset({
+    "get_all_products", "get_product", "get_products_by_category", "get_categories",
+    "get_products_page", "data_version", "catalog_version", "save_bill", "save_bills"})
+ADMIN_CALLS = CASHIER_CALLS | {
+    "add_product", "update_product", "delete_product", "update_stock",
+    "get_all_cashiers", "add_cashier", "update_cashier", "delete_cashier", "get_sales_for_day"}
+
+class ApiServer:
+    """Serve one storage backend to every till over local HTTP/JSON
+    
+    The server owns the data: tills open it with SMARTMART_STORAGE=remote
+    (see model/remote_storage.py) instead of reading data/ themselves, so
+    the catalog is loaded once and kept in memory here. Routes:
+    
+        POST /login           body {"username", "password", "role"},
+                              answer {"token": ...} or 401
+        POST /logout          ends the session of the token sent
+        POST /call/<method>   body {"args": [...]}, answer {"result": ...}
+                              or {"error": "..."} with a 4xx or 5xx status
+        GET  /bills           every bill, one JSON object per line
+        GET  /health          {"ok": true, "backend": ...}
+    
+    Every route but /login and /health needs "Authorization: Bearer
+    <token>". A cashier's token allows CASHIER_CALLS, and only for their
+    own bills; an admin's allows ADMIN_CALLS and /bills. Passwords are
+    checked here and never sent back.
+    
+    A save_bill or save_bills call may carry a "request_id". A till that
+    lost its connection sends the call again with the same id, and gets
+    the first call's answer instead of saving the bills twice. Ids are only
+    remembered until the server stops, so every answer carries a Server-Id
+    header, and a call sent again with another server's id is refused.
+    
+    Requests are read on an asyncio loop, and every storage call runs on
+    one worker thread, so calls from different tills never overlap and
+    stock and bill numbers need no locking between processes. Bills that
+    arrive while others are being written are saved together by the next
+    save_bills call, so busy tills share one fsync per batch.
+    """
+    
+    def __init__(self, storage, host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None):
+        self.storage = storage
+        self.users = UserModel(storage)
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+        self._loop = None
+        self._stopping = None
+        self._connections = {}  # Task answering a connection -> its writer
+        self._sessions = {}     # Token -> User, without its password
+        self._replies = OrderedDict()  # (username, request_id) -> Future of (status, payload)
+        self.server_id = secrets.token_hex(8)
+        self._bill_queue = []     # (bill, quantities, future) waiting to be saved
+        self._committing = False
+        self._thread = None
+        self._ready = threading.Event()
+    
+    @property
+    def address(self):
+        """The address tills put in SMARTMART_SERVER"""
+        return f"unix:{self.socket_path}" if self.socket_path else f"{self.host}:{self.port}"
+    
+    async def serve(self, on_ready=None):
+        """Accept connections until stop() is called; on_ready is called once listening"""
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if self.socket_path:
+            server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        else:
+            server = await asyncio.start_server(self._handle, self.host, self.port)
+            # Port 0 picks a free port
+            self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        if on_ready is not None:
+            on_ready()
+        try:
+            await self._stopping.wait()
+        finally:
+            server.close()
+            # Closing a connection ends its handler, after any call in progress
+            for writer in list(self._connections.values()):
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await server.wait_closed()
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+    
+    def run(self, on_ready=None):
+        """Serve in the calling thread until stop() is called"""
+        asyncio.run(self.serve(on_ready))
+    
+    def start(self):
+        """Serve on a background thread; returns once connections are accepted"""
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+        if not self._ready.wait(10):
+            raise RuntimeError(f"Server did not start on {self.address}")
+        return self
+    
+    def stop(self):
+        """Stop serving and wait for the storage call in progress"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+        if self._thread is not None:
+            self._thread.join()
+        self.executor.shutdown(wait=True)
+    
+    async def _handle(self, reader, writer):
+        """Answer the requests of one connection, keeping it open between them"""
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = headers.get("connection", "").lower() != "close"
+                
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY:
+                    writer.write(self._response(413, {"error": "Request too large"}, False))
+                    await writer.drain()
+                    break
+                body = await reader.readexactly(length)
+                scheme, _, token = headers.get("authorization", "").partition(" ")
+                user = self._sessions.get(token) if scheme == "Bearer" else None
+                
+                if method == "GET" and path == "/bills":
+                    if user is not None and user.role == 'admin':
+                        await self._stream_bills(writer)
+                        break
+                    status, payload = ((401, {"error": "Log in first"}) if user is None
+                                       else (403, {"error": "Only an admin can read the bills"}))
+                elif method == "POST" and path == "/login":
+                    status, payload = await self._login(body)
+                elif method == "POST" and path == "/logout":
+                    self._sessions.pop(token, None)
+                    status, payload = 200, {"ok": True}
+                elif method == "POST" and path.startswith("/call/"):
+                    status, payload = await self._call(path[len("/call/"):], body, user)
+                elif method == "GET" and path == "/health":
+                    status, payload = 200, {"ok": True, "backend": type(self.storage).__name__}
+                else:
+                    status, payload = 404, {"error": f"Not found: {method} {path}"}
+                writer.write(self._response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # A till that went away or sent something that is not HTTP
+            pass
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+    
+    async def _login(self, body):
+        """Check a login and start a session; returns (status, payload)"""
+        try:
+            request = json.loads(body or b"{}")
+            username, password, role = request["username"], request["password"], request["role"]
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {"error": f"Bad request: {str(e)}"}
+        if role not in ('admin', 'cashier'):
+            return 400, {"error": f"Unknown role: {role}"}
+        
+        authenticate = self.users.authenticate_admin if role == 'admin' else self.users.authenticate_cashier
+        try:
+            user = await self._loop.run_in_executor(self.executor, authenticate, username, password)
+        except Exception as e:
+            return 500, {"error": str(e)}
+        if user is None:
+            return 401, {"error": "Invalid username or password"}
+        token = secrets.token_urlsafe(32)
+        self._sessions[token] = User(user.username, "", user.role)
+        return 200, {"token": token}
+    
+    async def _call(self, name, body, user):
+        """Run a storage method on the storage thread for a logged-in user; returns (status, payload or encoded bytes)"""
+        if name not in ADMIN_CALLS:
+            return 404, {"error": f"Unknown method: {name}"}
+        if user is None:
+            return 401, {"error": "Log in first"}
+        if user.role != 'admin' and name not in CASHIER_CALLS:
+            return 403, {"error": f"{name} needs an admin login"}
+        try:
+            request = json.loads(body or b"{}")
+            args = decode(request.get("args", []))
+            if name == "save_bill":
+                bills = [args[0]]
+            elif name == "save_bills":
+                bills = [bill for bill, _ in args[0]]
+            else:
+                bills = []
+        except (ValueError, KeyError, TypeError, AttributeError, IndexError) as e:
+            return 400, {"error": f"Bad request: {str(e)}"}
+        if user.role != 'admin' and any(bill.cashier.username != user.username for bill in bills):
+            return 403, {"error": "A cashier can only save their own bills"}
+        
+        def call():
+            # Encoded on the storage thread too, so large results do not hold up the loop
+            return self._result(getattr(self.storage, name)(*args))
+        
+        async def run():
+            try:
+                if name == "save_bill":
+                    return 200, self._result(await self._save_bill(*args))
+                return 200, await self._loop.run_in_executor(self.executor, call)
+            except Exception as e:
+                return 500, {"error": str(e)}
+        
+        if bills and request.get("server_id", self.server_id) != self.server_id:
+            return 409, {"error": "The server restarted while the bill was being sent; "
+                                  "check the bill history before saving it again"}
+        if bills and request.get("request_id") is not None:
+            return await self._run_once((user.username, str(request["request_id"])), run)
+        return await run()
+    
+    async def _run_once(self, key, run):
+        """Run a call once per key; the same key again gets the first answer
+        
+        The call runs as a task of its own, so it finishes even if the
+        request that started it is cancelled (say the till hung up), and a
+        resend waiting on it always gets an answer or its exception.
+        """
+        if key in self._replies:
+            return await asyncio.shield(self._replies[key])
+        task = self._replies[key] = self._loop.create_task(run())
+        while len(self._replies) > REPLAY_CACHE:
+            self._replies.popitem(last=False)
+        task.add_done_callback(lambda task: self._forget_failed(key, task))
+        return await asyncio.shield(task)
+    
+    def _forget_failed(self, key, task):
+        """Drop a call that saved nothing from the replies, so a resend may try again"""
+        if task.cancelled() or task.exception() is not None or task.result()[0] != 200:
+            if self._replies.get(key) is task:
+                del self._replies[key]
+    
+    async def _save_bill(self, bill, quantities):
+        """Queue a bill for the next batch and wait for its (success, bill number or reason)"""
+        future = self._loop.create_future()
+        self._bill_queue.append((bill, quantities, future))
+        if not self._committing:
+            self._committing = True
+            self._loop.create_task(self._commit_bills())
+        return await future
+    
+    async def _commit_bills(self):
+        """Save queued bills a batch at a time until the queue is empty"""
+        try:
+            while self._bill_queue:
+                batch, self._bill_queue = self._bill_queue, []
+                try:
+                    results = await self._loop.run_in_executor(
+                        self.executor, self.storage.save_bills, [(bill, quantities) for bill, quantities, _ in batch])
+                except Exception as e:
+                    for _, _, future in batch:
+                        future.set_exception(e)
+                    continue
+                for (_, _, future), result in zip(batch, results):
+                    future.set_result(result)
+        finally:
+            self._committing = False
+    
+    async def _stream_bills(self, writer):
+        """Send every bill as one JSON line, a chunk at a time, then close"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+        records = self.storage.iter_bills()
+        while True:
+            # Chunks are read on the storage thread, between other tills' calls
+            chunk = await self._loop.run_in_executor(self.executor, lambda: list(islice(records, STREAM_CHUNK)))
+            if not chunk:
+                break
+            writer.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in chunk)
+                         .encode("utf-8"))
+            await writer.drain()
+    
+    @staticmethod
+    def _result(result):
+        """Encode a storage call's result as a response body"""
+        return json.dumps({"result": encode(result)}, separators=(",", ":")).encode("utf-8")
+    
+    def _response(self, status, payload, keep_alive):
+        """Build an HTTP response from a JSON payload, or from bytes already encoded"""
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Server-Id: {self.server_id}\r\n")
+        if not keep_alive:
+            head += "Connection: close\r\n"
+        return head.encode("ascii") + b"\r\n" + body
+
+def run_server(host=DEFAULT_HOST, port=DEFAULT_PORT, socket_path=None, data_dir="data"):
+    """Open the storage backend chosen by SMARTMART_STORAGE and serve it until interrupted"""
+    if os.environ.get("SMARTMART_STORAGE", "text").lower() == "remote":
+        raise ValueError("The server cannot use remote storage; set SMARTMART_STORAGE to text, binary or sqlite")
+    storage = open_storage(data_dir)
+    server = ApiServer(storage, host, port, socket_path)
+    # Load the catalog before the first till connects
+    storage.get_categories()
+    
+    def ready():
+        print(f"Smart Mart server ({type(storage).__name__}) listening on {server.address}")
+        print("Start tills with SMARTMART_STORAGE=remote and SMARTMART_SERVER set to that address")
+    
+    try:
+        server.run(ready)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown(wait=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Smart Mart data to every till over local HTTP")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--data", default="data", help="data directory (default: data)")
+    args = parser.parse_args()
+    run_server(args.host, args.port, args.socket, args.data)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import sys
+import os
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.admin_controller import AdminController
+from model.bill_model import Bill
+from model.product_model import ProductModel
+from model.user_model import User
+
+class TestAdminController:
+    @pytest.fixture
+    def admin_controller(self, tmp_path):
+        """Create an AdminController on temporary data files"""
+        (tmp_path / "products.txt").write_text(
+            "Electronics,Laptop,1000.0,5\n"
+            "Electronics,Tablet,500.0,20\n"
+            "Books,Cookbook,25.0,8\n"
+        )
+        (tmp_path / "cashiers.txt").write_text("john,john123\nmary,mary123\n")
+        (tmp_path / "bills.txt").write_text("")
+        
+        controller = AdminController()
+        controller.product_model.products_file = str(tmp_path / "products.txt")
+        controller.user_model.cashiers_file = str(tmp_path / "cashiers.txt")
+        controller.bill_model.bills_file = str(tmp_path / "bills.txt")
+        return controller
+    
+    def test_dashboard_snapshot(self, admin_controller):
+        """Test every dashboard figure"""
+        assert admin_controller.get_dashboard_snapshot() == {
+            "cashiers": 2,
+            "products": 3,
+            "categories": 2,
+            "stock_value": 5000.0 + 10000.0 + 200.0,
+            "low_stock": 2,
+            "bills_today": 0,
+            "sales_today": 0.0,
+        }
+    
+    def test_dashboard_snapshot_is_cached(self, admin_controller, monkeypatch):
+        """Test that unchanged data is not read again"""
+        snapshot = admin_controller.get_dashboard_snapshot()
+        
+        def fail_read(self, *args):
+            raise AssertionError("unchanged data should not be read again")
+        monkeypatch.setattr(ProductModel, "get_all_products", fail_read)
+        monkeypatch.setattr(admin_controller.user_model.storage.__class__, "get_all_cashiers", fail_read)
+        
+        assert admin_controller.get_dashboard_snapshot() is snapshot
+    
+    def test_dashboard_snapshot_follows_changes(self, admin_controller):
+        """Test that stock edits, new cashiers and sales show up at once"""
+        admin_controller.get_dashboard_snapshot()
+        admin_controller.update_stock("Books", "Cookbook", 50)
+        admin_controller.add_cashier("alex", "alex123")
+        
+        bill = Bill(User("john", "john123", "cashier"))
+        bill.add_item(admin_controller.product_model.get_product("Electronics", "Tablet"), 2)
+        bill.apply_payment_method("card")
+        assert admin_controller.bill_model.save_bill(bill)[0] is True
+        
+        snapshot = admin_controller.get_dashboard_snapshot()
+        assert snapshot["cashiers"] == 3
+        assert snapshot["low_stock"] == 1
+        assert snapshot["stock_value"] == 5000.0 + 9000.0 + 1250.0
+        assert (snapshot["bills_today"], snapshot["sales_today"]) == (1, 900.0)
@@ -0,0 +1,111 @@
+import sys
+import os
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("numpy")
+
+from model.analytics import SalesReport
+from model.bill_model import Bill, BillModel
+from model.product_model import Product, ProductModel
+from model.user_model import User
+
+def make_record(number, cashier, timestamp, payment_method, items):
+    """Build a bill record the way Bill.to_record does"""
+    total = sum(price * quantity for _, _, price, quantity in items)
+    discount = total * 0.1 if payment_method and payment_method.lower() == "card" else 0.0
+    return {
+        "number": number, "cashier": cashier, "timestamp": timestamp,
+        "payment_method": payment_method, "total": total, "discount": discount,
+        "final_amount": total - discount,
+        "items": [{"category": category, "name": name, "price": price,
+                   "quantity": quantity, "subtotal": price * quantity}
+                  for category, name, price, quantity in items],
+    }
+
+class TestSalesReport:
+    @pytest.fixture
+    def report(self):
+        """Create a report over a small bill history"""
+        return SalesReport([
+            make_record(1, "john", "2026-01-01T09:00:00", "cash",
+                        [("Electronics", "Laptop", 1000.0, 1), ("Books", "Cookbook", 25.0, 2)]),
+            make_record(2, "mary", "2026-01-01T10:00:00", "card",
+                        [("Books", "Cookbook", 25.0, 4)]),
+            make_record(3, "john", "2026-01-02T11:00:00", "card",
+                        [("Electronics", "Tablet", 500.0, 2)]),
+            # Summary-only bill imported from bills.txt
+            {"number": 4, "cashier": None, "timestamp": None, "payment_method": None,
+             "total": None, "discount": None, "final_amount": 30.0, "items": []},
+        ])
+    
+    def test_counts(self, report):
+        """Test that every bill and line item is loaded"""
+        assert report.bill_count == 4
+        assert report.line_count == 4
+        assert report.total_revenue() == pytest.approx(1050.0 + 90.0 + 900.0 + 30.0)
+    
+    def test_revenue_by_day(self, report):
+        """Test daily revenue in date order with undated bills last"""
+        assert report.revenue_by_day() == [
+            ("2026-01-01", pytest.approx(1140.0)), ("2026-01-02", pytest.approx(900.0)), (None, 30.0)]
+    
+    def test_revenue_by_cashier_and_payment_method(self, report):
+        """Test grouping bills by cashier and payment method"""
+        assert report.revenue_by_cashier() == [
+            ("john", pytest.approx(1950.0)), ("mary", pytest.approx(90.0)), (None, 30.0)]
+        assert dict(report.revenue_by_payment_method()) == {
+            "cash": pytest.approx(1050.0), "card": pytest.approx(990.0), None: 30.0}
+    
+    def test_revenue_by_category_is_net_of_discount(self, report):
+        """Test that line revenue carries the card discount of its bill"""
+        assert dict(report.revenue_by_category()) == {
+            "Electronics": pytest.approx(1900.0), "Books": pytest.approx(140.0)}
+    
+    def test_top_products(self, report):
+        """Test ranking products by revenue and by quantity"""
+        assert [row[0][1] for row in report.top_products(2)] == ["Laptop", "Tablet"]
+        assert report.top_products(1, by="quantity") == [(("Books", "Cookbook"), 6, pytest.approx(140.0))]
+        assert len(report.top_products(10)) == 3
+    
+    def test_card_discount_total(self, report):
+        """Test the total discount given on card payments"""
+        assert report.card_discount_total() == pytest.approx(10.0 + 100.0)
+    
+    def test_payment_methods_ignore_case(self):
+        """Test that "Card" and "card" bills are grouped together and both count as card discount"""
+        report = SalesReport([
+            make_record(1, "john", "2026-01-01T09:00:00", "Card", [("Books", "Cookbook", 25.0, 4)]),
+            make_record(2, "mary", "2026-01-01T10:00:00", "card", [("Books", "Cookbook", 25.0, 2)]),
+            make_record(3, "mary", "2026-01-01T11:00:00", "CASH", [("Books", "Cookbook", 25.0, 1)]),
+        ])
+        assert dict(report.revenue_by_payment_method()) == {"card": pytest.approx(135.0), "cash": 25.0}
+        assert report.card_discount_total() == pytest.approx(15.0)
+    
+    def test_empty_history(self):
+        """Test a report with no bills"""
+        report = SalesReport([])
+        assert report.bill_count == 0
+        assert report.revenue_by_day() == []
+        assert report.top_products(5) == []
+        assert report.card_discount_total() == 0.0
+    
+    def test_report_over_saved_bills(self, tmp_path):
+        """Test building a report straight from the bill model's history"""
+        products_file = tmp_path / "products.txt"
+        products_file.write_text("Electronics,Laptop,1000.0,5\n")
+        product_model = ProductModel()
+        product_model.products_file = str(products_file)
+        bill_model = BillModel(product_model)
+        bill_model.bills_file = str(tmp_path / "bills.txt")
+        
+        bill = Bill(User("john", "john123", "cashier"))
+        bill.add_item(Product("Electronics", "Laptop", 1000.0, 5), 2)
+        bill.apply_payment_method("card")
+        assert bill_model.save_bill(bill)[0] is True
+        
+        report = SalesReport(bill_model.iter_bills())
+        assert report.revenue_by_cashier() == [("john", 1800.0)]
+        assert report.card_discount_total() == 200.0
@@ -0,0 +1,241 @@
+import sys
+import os
+import asyncio
+import http.client
+import socket
+import threading
+import time
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.cashier_controller import CashierController
+from model.bill_model import Bill, BillModel
+from model.product_model import Product, ProductModel
+from model.remote_storage import RemoteStorage, encode
+from model.text_storage import TextStorage
+from model.user_model import User, UserModel
+from server.api_server import ApiServer
+
+class TestApiServer:
+    @pytest.fixture
+    def server(self, tmp_path, monkeypatch):
+        """Serve a temporary data directory on a free port, with tills pointed at it"""
+        data_dir = tmp_path / "data"
+        data_dir.mkdir()
+        (data_dir / "admin.txt").write_text("admin,admin123\n")
+        (data_dir / "cashiers.txt").write_text("john,john123\n")
+        (data_dir / "products.txt").write_text("Electronics,Laptop,1000.0,50,111\n"
+                                               "Electronics,Tablet,500.0,80,222\n"
+                                               "Books,Cookbook,25.0,8,333\n")
+        (data_dir / "bills.txt").write_text("")
+        server = ApiServer(TextStorage(str(data_dir)), port=0).start()
+        
+        # The tills run somewhere with no data of their own
+        (tmp_path / "till").mkdir()
+        monkeypatch.chdir(tmp_path / "till")
+        monkeypatch.setenv("SMARTMART_STORAGE", "remote")
+        monkeypatch.setenv("SMARTMART_SERVER", server.address)
+        monkeypatch.setattr(RemoteStorage, "_tokens", {})
+        yield server
+        server.stop()
+    
+    def test_products_round_trip(self, server):
+        """Test that products read and written by a till are the server's"""
+        assert UserModel().authenticate_admin("admin", "admin123")
+        storage = RemoteStorage(server.address)
+        laptop = storage.get_product("Electronics", "Laptop")
+        assert (laptop.price, laptop.stock, laptop.sku) == (1000.0, 50, "111")
+        assert storage.get_product("Electronics", "Missing") is None
+        
+        total, page = storage.get_products_page("Electronics", 0, 1, "price")
+        assert total == 2
+        assert [product.name for product in page] == ["Tablet"]
+        
+        assert storage.update_stock("Books", "Cookbook", 20)
+        assert storage.add_product(Product("Books", "Atlas", 30.0, 4))
+        assert server.storage.get_product("Books", "Cookbook").stock == 20
+        assert "Atlas" in [product.name for product in ProductModel().get_products_by_category("Books")]
+    
+    def test_bills_from_many_tills(self, server):
+        """Test that bills saved by several tills at once take stock off once each, with unique numbers"""
+        assert UserModel().authenticate_cashier("john", "john123")
+        results = []
+        
+        def till(number):
+            bill_model = BillModel(ProductModel())
+            for _ in range(10):
+                bill = Bill(User("john", "", "cashier"))
+                bill.add_item(bill_model.product_model.get_product("Electronics", "Laptop"), 1)
+                bill.add_item(bill_model.product_model.get_product("Electronics", "Tablet"), 2)
+                bill.apply_payment_method("card")
+                results.append(bill_model.save_bill(bill))
+        
+        tills = [threading.Thread(target=till, args=(number,)) for number in range(4)]
+        for thread in tills:
+            thread.start()
+        for thread in tills:
+            thread.join()
+        
+        assert all(success for success, _ in results)
+        assert server.storage.get_product("Electronics", "Laptop").stock == 10
+        assert server.storage.get_product("Electronics", "Tablet").stock == 0
+        
+        with pytest.raises(PermissionError):
+            list(RemoteStorage(server.address).iter_bills())
+        assert UserModel().authenticate_admin("admin", "admin123")
+        records = list(RemoteStorage(server.address).iter_bills())
+        assert sorted(record["number"] for record in records) == list(range(1, 41))
+        assert records[0]["final_amount"] == 1800.0  # 2000.00 less 10% for card
+        assert records[0]["items"][1] == {"category": "Electronics", "name": "Tablet", "price": 500.0,
+                                          "quantity": 2, "subtotal": 1000.0}
+        
+        # The stock is gone, so the next bill is turned down
+        bill = Bill(User("john", "", "cashier"))
+        bill.add_item(Product("Electronics", "Tablet", 500.0, 5), 1)
+        success, message = BillModel().save_bill(bill)
+        assert not success
+        assert "Insufficient stock" in message
+    
+    def test_cashier_controller_and_logins(self, server):
+        """Test that the controllers and models work unchanged against the server"""
+        users = UserModel()
+        assert users.authenticate_admin("admin", "admin123")
+        assert users.add_cashier("mary", "mary123")[0]
+        assert [cashier.username for cashier in users.get_all_cashiers()] == ["john", "mary"]
+        assert UserModel().authenticate_cashier("mary", "mary123")
+        
+        controller = CashierController(User("mary", "", "cashier"))
+        try:
+            controller.add_to_cart(controller.get_product("Books", "Cookbook"), 3)
+            controller.apply_payment_method("cash")
+            outcome = []
+            controller.save_bill(lambda success, message, bill: outcome.append(success))
+            controller.flush_commits(5)
+            assert outcome == [True]
+        finally:
+            controller.close()
+        assert server.storage.get_product("Books", "Cookbook").stock == 5
+        assert users.authenticate_admin("admin", "admin123")
+        assert BillModel().get_sales_for_day(next(server.storage.iter_bills())["timestamp"][:10]) == [1, 75.0]
+    
+    def test_errors_are_reported(self, server):
+        """Test that unknown methods and failing calls raise on the till, and the connection is kept"""
+        assert UserModel().authenticate_cashier("john", "john123")
+        storage = RemoteStorage(server.address)
+        with pytest.raises(RuntimeError):
+            storage._call("get_products_file")
+        with pytest.raises(RuntimeError):
+            storage._call("get_product", "Electronics")
+        assert storage.get_categories() == ["Books", "Electronics"]
+        with pytest.raises(ConnectionError):
+            RemoteStorage("127.0.0.1:1").get_categories()
+    
+    def test_access_control(self, server):
+        """Test that calls need a login, admin calls an admin, and accounts never leave the server"""
+        storage = RemoteStorage(server.address)
+        with pytest.raises(PermissionError):
+            storage.get_categories()
+        assert storage.authenticate("john", "wrong", "cashier") is None
+        assert storage.authenticate("john", "john123", "admin") is None
+        
+        assert storage.authenticate("john", "john123", "cashier")
+        assert storage.get_categories() == ["Books", "Electronics"]
+        with pytest.raises(PermissionError):
+            storage.update_stock("Books", "Cookbook", 100)
+        with pytest.raises(PermissionError):
+            storage.get_all_cashiers()
+        bill = Bill(User("mary", "", "cashier"))
+        bill.add_item(storage.get_product("Books", "Cookbook"), 1)
+        with pytest.raises(PermissionError):
+            storage.save_bill(bill, {("Books", "Cookbook"): 1})
+        for name in ("get_user", "get_all_users", "compact", "decrement_stock", "replace_password"):
+            with pytest.raises(RuntimeError, match="Unknown method"):
+                storage._call(name)
+        
+        assert storage.authenticate("admin", "admin123", "admin")
+        assert [(cashier.username, cashier.password) for cashier in storage.get_all_cashiers()] == [("john", "")]
+        assert storage.update_stock("Books", "Cookbook", 9)
+        storage.logout()
+        with pytest.raises(PermissionError):
+            storage.get_categories()
+        assert server.storage.get_product("Books", "Cookbook").stock == 9
+        # The plaintext password the server started with was hashed at the first login
+        assert server.storage.get_user("john", "cashier").password.startswith("pbkdf2_sha256$")
+    
+    def test_dropped_connections(self, server):
+        """Test that only reads are sent again, and a bill sent twice is saved once"""
+        assert UserModel().authenticate_cashier("john", "john123")
+        storage = RemoteStorage(server.address)
+        assert storage.get_categories() == ["Books", "Electronics"]
+        
+        class Dropped:
+            """A kept connection the server has closed"""
+            def request(self, *args):
+                raise http.client.RemoteDisconnected("Remote end closed connection without response")
+            def close(self):
+                pass
+        
+        storage._local.connection = Dropped()
+        assert storage.get_categories() == ["Books", "Electronics"]
+        assert storage.authenticate("admin", "admin123", "admin")
+        storage._local.connection = Dropped()
+        with pytest.raises(ConnectionError):
+            storage.update_stock("Books", "Cookbook", 100)
+        assert server.storage.get_product("Books", "Cookbook").stock == 8
+        
+        bill = Bill(User("john", "", "cashier"))
+        bill.add_item(storage.get_product("Books", "Cookbook"), 2)
+        request = {"args": encode((bill, {("Books", "Cookbook"): 2})), "request_id": "till-1"}
+        first = storage._post("/call/save_bill", request)
+        assert storage._post("/call/save_bill", request) == first
+        assert first[0] == 200 and first[1]["result"][0]
+        assert server.storage.get_product("Books", "Cookbook").stock == 6
+        
+        # A resend that reaches a restarted server is refused rather than saved again
+        status, payload = storage._post("/call/save_bill", dict(request, request_id="till-2", server_id="old"))
+        assert status == 409 and "restarted" in payload["error"]
+        assert server.storage.get_product("Books", "Cookbook").stock == 6
+    
+    def test_failed_or_cancelled_saves_do_not_block_resends(self, server):
+        """Test that a resend after a call that raised or was cancelled gets an answer"""
+        run = lambda coroutine: asyncio.run_coroutine_threadsafe(coroutine, server._loop)
+        
+        async def fail():
+            raise RuntimeError("disk full")
+        
+        async def save():
+            return 200, {"result": [True, 1]}
+        
+        with pytest.raises(RuntimeError):
+            run(server._run_once(("john", "a"), fail)).result(5)
+        assert run(server._run_once(("john", "a"), save)).result(5) == (200, {"result": [True, 1]})
+        
+        release = asyncio.Event()
+        
+        async def slow():
+            await release.wait()
+            return await save()
+        
+        first = run(server._run_once(("john", "b"), slow))
+        deadline = time.time() + 5
+        while ("john", "b") not in server._replies and time.time() < deadline:
+            time.sleep(0.001)
+        first.cancel()
+        resend = run(server._run_once(("john", "b"), fail))
+        server._loop.call_soon_threadsafe(release.set)
+        # The first call carried on without its request, and the resend got its answer
+        assert resend.result(5) == (200, {"result": [True, 1]})
+    
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets are not available")
+    def test_unix_socket(self, server, tmp_path):
+        """Test serving the same storage on a Unix socket"""
+        unix_server = ApiServer(server.storage, socket_path=str(tmp_path / "smartmart.sock")).start()
+        try:
+            storage = RemoteStorage(unix_server.address)
+            assert storage.authenticate("john", "john123", "cashier")
+            assert storage.get_product("Books", "Cookbook").sku == "333"
+            assert storage.get_categories() == ["Books", "Electronics"]
+        finally:
+            unix_server.stop()
@@ -0,0 +1,165 @@
+import sys
+import os
+import asyncio
+import threading
+import time
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.async_models import AsyncBillModel, AsyncProductModel, AsyncUserModel
+from model.bill_model import Bill, BillModel
+from model.user_model import User
+from view.tk_async import TkAsyncBridge
+
+class FakeRoot:
+    """Stands in for tk.Tk: after() callbacks are kept until run_after() is called"""
+    
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+    
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.jobs[self.next_id] = callback
+        return self.next_id
+    
+    def after_cancel(self, job):
+        self.jobs.pop(job, None)
+    
+    def run_after(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values():
+            callback()
+    
+    def run_until_idle(self, bridge):
+        """Run the bridge's polls until every result is handed over"""
+        deadline = time.time() + 5
+        while bridge.pending and time.time() < deadline:
+            self.run_after()
+            time.sleep(0.001)
+
+class TestAsyncModels:
+    @pytest.fixture
+    def models(self, tmp_path, monkeypatch):
+        """Create async product, bill and user models on a temporary data directory"""
+        (tmp_path / "data").mkdir()
+        (tmp_path / "data" / "admin.txt").write_text("admin,admin123\n")
+        (tmp_path / "data" / "cashiers.txt").write_text("john,john123\n")
+        (tmp_path / "data" / "products.txt").write_text("Electronics,Laptop,1000.0,50\n"
+                                                        "Electronics,Tablet,500.0,50\n"
+                                                        "Books,Cookbook,25.0,8\n")
+        (tmp_path / "data" / "bills.txt").write_text("")
+        monkeypatch.chdir(tmp_path)
+        products = AsyncProductModel()
+        return products, AsyncBillModel(BillModel(products.model)), AsyncUserModel()
+    
+    def test_methods_are_awaitable(self, models):
+        """Test that model methods give the same results when awaited"""
+        products, bills, users = models
+        
+        async def main():
+            return await asyncio.gather(products.get_categories(),
+                                        products.get_product("Books", "Cookbook"),
+                                        users.authenticate_cashier("john", "john123"))
+        
+        categories, cookbook, john = asyncio.run(main())
+        assert categories == products.model.get_categories()
+        assert cookbook.stock == 8
+        assert john.username == "john"
+    
+    def test_concurrent_saves(self, models):
+        """Test that bills saved concurrently from one loop take stock off once each"""
+        products, bills, users = models
+        
+        async def sell():
+            bill = Bill(User("john", "", "cashier"))
+            bill.add_item(await products.get_product("Electronics", "Laptop"), 2)
+            return await bills.save_bill(bill)
+        
+        async def main():
+            results = await asyncio.gather(*[sell() for _ in range(20)])
+            return results, [record async for record in bills.iter_bills(chunk_size=3)]
+        
+        results, records = asyncio.run(main())
+        assert all(success for success, _ in results)
+        assert products.model.get_product("Electronics", "Laptop").stock == 10
+        assert sorted(record["number"] for record in records) == list(range(1, 21))
+    
+    def test_calls_run_concurrently(self, models, monkeypatch):
+        """Test that slow calls overlap on the pool instead of blocking the loop"""
+        products, bills, users = models
+        
+        def slow_categories():
+            time.sleep(0.1)
+            return ["Books"]
+        monkeypatch.setattr(products.model, "get_categories", slow_categories)
+        
+        async def main():
+            start = time.perf_counter()
+            await asyncio.gather(*[products.get_categories() for _ in range(4)])
+            return time.perf_counter() - start
+        
+        assert asyncio.run(main()) < 0.3
+    
+    def test_errors_propagate(self, models):
+        """Test that an exception raised by a model method is raised by the await"""
+        products, bills, users = models
+        with pytest.raises(TypeError):
+            asyncio.run(products.get_product("Books"))
+
+class TestTkAsyncBridge:
+    @pytest.fixture
+    def bridge(self):
+        root = FakeRoot()
+        bridge = TkAsyncBridge(root)
+        yield root, bridge
+        bridge.close()
+    
+    def test_results_reach_the_tk_thread(self, bridge):
+        """Test that callbacks run only in poll, on the polling thread, with the results"""
+        root, bridge = bridge
+        outcome = []
+        
+        async def double(value):
+            await asyncio.sleep(0)
+            return value * 2
+        
+        async def fail():
+            raise ValueError("no such product")
+        
+        record = lambda success, result: outcome.append((success, result, threading.current_thread()))
+        futures = [bridge.submit(double(21), record), bridge.submit(fail(), record)]
+        for future in futures:
+            try:
+                future.result(5)
+            except ValueError:
+                pass
+        assert outcome == []
+        
+        root.run_until_idle(bridge)
+        assert sorted(outcome, key=lambda item: item[0]) == [
+            (False, "Error: no such product", threading.current_thread()),
+            (True, 42, threading.current_thread())]
+        assert bridge.pending == 0
+        assert root.jobs == {}
+    
+    def test_polls_while_results_are_due(self, bridge):
+        """Test that the bridge keeps polling until a slow coroutine has finished"""
+        root, bridge = bridge
+        release = threading.Event()
+        outcome = []
+        
+        async def wait():
+            await asyncio.get_running_loop().run_in_executor(None, release.wait)
+            return "done"
+        
+        future = bridge.submit(wait(), lambda success, result: outcome.append(result))
+        root.run_after()
+        assert outcome == [] and len(root.jobs) == 1
+        release.set()
+        future.result(5)
+        root.run_until_idle(bridge)
+        assert outcome == ["done"]
+        assert root.jobs == {}
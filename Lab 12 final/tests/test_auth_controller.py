@@ -0,0 +1,109 @@
+import sys
+import os
+import time
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.admin_controller import AdminController
+from controller.auth_controller import AuthController
+from controller.cashier_controller import CashierController
+
+class TestCashierSessions:
+    @pytest.fixture
+    def tills(self, tmp_path, monkeypatch):
+        """Create an AuthController and a CashierController on a temporary data directory"""
+        (tmp_path / "data").mkdir()
+        (tmp_path / "data" / "admin.txt").write_text("admin,admin123\n")
+        (tmp_path / "data" / "cashiers.txt").write_text("john,john123\nmary,mary123\n")
+        (tmp_path / "data" / "products.txt").write_text("Electronics,Laptop,1000.0,5,111\nBooks,Cookbook,25.0,8,222\n")
+        (tmp_path / "data" / "bills.txt").write_text("")
+        monkeypatch.chdir(tmp_path)
+        auth = AuthController()
+        assert auth.login("john", "john123", "cashier")
+        controller = CashierController(auth.get_current_user())
+        yield auth, controller
+        controller.close()
+    
+    def switch(self, auth, controller, username, password):
+        """Log the current cashier out, parking their bill, and the next one in"""
+        auth.park_bill(controller.current_bill)
+        auth.logout()
+        if not auth.login(username, password, "cashier"):
+            return False
+        user = auth.get_current_user()
+        controller.switch_cashier(user, auth.resume_bill(user.username))
+        return True
+    
+    def test_parked_bill_is_restored(self, tills):
+        """Test that each cashier gets their own open bill back after a handover"""
+        auth, controller = tills
+        controller.scan("111", 2)
+        john_bill = controller.current_bill
+        
+        assert self.switch(auth, controller, "mary", "mary123")
+        assert controller.get_cart_items() == []
+        assert controller.current_bill.cashier.username == "mary"
+        controller.scan("222")
+        
+        assert self.switch(auth, controller, "john", "john123")
+        assert controller.current_bill is john_bill
+        assert [item.quantity for item in controller.get_cart_items()] == [2]
+        assert list(auth.parked_bills) == ["mary"]
+    
+    def test_empty_bills_are_not_parked(self, tills):
+        """Test that only bills with items are kept"""
+        auth, controller = tills
+        assert auth.park_bill(controller.current_bill) is False
+        assert auth.resume_bill("john") is None
+        
+        auth.park_bills = False
+        controller.scan("111")
+        assert auth.park_bill(controller.current_bill) is False
+    
+    def test_failed_login_does_not_take_the_till(self, tills):
+        """Test that a wrong password leaves nobody logged in and the bill parked"""
+        auth, controller = tills
+        controller.scan("111")
+        john_bill = controller.current_bill
+        assert not self.switch(auth, controller, "mary", "wrong")
+        assert auth.get_current_user() is None
+        assert auth.parked_bills["john"] is john_bill
+    
+    def test_failed_bill_stays_with_its_cashier(self, tills):
+        """Test that a bill that fails after a handover is not put in the next cashier's cart"""
+        auth, controller = tills
+        controller.scan("111", 2)
+        controller.product_model.update_stock("Electronics", "Laptop", 1)
+        results = []
+        controller.save_bill(lambda *result: results.append(result))
+        
+        assert self.switch(auth, controller, "mary", "mary123")
+        controller.flush_commits(timeout=5)
+        assert results[0][0] is False
+        assert controller.current_bill.cashier.username == "mary"
+        assert controller.get_cart_items() == []
+    
+    def test_switch_is_fast(self, tills):
+        """Test that a handover does no catalog reload"""
+        auth, controller = tills
+        self.switch(auth, controller, "mary", "mary123")
+        self.switch(auth, controller, "john", "john123")
+        
+        start = time.perf_counter()
+        for _ in range(100):
+            self.switch(auth, controller, "mary", "mary123")
+            self.switch(auth, controller, "john", "john123")
+        assert (time.perf_counter() - start) / 200 < 0.01
+    
+    def test_switch_sees_new_products(self, tills):
+        """Test that products added from the admin screen are found after a handover"""
+        auth, controller = tills
+        assert controller.search("lapd")[0].name == "Laptop"
+        AdminController().add_product("Electronics", "Lapdesk", 30, 5, "999111")
+        
+        assert self.switch(auth, controller, "mary", "mary123")
+        assert controller.search("lapd")[0].name == "Lapdesk"
+        assert controller.scan("999111") == (True, "1 x Lapdesk added to bill")
+        assert controller.get_cart_items()[0].product.stock == 5
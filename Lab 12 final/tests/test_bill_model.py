@@ -1,5 +1,6 @@
 import sys
 import os
+import threading
 import pytest
 
 # Add the parent directory to the Python path
@@ -31,8 +32,12 @@ class TestBillModel:
         bills_file = tmp_path / "bills.txt"
         bills_file.write_text("Bill 1: 100.00\nBill 2: 200.00\n")
         
+        products_file = tmp_path / "products.txt"
+        products_file.write_text("Electronics,Laptop,1000.0,5\nClothing,T-Shirt,20.0,10\n")
+        
         model = BillModel()
         model.bills_file = str(bills_file)
+        model.product_model.products_file = str(products_file)
         return model
     
     def test_bill_item_creation(self, sample_product):
@@ -104,37 +109,287 @@ class TestBillModel:
         assert bill.final_amount == 1800.00  # 2000.00 - 200.00
         assert final_amount == 1800.00
     
+    def test_same_product_merges_into_one_line(self, bill, sample_product):
+        """Test that adding a product twice raises the quantity of its line"""
+        bill.add_item(sample_product, 2)
+        bill.add_item(Product("Clothing", "T-Shirt", 20.00, 10), 1)
+        success, _ = bill.add_item(sample_product, 1)
+        assert success is True
+        assert [(item.product.name, item.quantity) for item in bill.items] == [("Laptop", 3), ("T-Shirt", 1)]
+        assert bill.total == 3020.00
+        
+        # The stock check counts what is already on the bill
+        success, message = bill.add_item(sample_product, 3)
+        assert success is False
+        assert message == "Insufficient stock. Available: 2"
+    
+    def test_set_quantity_and_remove_line(self, bill, sample_product):
+        """Test changing a line's quantity in place and removing it by key"""
+        bill.add_item(sample_product, 1)
+        bill.add_item(Product("Clothing", "T-Shirt", 20.00, 10), 1)
+        
+        assert bill.set_quantity(("Clothing", "T-Shirt"), 4)[0] is True
+        assert bill.total == 1080.00
+        assert bill.set_quantity(("Clothing", "T-Shirt"), 11)[0] is False
+        assert bill.set_quantity(("Toys", "Kite"), 1)[0] is False
+        
+        assert bill.remove_line(("Electronics", "Laptop"))[0] is True
+        assert bill.total == 80.00
+        assert bill.set_quantity(("Clothing", "T-Shirt"), 0)[0] is True
+        assert bill.items == []
+        assert bill.total_cents == 0
+    
+    def test_totals_are_exact_cents(self, bill):
+        """Test that prices which are inexact as floats add up to exact cents"""
+        for i in range(1000):
+            bill.add_item(Product("Groceries", f"Item {i}", 0.1, 5), 3)
+        assert bill.total_cents == 30000
+        assert bill.total == 300.00
+        
+        # 10% of 4.05 is 0.405, rounded to 41 cents
+        bill = Bill(bill.cashier)
+        bill.add_item(Product("Groceries", "Gum", 1.35, 5), 3)
+        bill.apply_payment_method("Card")
+        assert (bill.total_cents, bill.discount_cents, bill.final_amount_cents) == (405, 41, 364)
+        
+        # The discount follows later changes to the bill
+        bill.remove_item(0)
+        assert bill.discount == 0.0
+    
+    def test_slots(self, bill, sample_product):
+        """Test that bills and lines carry no per-instance __dict__"""
+        bill.add_item(sample_product, 1)
+        assert not hasattr(bill, "__dict__")
+        assert not hasattr(bill.items[0], "__dict__")
+    
     def test_get_next_bill_number(self, bill_model):
         """Test getting the next bill number"""
         assert bill_model.get_next_bill_number() == 3  # Already have Bill 1 and Bill 2
     
-    def test_save_bill(self, bill_model, cashier_user, sample_product, monkeypatch):
+    def test_bill_numbers_are_persistent(self, bill_model, tmp_path):
+        """Test that the bill sequence carries on across model instances"""
+        assert bill_model.get_next_bill_number() == 3
+        assert bill_model.get_next_bill_number() == 4
+        
+        other_model = BillModel(bill_model.product_model)
+        other_model.bills_file = bill_model.bills_file
+        assert other_model.get_next_bill_number() == 5
+        assert (tmp_path / "bills.txt.seq").read_text() == "5"
+    
+    def test_bill_sequence_does_not_scan_history(self, bill_model, monkeypatch):
+        """Test that bills.txt is only read to seed the sequence"""
+        bill_model.get_next_bill_number()
+        
+        def fail_count(self):
+            raise AssertionError("bills.txt should not be scanned again")
+        from model.text_storage import TextStorage
+        monkeypatch.setattr(TextStorage, "_count_existing_bills", fail_count)
+        assert bill_model.get_next_bill_number() == 4
+    
+    def test_concurrent_bill_numbers_are_unique(self, bill_model):
+        """Test that terminals allocating at the same time never share a number"""
+        numbers = []
+        
+        def allocate():
+            model = BillModel(bill_model.product_model)
+            model.bills_file = bill_model.bills_file
+            for _ in range(25):
+                numbers.append(model.get_next_bill_number())
+        
+        threads = [threading.Thread(target=allocate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert sorted(numbers) == list(range(3, 103))
+    
+    def test_save_bill(self, bill_model, cashier_user, sample_product):
         """Test saving a bill to file and updating stock"""
         # Create a bill with items
         bill = Bill(cashier_user)
         bill.add_item(sample_product, 2)
+        bill.add_item(Product("Clothing", "T-Shirt", 20.00, 10), 4)
+        bill.calculate_total()
+        bill.apply_payment_method("cash")
+        
+        # Save the bill
+        success, message = bill_model.save_bill(bill)
+        
+        # Verify the bill was saved
+        assert success is True
+        assert message == "Bill 3 saved successfully"
+        assert bill.number == 3
+        with open(bill_model.bills_file) as file:
+            assert file.read().splitlines()[-1] == "Bill 3: 2080.00"
+        
+        # Verify the stock was updated
+        product_model = bill_model.product_model
+        assert product_model.get_product("Electronics", "Laptop").stock == 3  # 5 - 2
+        assert product_model.get_product("Clothing", "T-Shirt").stock == 6  # 10 - 4
+    
+    def test_iter_bills_streams_full_records(self, bill_model, cashier_user, sample_product):
+        """Test that saved bills are read back with cashier, payment and line items"""
+        bill = Bill(cashier_user)
+        bill.add_item(sample_product, 2)
         bill.calculate_total()
+        bill.apply_payment_method("card")
+        assert bill_model.save_bill(bill)[0] is True
+        
+        bill = Bill(cashier_user)
+        bill.add_item(Product("Clothing", "T-Shirt", 20.00, 10), 3)
         bill.apply_payment_method("cash")
+        assert bill_model.save_bill(bill)[0] is True
         
-        # Mock the ProductModel.update_stock method
-        called_with = []
+        bills = bill_model.iter_bills()
+        first = next(bills)
+        assert first["number"] == 3
+        assert first["cashier"] == "testcashier"
+        assert first["payment_method"] == "card"
+        assert (first["total"], first["discount"], first["final_amount"]) == (2000.0, 200.0, 1800.0)
+        assert first["items"] == [{"category": "Electronics", "name": "Laptop", "price": 1000.0,
+                                   "quantity": 2, "subtotal": 2000.0}]
+        assert [record["number"] for record in bills] == [4]
+    
+    def test_iter_bills_skips_torn_record(self, bill_model, cashier_user, sample_product):
+        """Test that a partly written last record is ignored"""
+        bill = Bill(cashier_user)
+        bill.add_item(sample_product, 1)
+        bill.apply_payment_method("cash")
+        assert bill_model.save_bill(bill)[0] is True
         
-        def mock_update_stock(self, category, name, new_stock):
-            called_with.append((category, name, new_stock))
-            return True, "Stock updated"
+        records_file = os.path.splitext(bill_model.bills_file)[0] + ".jsonl"
+        with open(records_file, 'a') as file:
+            file.write('{"number":4,"cashier":"test')
+        
+        assert [record["number"] for record in bill_model.iter_bills()] == [3]
+    
+    def test_save_bill_appends_one_stock_batch(self, bill_model, cashier_user, sample_product, monkeypatch):
+        """Test that a checkout appends one ledger batch, bill included, instead of rewriting products.txt"""
+        bill = Bill(cashier_user)
+        bill.add_item(sample_product, 1)
+        bill.add_item(Product("Clothing", "T-Shirt", 20.00, 10), 1)
+        bill.apply_payment_method("cash")
         
-        # Apply the monkeypatch
         from model.product_model import ProductModel
-        monkeypatch.setattr(ProductModel, "update_stock", mock_update_stock)
+        def fail_update_stock(self, category, name, new_stock):
+            raise AssertionError("save_bill should not update stock line by line")
+        monkeypatch.setattr(ProductModel, "update_stock", fail_update_stock)
+        
+        products_file = bill_model.product_model.products_file
+        with open(products_file) as file:
+            snapshot = file.read()
         
-        # Save the bill
         success, _ = bill_model.save_bill(bill)
+        assert success is True
         
-        # Verify the bill was saved
+        with open(products_file) as file:
+            assert file.read() == snapshot
+        with open(products_file + ".ledger") as file:
+            lines = file.read().splitlines()
+        assert lines.count("commit") == 1
+        assert [line.split(",")[0] for line in lines[lines.index("begin") + 1:-1]] == ["add", "add", "bill"]
+    
+    def test_save_bill_insufficient_stock_writes_nothing(self, bill_model, cashier_user, sample_product):
+        """Test that a checkout failing on one line leaves stock and bills untouched"""
+        bill = Bill(cashier_user)
+        bill.add_item(sample_product, 2)
+        bill.add_item(Product("Clothing", "T-Shirt", 20.00, 50), 30)  # Only 10 on disk
+        bill.apply_payment_method("cash")
+        
+        success, _ = bill_model.save_bill(bill)
+        assert success is False
+        
+        product_model = bill_model.product_model
+        assert product_model.get_product("Electronics", "Laptop").stock == 5
+        assert product_model.get_product("Clothing", "T-Shirt").stock == 10
+        assert bill_model.get_next_bill_number() == 3
+    
+    def test_save_bill_failed_record_keeps_stock(self, bill_model, cashier_user, sample_product, tmp_path):
+        """Test that stock is not decremented if the bill record cannot be written"""
+        bill = Bill(cashier_user)
+        bill.add_item(sample_product, 2)
+        bill.apply_payment_method("cash")
+        
+        # Point the bills file into a missing directory so no bill number can be taken
+        bill_model.bills_file = str(tmp_path / "missing" / "bills.txt")
+        
+        success, _ = bill_model.save_bill(bill)
+        assert success is False
+        assert bill_model.product_model.get_product("Electronics", "Laptop").stock == 5
+    
+    def test_crash_before_bill_files_is_finished_once(self, bill_model, cashier_user, sample_product, monkeypatch):
+        """Test that a bill committed with its stock is written once after a crash before its files"""
+        from model.text_storage import TextStorage
+        bill = Bill(cashier_user)
+        bill.add_item(sample_product, 2)
+        bill.apply_payment_method("cash")
+        
+        def crash(self, records):
+            raise OSError("disk full")
+        with monkeypatch.context() as patch:
+            patch.setattr(TextStorage, "_write_bill_files", crash)
+            success, _ = bill_model.save_bill(bill)
+        
+        # The bill is committed, so the cashier is not asked to save it again
         assert success is True
+        assert list(bill_model.iter_bills()) == []
         
-        # Verify the stock was updated
-        assert len(called_with) == 1
-        assert called_with[0][0] == "Electronics"  # category
-        assert called_with[0][1] == "Laptop"  # name
-        assert called_with[0][2] == 3  # new stock (5 - 2) 
\ No newline at end of file
+        # A restarted till finishes the bill from the ledger before its own
+        restarted = TextStorage(os.path.dirname(bill_model.bills_file))
+        restarted.products_file = bill_model.product_model.products_file
+        assert restarted.save_bill(bill, {("Electronics", "Laptop"): 1}) == (True, 4)
+        assert restarted.compact()[0] is True
+        
+        assert [record["number"] for record in restarted.iter_bills()] == [3, 4]
+        assert restarted.get_product("Electronics", "Laptop").stock == 2
+        with open(bill_model.bills_file) as file:
+            assert file.read().splitlines()[-2:] == ["Bill 3: 2000.00", "Bill 4: 2000.00"]
+    
+    def test_save_bills_batch(self, bill_model, cashier_user, sample_product, monkeypatch):
+        """Test that a batch is checked bill by bill and written with one fsync per file"""
+        fsyncs = []
+        real_fsync = os.fsync
+        monkeypatch.setattr(os, "fsync", lambda fd: fsyncs.append(fd) or real_fsync(fd))
+        
+        def bill_for(quantity):
+            bill = Bill(cashier_user)
+            bill.add_item(sample_product, quantity)
+            bill.apply_payment_method("cash")
+            return bill, {("Electronics", "Laptop"): quantity}
+        
+        # The second bill needs more than the first one leaves
+        results = bill_model.storage.save_bills([bill_for(3), bill_for(3), bill_for(2)])
+        assert results == [(True, 3), (False, "Insufficient stock for Laptop. Available: 2"), (True, 4)]
+        assert len(fsyncs) == 4  # Sequence, bills.jsonl, bills.txt and the stock ledger
+        
+        assert bill_model.product_model.get_product("Electronics", "Laptop").stock == 0
+        assert [record["number"] for record in bill_model.iter_bills()] == [3, 4]
+        with open(bill_model.bills_file) as file:
+            assert file.read().splitlines()[-2:] == ["Bill 3: 3000.00", "Bill 4: 2000.00"]
+    
+    def test_group_commit(self, bill_model, cashier_user):
+        """Test that bills saved from several threads share batches"""
+        bill_model.use_group_commit(window=0.05, max_batch=8)
+        product = Product("Clothing", "T-Shirt", 20.00, 10)
+        results = []
+        bills = []
+        
+        def save():
+            bill = Bill(cashier_user)
+            bill.add_item(product, 1)
+            bill.apply_payment_method("cash")
+            bills.append(bill)
+            results.append(bill_model.save_bill(bill))
+        
+        threads = [threading.Thread(target=save) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert all(success for success, _ in results)
+        assert sorted(bill.number for bill in bills) == list(range(3, 11))
+        assert bill_model.group_commit.bills == 8
+        assert bill_model.group_commit.batches < 8
+        assert bill_model.product_model.get_product("Clothing", "T-Shirt").stock == 2
@@ -0,0 +1,201 @@
+import sys
+import os
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.binary_storage import BinaryStorage, HEADER, RECORD_V1, binary_to_csv, csv_to_binary, upgrade_binary
+from model.bill_model import Bill, BillModel
+from model.product_model import ProductModel
+from model.user_model import User
+
+class TestBinaryStorage:
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        """Create a data directory with a binary catalog converted from CSV"""
+        (tmp_path / "products.txt").write_text(
+            "Electronics,Laptop,1200.0,10\n"
+            "Electronics,Tablet,500.0,20\n"
+            "Books,Cookbook,25.0,30\n"
+        )
+        (tmp_path / "bills.txt").write_text("")
+        csv_to_binary(str(tmp_path / "products.txt"), str(tmp_path / "products.bin"))
+        return tmp_path
+    
+    @pytest.fixture
+    def product_model(self, data_dir):
+        """Create a ProductModel on the binary catalog"""
+        storage = BinaryStorage(str(data_dir))
+        yield ProductModel(storage)
+        storage.close()
+    
+    def test_lookups(self, product_model):
+        """Test reading the converted catalog"""
+        assert product_model.get_categories() == ["Books", "Electronics"]
+        assert [p.name for p in product_model.get_products_by_category("Electronics")] == ["Laptop", "Tablet"]
+        product = product_model.get_product("Books", "Cookbook")
+        assert (product.price, product.stock) == (25.0, 30)
+        assert product_model.get_product("Books", "Atlas") is None
+    
+    def test_stock_update_is_in_place(self, product_model, data_dir):
+        """Test that a stock change does not grow or replace the file"""
+        binary_file = data_dir / "products.bin"
+        before = os.stat(binary_file)
+        
+        assert product_model.update_stock("Electronics", "Laptop", 4)[0] is True
+        
+        after = os.stat(binary_file)
+        assert (after.st_size, after.st_ino) == (before.st_size, before.st_ino)
+        assert product_model.get_product("Electronics", "Laptop").stock == 4
+    
+    def test_changes_visible_to_other_instances(self, product_model, data_dir):
+        """Test that another process's mapping sees stock, new and deleted products"""
+        other = ProductModel(BinaryStorage(str(data_dir)))
+        assert other.get_product("Electronics", "Laptop").stock == 10
+        
+        product_model.update_stock("Electronics", "Laptop", 7)
+        product_model.add_product("Toys", "Kite", 12.5, 8)
+        product_model.delete_product("Books", "Cookbook")
+        
+        assert other.get_product("Electronics", "Laptop").stock == 7
+        assert other.get_product("Toys", "Kite").stock == 8
+        assert other.get_product("Books", "Cookbook") is None
+        assert other.get_categories() == ["Electronics", "Toys"]
+        other.storage.close()
+    
+    def test_get_products_page(self, product_model):
+        """Test paging through the binary catalog, following in-place stock writes"""
+        total, page = product_model.get_products_page(None, 0, 2)
+        assert total == 3
+        assert [p.name for p in page] == ["Laptop", "Tablet"]
+        assert [p.name for p in product_model.get_products_page("Electronics", 0, 5, "-stock")[1]] == [
+            "Tablet", "Laptop"]
+        
+        product_model.update_stock("Electronics", "Laptop", 50)
+        assert [p.name for p in product_model.get_products_page("Electronics", 0, 5, "-stock")[1]] == [
+            "Laptop", "Tablet"]
+        product_model.delete_product("Electronics", "Tablet")
+        assert product_model.get_products_page(None, 0, 10, "name")[0] == 2
+    
+    def test_in_place_writes_change_data_version(self, product_model):
+        """Test that a stock write that keeps the file size still moves the data version"""
+        version = product_model.data_version()
+        product_model.update_stock("Books", "Cookbook", 29)
+        assert product_model.data_version() != version
+    
+    def test_catalog_version(self, product_model):
+        """Test that in-place stock writes keep the catalog version and renames move it"""
+        version = product_model.storage.catalog_version()
+        product_model.update_stock("Books", "Cookbook", 29)
+        assert product_model.storage.catalog_version() == version
+        product_model.update_product("Books", "Cookbook", "Books", "Atlas", 25.0, 29)
+        assert product_model.storage.catalog_version() != version
+    
+    def test_update_and_delete(self, product_model):
+        """Test renaming, deleting and compacting products"""
+        assert product_model.update_product("Books", "Cookbook", "Kitchen", "Baking", 30.0, 12)[0] is True
+        assert product_model.delete_product("Electronics", "Tablet")[0] is True
+        assert product_model.delete_product("Electronics", "Tablet")[0] is False
+        assert product_model.add_product("Electronics", "Laptop", 1.0, 1)[0] is False
+        
+        assert product_model.compact()[0] is True
+        assert [(p.category, p.name) for p in product_model.get_all_products()] == [
+            ("Electronics", "Laptop"), ("Kitchen", "Baking")]
+    
+    def test_checkout(self, product_model, data_dir):
+        """Test that a bill takes its items off the binary catalog"""
+        bill_model = BillModel(product_model)
+        bill = Bill(User("john", "john123", "cashier"))
+        bill.add_item(product_model.get_product("Electronics", "Laptop"), 2)
+        bill.add_item(product_model.get_product("Books", "Cookbook"), 5)
+        bill.apply_payment_method("cash")
+        
+        success, message = bill_model.save_bill(bill)
+        assert success is True, message
+        assert product_model.get_product("Electronics", "Laptop").stock == 8
+        assert product_model.get_product("Books", "Cookbook").stock == 25
+        assert not os.path.exists(data_dir / "products.bin.journal")
+    
+    def test_interrupted_checkout_is_rolled_forward(self, product_model, data_dir):
+        """Test that a committed journal left by a crash is applied by the next writer"""
+        storage = product_model.storage
+        storage.get_all_products()
+        laptop = storage._record_index[("Electronics", "Laptop")]
+        tablet = storage._record_index[("Electronics", "Tablet")]
+        (data_dir / "products.bin.journal").write_text(f"{laptop},9\n{tablet},19\ncommit\n")
+        
+        product_model.update_stock("Books", "Cookbook", 29)
+        assert product_model.get_product("Electronics", "Laptop").stock == 9
+        assert product_model.get_product("Electronics", "Tablet").stock == 19
+    
+    def test_interrupted_bill_is_written_once(self, product_model, data_dir, monkeypatch):
+        """Test that bills in a committed journal are written by the next writer, and only once"""
+        bill_model = BillModel(product_model)
+        bill = Bill(User("john", "john123", "cashier"))
+        bill.add_item(product_model.get_product("Electronics", "Laptop"), 2)
+        bill.apply_payment_method("cash")
+        
+        def crash(self, records):
+            raise OSError("disk full")
+        with monkeypatch.context() as patch:
+            patch.setattr(BinaryStorage, "_write_bill_files", crash)
+            assert bill_model.save_bill(bill)[0] is True
+        assert os.path.exists(data_dir / "products.bin.journal")
+        assert list(bill_model.iter_bills()) == []
+        
+        product_model.update_stock("Books", "Cookbook", 29)
+        product_model.update_stock("Books", "Cookbook", 28)
+        assert [record["number"] for record in bill_model.iter_bills()] == [1]
+        assert product_model.get_product("Electronics", "Laptop").stock == 8
+        assert not os.path.exists(data_dir / "products.bin.journal")
+    
+    def test_round_trip_to_csv(self, product_model, data_dir):
+        """Test converting the binary catalog back to CSV"""
+        product_model.update_stock("Electronics", "Tablet", 3)
+        binary_to_csv(str(data_dir / "products.bin"), str(data_dir / "export.txt"))
+        assert (data_dir / "export.txt").read_text().splitlines() == [
+            "Electronics,Laptop,1200.0,10",
+            "Electronics,Tablet,500.0,3",
+            "Books,Cookbook,25.0,30",
+        ]
+    
+    def test_name_too_long(self, product_model):
+        """Test that names that do not fit a record are rejected"""
+        success, _ = product_model.add_product("Books", "x" * 65, 1.0, 1)
+        assert success is False
+    
+    def test_sku(self, product_model, data_dir):
+        """Test that SKUs are kept in the record and exported to CSV"""
+        product_model.add_product("Toys", "Kite", 12.5, 8, "4006381333931")
+        product_model.update_product("Books", "Cookbook", "Books", "Cookbook", 25.0, 30, "0042")
+        
+        fresh = BinaryStorage(str(data_dir))
+        assert fresh.get_product("Toys", "Kite").sku == "4006381333931"
+        assert fresh.get_product("Books", "Cookbook").sku == "0042"
+        assert fresh.get_product("Electronics", "Laptop").sku is None
+        fresh.close()
+        
+        binary_to_csv(str(data_dir / "products.bin"), str(data_dir / "export.txt"))
+        assert (data_dir / "export.txt").read_text().splitlines()[-1] == "Toys,Kite,12.5,8,4006381333931"
+        
+        success, _ = product_model.add_product("Toys", "Yo-yo", 3.0, 5, "x" * 25)
+        assert success is False
+    
+    def test_upgrade_version_1(self, tmp_path):
+        """Test converting a catalog written before records had a SKU"""
+        path = tmp_path / "products.bin"
+        with open(path, 'wb') as file:
+            file.write(HEADER.pack(b"SMPC", 1, RECORD_V1.size, 2, 0))
+            file.write(RECORD_V1.pack(b"Books", b"Atlas", 30.0, 4, 0))
+            file.write(RECORD_V1.pack(b"Books", b"Gone", 1.0, 1, 1))
+        
+        storage = BinaryStorage(str(tmp_path))
+        with pytest.raises(ValueError):
+            storage.get_all_products()
+        
+        assert upgrade_binary(str(path)) == 1
+        assert upgrade_binary(str(path)) is None
+        products = storage.get_all_products()
+        assert [(p.name, p.price, p.stock, p.sku) for p in products] == [("Atlas", 30.0, 4, None)]
+        storage.close()
@@ -0,0 +1,125 @@
+import sys
+import os
+import threading
+import time
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from controller.cashier_controller import CashierController
+from model.commit_worker import CommitWorker
+from model.user_model import User
+
+class TestCommitWorker:
+    def test_jobs_run_in_order_off_the_calling_thread(self):
+        """Test that jobs are saved one at a time in submission order on the worker thread"""
+        saved = []
+        def save(item):
+            time.sleep(0.001 * (item % 3))
+            saved.append((item, threading.current_thread()))
+            return True, f"Saved {item}"
+        
+        worker = CommitWorker(save)
+        for item in range(20):
+            worker.submit(item)
+        assert worker.flush(timeout=5) is True
+        assert [item for item, _ in saved] == list(range(20))
+        assert all(thread is not threading.current_thread() for _, thread in saved)
+        assert worker.pending == 0
+        worker.close()
+    
+    def test_callbacks_run_in_poll(self):
+        """Test that results are only reported when the UI thread polls"""
+        release = threading.Event()
+        def save(item):
+            release.wait(5)
+            return item > 0, f"Item {item}"
+        
+        worker = CommitWorker(save)
+        results = []
+        worker.submit(1, lambda success, message: results.append((success, message, threading.current_thread())))
+        worker.submit(0, lambda success, message: results.append((success, message, threading.current_thread())))
+        assert worker.poll() == 0
+        assert worker.pending == 2
+        
+        release.set()
+        worker.flush(timeout=5)
+        assert results == []
+        assert worker.poll() == 2
+        assert results == [(True, "Item 1", threading.current_thread()),
+                           (False, "Item 0", threading.current_thread())]
+        worker.close()
+    
+    def test_errors_are_reported_as_failures(self):
+        """Test that a save that raises does not stop the worker"""
+        def save(item):
+            if item == "bad":
+                raise OSError("disk full")
+            return True, "ok"
+        
+        worker = CommitWorker(save)
+        results = []
+        for item in ("bad", "good"):
+            worker.submit(item, lambda success, message: results.append((success, message)))
+        worker.flush(timeout=5)
+        worker.poll()
+        assert results == [(False, "Error saving: disk full"), (True, "ok")]
+        worker.close()
+    
+    def test_close_finishes_queued_jobs(self):
+        """Test that closing drains the queue before stopping"""
+        saved = []
+        worker = CommitWorker(lambda item: saved.append(item) or (True, "ok"))
+        for item in range(50):
+            worker.submit(item)
+        assert worker.close(timeout=5) is True
+        assert saved == list(range(50))
+        with pytest.raises(RuntimeError):
+            worker.submit(50)
+
+class TestCashierControllerCommits:
+    @pytest.fixture
+    def controller(self, tmp_path, monkeypatch):
+        """Create a CashierController on a temporary data directory"""
+        (tmp_path / "data").mkdir()
+        (tmp_path / "data" / "products.txt").write_text("Electronics,Laptop,1000.0,5,111\nBooks,Cookbook,25.0,8\n")
+        (tmp_path / "data" / "bills.txt").write_text("")
+        monkeypatch.chdir(tmp_path)
+        controller = CashierController(User("john", "john123", "cashier"))
+        yield controller
+        controller.close()
+    
+    def test_save_bill_starts_next_bill_at_once(self, controller):
+        """Test that saving hands the bill off and reports it through poll_commits"""
+        results = []
+        controller.scan("111", 2)
+        controller.apply_payment_method("cash")
+        bill = controller.current_bill
+        assert controller.save_bill(lambda *result: results.append(result))[0] is True
+        assert controller.current_bill is not bill
+        assert controller.get_cart_items() == []
+        
+        controller.commits.flush(timeout=5)
+        controller.poll_commits()
+        assert results == [(True, "Bill 1 saved successfully", bill)]
+        assert bill.number == 1
+        assert controller.get_product("Electronics", "Laptop").stock == 3
+    
+    def test_failed_bill_is_put_back(self, controller):
+        """Test that a bill that cannot be saved returns to an empty cart"""
+        results = []
+        controller.scan("111", 2)
+        controller.apply_payment_method("cash")
+        bill = controller.current_bill
+        controller.product_model.update_stock("Electronics", "Laptop", 1)  # Sold out elsewhere
+        
+        controller.save_bill(lambda *result: results.append(result))
+        controller.commits.flush(timeout=5)
+        controller.poll_commits()
+        assert results[0][0] is False
+        assert controller.current_bill is bill
+        
+        assert controller.save_bill()[0] is True
+        controller.new_bill(bill.cashier)
+        assert controller.save_bill() == (False, "Cart is empty")
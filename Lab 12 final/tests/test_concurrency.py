@@ -0,0 +1,84 @@
+import sys
+import os
+import subprocess
+import pytest
+
+# Add the parent directory to the Python path
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_DIR)
+
+from model.product_model import ProductModel
+
+CHECKOUT_WORKER = """
+import sys
+from model.bill_model import Bill, BillModel
+from model.product_model import ProductModel
+from model.text_storage import TextStorage
+from model.user_model import User
+
+storage = TextStorage(sys.argv[1])
+storage.ledger_compact_threshold = 2048  # Compact often to exercise it under load
+product_model = ProductModel(storage)
+bill_model = BillModel(product_model)
+for _ in range(int(sys.argv[2])):
+    bill = Bill(User("terminal", "pass", "cashier"))
+    bill.add_item(product_model.get_product("Groceries", "Milk"), 1)
+    bill.add_item(product_model.get_product("Groceries", "Bread"), 2)
+    bill.apply_payment_method("cash")
+    success, message = bill_model.save_bill(bill)
+    assert success, message
+"""
+
+REWRITE_WORKER = """
+import sys
+from model.product_model import ProductModel
+from model.text_storage import TextStorage
+
+product_model = ProductModel(TextStorage(sys.argv[1]))
+for price in range(int(sys.argv[2])):
+    success, message = product_model.update_product("Books", "Cookbook", "Books", "Cookbook", price, 30)
+    assert success, message
+"""
+
+class TestConcurrency:
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        """Create a shared data directory"""
+        (tmp_path / "products.txt").write_text(
+            "Groceries,Milk,2.5,1000\n"
+            "Groceries,Bread,2.0,1000\n"
+            "Books,Cookbook,25.0,30\n"
+        )
+        (tmp_path / "bills.txt").write_text("")
+        return tmp_path
+    
+    def start_worker(self, script, data_dir, count):
+        """Start a separate Python process running one of the worker scripts"""
+        env = dict(os.environ, PYTHONPATH=PROJECT_DIR)
+        return subprocess.Popen([sys.executable, "-c", script, str(data_dir), str(count)], env=env)
+    
+    def test_terminals_do_not_lose_stock_changes(self, data_dir):
+        """Test that checkouts from several processes are all applied exactly once"""
+        workers = [self.start_worker(CHECKOUT_WORKER, data_dir, 30) for _ in range(4)]
+        for worker in workers:
+            assert worker.wait(timeout=120) == 0
+        
+        model = ProductModel()
+        model.products_file = str(data_dir / "products.txt")
+        assert model.get_product("Groceries", "Milk").stock == 1000 - 4 * 30
+        assert model.get_product("Groceries", "Bread").stock == 1000 - 4 * 30 * 2
+        
+        bill_numbers = [line.split(':')[0] for line in (data_dir / "bills.txt").read_text().splitlines()]
+        assert len(bill_numbers) == 4 * 30
+        assert len(set(bill_numbers)) == 4 * 30
+    
+    def test_readers_never_see_a_partial_catalog(self, data_dir):
+        """Test that a reader never sees products.txt half-written by another process"""
+        writer = self.start_worker(REWRITE_WORKER, data_dir, 200)
+        
+        model = ProductModel()
+        model.products_file = str(data_dir / "products.txt")
+        while writer.poll() is None:
+            assert len(model.get_all_products()) == 3
+        assert writer.returncode == 0
+        assert model.get_product("Books", "Cookbook").price == 199
@@ -0,0 +1,121 @@
+import sys
+import os
+import json
+import random
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics_report import report_rows
+from monitoring.metrics import (Histogram, Registry, instrument, merge_snapshots, read_snapshots,
+                                registry, timed)
+
+class TestHistogram:
+    def test_percentiles_are_close(self):
+        """Test that percentiles read from the buckets are within a bucket of the exact values"""
+        rng = random.Random(0)
+        values = sorted(rng.lognormvariate(-7, 1.5) for _ in range(10000))
+        histogram = Histogram()
+        for value in values:
+            histogram.record(value)
+        
+        for fraction in (0.5, 0.95, 0.99):
+            exact = values[int(len(values) * fraction) - 1]
+            assert histogram.percentile(fraction) == pytest.approx(exact, rel=0.07)
+        assert histogram.max == values[-1]
+        assert histogram.total == pytest.approx(sum(values))
+    
+    def test_round_trip_and_merge(self):
+        """Test that histograms survive JSON and add up when merged"""
+        first, second = Histogram(), Histogram()
+        for value in (0.001, 0.002, 0.003):
+            first.record(value)
+        second.record(0.5)
+        
+        merged = Histogram.from_dict(first.to_dict())
+        merged.merge(second)
+        assert merged.count == 4
+        assert merged.max == 0.5
+        assert merged.percentile(1.0) == 0.5
+        assert Histogram().percentile(0.5) == 0.0
+
+class TestInstrumentation:
+    @pytest.fixture(autouse=True)
+    def clean_registry(self):
+        """Start every test with an empty registry"""
+        registry.reset()
+        yield
+        registry.reset()
+    
+    def test_disabled_leaves_functions_alone(self, monkeypatch):
+        """Test that nothing is wrapped while metrics are off"""
+        monkeypatch.setattr("monitoring.metrics.ENABLED", False)
+        def work():
+            return 1
+        
+        class Model:
+            def method(self):
+                return 2
+        
+        assert timed()(work) is work
+        method = Model.method
+        assert instrument(Model) is Model and Model.method is method
+    
+    def test_public_methods_are_timed(self):
+        """Test that forced instrumentation times public methods and counts their exceptions"""
+        @instrument(force=True)
+        class Model:
+            def __init__(self):
+                self.calls = 0
+            
+            def save(self, fail=False):
+                """Save something"""
+                self.calls += 1
+                if fail:
+                    raise ValueError("broken")
+                return True, "Saved"
+            
+            def _helper(self):
+                return None
+            
+            @property
+            def size(self):
+                return self.calls
+        
+        model = Model()
+        assert model.save() == (True, "Saved")
+        with pytest.raises(ValueError):
+            model.save(fail=True)
+        model._helper()
+        
+        assert Model.save.__doc__ == "Save something"
+        assert model.size == 2
+        assert registry.histogram("Model.save").count == 2
+        assert registry.counter("Model.save.errors") == 1
+        assert registry.histogram("Model._helper").count == 0
+        assert registry.histogram("Model.__init__").count == 0
+    
+    def test_snapshots_report_the_latest_per_process(self, tmp_path):
+        """Test that the report adds up processes but does not count a process's snapshots twice"""
+        path = str(tmp_path / "metrics.jsonl")
+        till = Registry()
+        for seconds in (0.001, 0.002):
+            till.observe("CashierController.save_bill", seconds)
+            till.dump(path)
+        other = Registry()
+        other.observe("CashierController.save_bill", 0.004)
+        other.count("CashierController.save_bill.errors")
+        snapshot = other.snapshot()
+        snapshot["pid"] += 1
+        with open(path, 'a') as file:
+            file.write(json.dumps(snapshot) + "\n")
+            file.write('{"time": 1')  # Cut short by a crash
+        
+        counters, histograms = merge_snapshots(read_snapshots(path))
+        rows = report_rows(counters, histograms)
+        assert len(rows) == 1
+        assert rows[0]["name"] == "CashierController.save_bill"
+        assert rows[0]["calls"] == 3
+        assert rows[0]["errors"] == 1
+        assert rows[0]["max"] == pytest.approx(4.0)
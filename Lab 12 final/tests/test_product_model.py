@@ -0,0 +1,277 @@
+import sys
+import os
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.product_model import ProductModel, Product
+
+class TestProductModel:
+    @pytest.fixture
+    def product_model(self, tmp_path):
+        """Create a ProductModel backed by a temporary products file"""
+        products_file = tmp_path / "products.txt"
+        products_file.write_text(
+            "Electronics,Laptop,1200.0,10\n"
+            "Electronics,Tablet,500.0,20\n"
+            "Books,Cookbook,25.0,30\n"
+        )
+        
+        model = ProductModel()
+        model.products_file = str(products_file)
+        return model
+    
+    def test_get_all_products(self, product_model):
+        """Test loading every product from the file"""
+        products = product_model.get_all_products()
+        assert len(products) == 3
+        assert products[0].name == "Laptop"
+        assert products[0].price == 1200.0
+        assert products[0].stock == 10
+    
+    def test_get_products_by_category(self, product_model):
+        """Test filtering products by category"""
+        products = product_model.get_products_by_category("Electronics")
+        assert [p.name for p in products] == ["Laptop", "Tablet"]
+        assert product_model.get_products_by_category("Toys") == []
+    
+    def test_get_categories(self, product_model):
+        """Test getting the sorted list of categories"""
+        assert product_model.get_categories() == ["Books", "Electronics"]
+    
+    def test_get_product(self, product_model):
+        """Test looking up a single product by category and name"""
+        product = product_model.get_product("Books", "Cookbook")
+        assert product is not None
+        assert product.price == 25.0
+        assert product_model.get_product("Books", "Laptop") is None
+    
+    def test_get_products_page(self, product_model):
+        """Test paging through the catalog in catalog and sorted order"""
+        total, page = product_model.get_products_page(None, 1, 1)
+        assert total == 3
+        assert [p.name for p in page] == ["Tablet"]
+        
+        total, page = product_model.get_products_page("Electronics", 0, 10, "-price")
+        assert total == 2
+        assert [p.name for p in page] == ["Laptop", "Tablet"]
+        assert [p.name for p in product_model.get_products_page(None, 0, 2, "stock")[1]] == ["Laptop", "Tablet"]
+        
+        # A stock change reorders the sorted pages
+        product_model.update_stock("Books", "Cookbook", 1)
+        assert [p.name for p in product_model.get_products_page(None, 0, 2, "stock")[1]] == ["Cookbook", "Laptop"]
+        
+        with pytest.raises(ValueError):
+            product_model.get_products_page(None, 0, 10, "colour")
+    
+    def test_catalog_is_cached(self, product_model, monkeypatch):
+        """Test that an unchanged file is not parsed again"""
+        product_model.get_all_products()
+        
+        def fail_open(*args, **kwargs):
+            raise AssertionError("products file should not be re-read")
+        
+        monkeypatch.setattr("builtins.open", fail_open)
+        assert len(product_model.get_products_by_category("Electronics")) == 2
+        assert product_model.get_categories() == ["Books", "Electronics"]
+    
+    def test_catalog_reloads_after_external_change(self, product_model):
+        """Test that changes made by another writer are picked up"""
+        assert product_model.get_product("Books", "Atlas") is None
+        
+        with open(product_model.products_file, 'a') as file:
+            file.write("Books,Atlas,40.0,5\n")
+        
+        assert product_model.get_product("Books", "Atlas") is not None
+        assert len(product_model.get_all_products()) == 4
+    
+    def test_add_product(self, product_model):
+        """Test adding a new product"""
+        success, _ = product_model.add_product("Toys", "Kite", 12.5, 8)
+        assert success is True
+        assert product_model.get_categories() == ["Books", "Electronics", "Toys"]
+        assert product_model.get_product("Toys", "Kite").stock == 8
+    
+    def test_add_duplicate_product(self, product_model):
+        """Test adding a duplicate product fails"""
+        success, _ = product_model.add_product("Electronics", "Laptop", 999.0, 1)
+        assert success is False
+        assert len(product_model.get_all_products()) == 3
+    
+    def test_update_stock(self, product_model):
+        """Test updating a product's stock"""
+        product_model.get_all_products()
+        success, _ = product_model.update_stock("Electronics", "Laptop", 4)
+        assert success is True
+        assert product_model.get_product("Electronics", "Laptop").stock == 4
+    
+    def test_update_product(self, product_model):
+        """Test updating a product's details"""
+        success, _ = product_model.update_product("Books", "Cookbook", "Books", "Baking", 30.0, 12)
+        assert success is True
+        assert product_model.get_product("Books", "Cookbook") is None
+        assert product_model.get_product("Books", "Baking").price == 30.0
+    
+    def test_delete_product(self, product_model):
+        """Test deleting a product"""
+        success, _ = product_model.delete_product("Books", "Cookbook")
+        assert success is True
+        assert product_model.get_categories() == ["Electronics"]
+        
+        success, _ = product_model.delete_product("Books", "Cookbook")
+        assert success is False
+    
+    def test_stock_changes_go_to_ledger(self, product_model):
+        """Test that stock updates append to the ledger and leave products.txt alone"""
+        with open(product_model.products_file) as file:
+            snapshot = file.read()
+        
+        product_model.update_stock("Electronics", "Laptop", 4)
+        product_model.decrement_stock({("Electronics", "Tablet"): 5})
+        product_model.add_product("Toys", "Kite", 12.5, 8)
+        
+        with open(product_model.products_file) as file:
+            assert file.read() == snapshot
+        
+        # A fresh model folds the ledger into the snapshot on load
+        fresh_model = ProductModel()
+        fresh_model.products_file = product_model.products_file
+        assert fresh_model.get_product("Electronics", "Laptop").stock == 4
+        assert fresh_model.get_product("Electronics", "Tablet").stock == 15
+        assert fresh_model.get_product("Toys", "Kite").price == 12.5
+    
+    def test_decrement_stock_rejects_whole_batch(self, product_model):
+        """Test that one insufficient line rejects every decrement"""
+        success, _ = product_model.decrement_stock({
+            ("Electronics", "Laptop"): 2,
+            ("Books", "Cookbook"): 31,
+        })
+        assert success is False
+        assert product_model.get_product("Electronics", "Laptop").stock == 10
+        assert not os.path.exists(product_model.products_file + ".ledger")
+    
+    def test_torn_ledger_batch_is_ignored(self, product_model):
+        """Test that a batch without a commit marker is not applied"""
+        product_model.update_stock("Electronics", "Laptop", 4)
+        with open(product_model.products_file + ".ledger", 'a') as file:
+            file.write("begin\nset,Electronics,Laptop,1\nset,Books,Cook")
+        
+        fresh_model = ProductModel()
+        fresh_model.products_file = product_model.products_file
+        assert fresh_model.get_product("Electronics", "Laptop").stock == 4
+        
+        # Later batches are still picked up after the torn one
+        fresh_model.update_stock("Books", "Cookbook", 7)
+        assert product_model.get_product("Books", "Cookbook").stock == 7
+        assert product_model.get_product("Electronics", "Laptop").stock == 4
+    
+    def test_compact(self, product_model):
+        """Test folding the ledger back into products.txt"""
+        product_model.update_stock("Electronics", "Laptop", 4)
+        product_model.add_product("Toys", "Kite", 12.5, 8)
+        
+        success, _ = product_model.compact()
+        assert success is True
+        assert not os.path.exists(product_model.products_file + ".ledger")
+        
+        with open(product_model.products_file) as file:
+            lines = file.read().splitlines()
+        assert lines[0] == "Electronics,Laptop,1200.0,4"
+        assert lines[-1] == "Toys,Kite,12.5,8"
+        assert product_model.get_product("Electronics", "Laptop").stock == 4
+    
+    def test_stale_ledger_is_not_applied_twice(self, product_model):
+        """Test that a ledger left behind by an interrupted compaction is ignored"""
+        product_model.decrement_stock({("Electronics", "Laptop"): 3})
+        ledger_file = product_model.products_file + ".ledger"
+        with open(ledger_file) as file:
+            ledger = file.read()
+        
+        # Simulate a crash after products.txt was replaced but before the ledger was removed
+        product_model.compact()
+        with open(ledger_file, 'w') as file:
+            file.write(ledger)
+        
+        fresh_model = ProductModel()
+        fresh_model.products_file = product_model.products_file
+        assert fresh_model.get_product("Electronics", "Laptop").stock == 7
+        assert not os.path.exists(ledger_file)
+    
+    def test_compaction_runs_past_threshold(self, product_model):
+        """Test that the ledger is compacted in the background once it grows too big"""
+        product_model.storage.ledger_compact_threshold = 200
+        for stock in range(20):
+            product_model.update_stock("Books", "Cookbook", stock)
+        product_model.storage._compaction_thread.join()
+        
+        with open(product_model.products_file) as file:
+            assert "Books,Cookbook,25.0,30" not in file.read()
+        assert product_model.get_product("Books", "Cookbook").stock == 19
+    
+    def test_sku_round_trip(self, product_model):
+        """Test that SKUs are stored as an optional fifth field and survive compaction"""
+        product_model.add_product("Toys", "Kite", 12.5, 8, "0012345")
+        assert product_model.get_product("Toys", "Kite").sku == "0012345"
+        assert product_model.get_product("Books", "Cookbook").sku is None
+        
+        product_model.compact()
+        with open(product_model.products_file) as file:
+            lines = file.read().splitlines()
+        assert lines[-1] == "Toys,Kite,12.5,8,0012345"
+        assert lines[0] == "Electronics,Laptop,1200.0,10"
+        
+        fresh_model = ProductModel()
+        fresh_model.products_file = product_model.products_file
+        assert fresh_model.get_product_by_sku("0012345").name == "Kite"
+    
+    def test_sku_index(self, product_model):
+        """Test SKU lookups through add, update and delete"""
+        product_model.update_product("Electronics", "Laptop", "Electronics", "Laptop", 1200.0, 10, "111")
+        assert product_model.get_product_by_sku("111").name == "Laptop"
+        
+        # Duplicates are refused; updating without a SKU keeps it
+        success, message = product_model.add_product("Toys", "Kite", 12.5, 8, "111")
+        assert (success, message) == (False, "SKU already in use")
+        success, _ = product_model.update_product("Electronics", "Tablet", "Electronics", "Tablet", 500.0, 20, "111")
+        assert success is False
+        product_model.update_product("Electronics", "Laptop", "Electronics", "Notebook", 1100.0, 10)
+        assert product_model.get_product_by_sku("111").name == "Notebook"
+        
+        product_model.update_product("Electronics", "Notebook", "Electronics", "Notebook", 1100.0, 10, "222")
+        assert product_model.get_product_by_sku("111") is None
+        product_model.delete_product("Electronics", "Notebook")
+        assert product_model.get_product_by_sku("222") is None
+    
+    def test_sku_lookup_follows_other_models(self, product_model):
+        """Test that scans see products and stock changed through another model"""
+        product_model.update_product("Books", "Cookbook", "Books", "Cookbook", 25.0, 30, "978")
+        product_model.warm_indexes()
+        
+        other = ProductModel()
+        other.products_file = product_model.products_file
+        other.add_product("Electronics", "Lapdesk", 30.0, 5, "999111")
+        other.update_stock("Books", "Cookbook", 12)
+        
+        assert product_model.get_product_by_sku("999111").name == "Lapdesk"
+        assert product_model.get_product_by_sku("978").stock == 12
+        other.update_product("Books", "Cookbook", "Books", "Cookbook", 25.0, 12, "")
+        assert product_model.get_product_by_sku("978") is None
+    
+    def test_stock_changes_keep_sku_index(self, product_model, monkeypatch):
+        """Test that sales and local edits do not rebuild the SKU index from the whole catalog"""
+        product_model.update_product("Books", "Cookbook", "Books", "Cookbook", 25.0, 30, "978")
+        product_model.warm_indexes()
+        
+        def reread():
+            raise AssertionError("catalog read again")
+        monkeypatch.setattr(product_model.storage, "get_all_products", reread)
+        
+        other = ProductModel()
+        other.products_file = product_model.products_file
+        other.decrement_stock({("Books", "Cookbook"): 2})
+        other.update_stock("Electronics", "Laptop", 4)
+        product_model.add_product("Toys", "Kite", 12.5, 8, "555")
+        
+        assert product_model.get_product_by_sku("978").stock == 28
+        assert product_model.get_product_by_sku("555").name == "Kite"
@@ -0,0 +1,61 @@
+import sys
+import os
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoring.profiler import Profiler
+
+def slow_checkout():
+    """Something for the profile to find"""
+    return sum(i * i for i in range(20000))
+
+class TestProfiler:
+    @pytest.fixture
+    def profiler(self, tmp_path):
+        """Create a Profiler writing to a temporary directory"""
+        profiler = Profiler(str(tmp_path / "profiles"), top=10)
+        yield profiler
+        if profiler.running:
+            profiler.stop()
+    
+    def test_profile_is_written_with_a_summary(self, profiler):
+        """Test that stopping writes the raw profile and a summary naming the hot function"""
+        assert profiler.start() == (True, "Profiling started")
+        assert profiler.start()[0] is False
+        slow_checkout()
+        success, message = profiler.stop()
+        assert success is True
+        assert not profiler.running
+        
+        files = sorted(os.listdir(profiler.directory))
+        assert len(files) == 2
+        assert files[0].startswith("profile-") and files[0].endswith(".prof")
+        assert all(os.path.join(profiler.directory, name) in message for name in files)
+        with open(os.path.join(profiler.directory, files[1])) as file:
+            summary = file.read()
+        assert "by cumulative time" in summary and "by total time" in summary
+        assert "slow_checkout" in summary
+    
+    def test_memory_tracing(self, profiler):
+        """Test that memory tracing adds an allocation report and stops with the profile"""
+        import tracemalloc
+        assert profiler.toggle(memory=True) == (True, "Profiling started with memory tracing")
+        kept = [bytearray(1024) for _ in range(200)]
+        assert profiler.toggle()[0] is True
+        assert not tracemalloc.is_tracing()
+        
+        memory_files = [name for name in os.listdir(profiler.directory) if name.endswith("-memory.txt")]
+        assert len(memory_files) == 1
+        with open(os.path.join(profiler.directory, memory_files[0])) as file:
+            assert file.read().startswith("Traced memory:")
+        assert len(kept) == 200
+    
+    def test_profiles_in_the_same_second_do_not_overwrite(self, profiler):
+        """Test that each stop writes new files"""
+        for _ in range(2):
+            profiler.start()
+            profiler.stop()
+        assert len(os.listdir(profiler.directory)) == 4
+        assert profiler.stop() == (False, "Profiling is not running")
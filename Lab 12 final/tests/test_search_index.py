@@ -0,0 +1,133 @@
+import sys
+import os
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model.search_index import SearchIndex, normalize, trigrams
+from model.product_model import ProductModel
+
+KEYS = [
+    ("Electronics", "Laptop"),
+    ("Electronics", "Laptop Stand"),
+    ("Electronics", "Gaming Laptop"),
+    ("Electronics", "Tablet"),
+    ("Books", "Cookbook"),
+    ("Books", "Python Cookbook"),
+    ("Toys", "Kite"),
+]
+
+class TestSearchIndex:
+    @pytest.fixture
+    def index(self):
+        """Create an index over a small catalog"""
+        return SearchIndex(KEYS)
+    
+    def test_normalize_and_trigrams(self):
+        """Test query normalization and padded trigrams"""
+        assert normalize("  Gaming   LAPTOP ") == "gaming laptop"
+        assert trigrams("kit") == {"  k", " ki", "kit", "it "}
+    
+    def test_full_name_prefix_first(self, index):
+        """Test that names starting with the query come before word matches"""
+        assert index.search("lap") == [("Electronics", "Laptop"), ("Electronics", "Laptop Stand"),
+                                       ("Electronics", "Gaming Laptop")]
+    
+    def test_word_prefix(self, index):
+        """Test matching a word inside the name"""
+        assert index.search("stand") == [("Electronics", "Laptop Stand")]
+        assert index.search("COOK")[:2] == [("Books", "Cookbook"), ("Books", "Python Cookbook")]
+    
+    def test_fuzzy(self, index):
+        """Test that misspelled queries still find products"""
+        assert index.search("lptop")[0][1] in ("Laptop", "Laptop Stand", "Gaming Laptop")
+        assert index.search("kyte") == [("Toys", "Kite")]
+        assert index.search("gamng laptop")[0] == ("Electronics", "Gaming Laptop")
+        assert index.search("zzzz") == []
+    
+    def test_limit(self, index):
+        """Test that results stop at the limit"""
+        assert len(index.search("lap", limit=2)) == 2
+        assert index.search("lap", limit=0) == []
+        assert index.search("   ") == []
+    
+    def test_add_and_remove(self, index):
+        """Test updating the index one product at a time"""
+        index.add(("Toys", "Lapdog Plush"))
+        assert ("Toys", "Lapdog Plush") in index.search("lapd")
+        
+        index.remove(("Electronics", "Laptop"))
+        assert ("Electronics", "Laptop") not in index.search("laptop")
+        assert ("Electronics", "Laptop") not in index
+        assert len(index) == len(KEYS)
+        
+        # A removed key can be added back
+        index.add(("Electronics", "Laptop"))
+        assert index.search("laptop")[0] == ("Electronics", "Laptop")
+    
+    def test_rebuilds_after_many_removals(self):
+        """Test that removed products are purged once they outnumber live ones"""
+        index = SearchIndex(("Toys", f"Item {i}") for i in range(3000))
+        for i in range(2000):
+            index.remove(("Toys", f"Item {i}"))
+        assert len(index._keys) < 3000
+        assert index.search("item 2999")[0] == ("Toys", "Item 2999")
+
+class TestProductModelSearch:
+    @pytest.fixture
+    def product_model(self, tmp_path):
+        """Create a ProductModel backed by a temporary products file"""
+        products_file = tmp_path / "products.txt"
+        products_file.write_text("".join(f"{category},{name},10.0,5\n" for category, name in KEYS))
+        
+        model = ProductModel()
+        model.products_file = str(products_file)
+        return model
+    
+    def test_search_returns_products(self, product_model):
+        """Test that search returns live Product objects"""
+        products = product_model.search("tab")
+        assert [(p.category, p.name, p.stock) for p in products] == [("Electronics", "Tablet", 5)]
+    
+    def test_index_follows_catalog_changes(self, product_model):
+        """Test that add, update and delete keep the index current"""
+        product_model.warm_indexes()
+        
+        product_model.add_product("Toys", "Yo-yo", 3.0, 10)
+        assert [p.name for p in product_model.search("yo")] == ["Yo-yo"]
+        
+        product_model.update_product("Toys", "Yo-yo", "Toys", "Spinning Top", 3.0, 10)
+        assert product_model.search("yo-yo") == []
+        assert [p.name for p in product_model.search("spin")] == ["Spinning Top"]
+        
+        product_model.delete_product("Toys", "Kite")
+        assert product_model.search("kite") == []
+    
+    def test_index_follows_other_models(self, product_model):
+        """Test that products added or removed through another model are found by the next search"""
+        product_model.warm_indexes()
+        
+        other = ProductModel()
+        other.products_file = product_model.products_file
+        other.add_product("Electronics", "Lapdesk", 30.0, 5)
+        other.delete_product("Electronics", "Gaming Laptop")
+        
+        assert product_model.search("lapd")[0].name == "Lapdesk"
+        assert "Gaming Laptop" not in [p.name for p in product_model.search("laptop")]
+    
+    def test_sales_do_not_resync(self, product_model, monkeypatch):
+        """Test that stock changes and local edits are not synced from the whole catalog again"""
+        product_model.warm_indexes()
+        
+        def reread():
+            raise AssertionError("catalog read again")
+        monkeypatch.setattr(product_model.storage, "get_all_products", reread)
+        
+        other = ProductModel()
+        other.products_file = product_model.products_file
+        other.decrement_stock({("Toys", "Kite"): 2})
+        product_model.add_product("Toys", "Yo-yo", 3.0, 10)
+        
+        assert [(p.name, p.stock) for p in product_model.search("kite")] == [("Kite", 3)]
+        assert [p.name for p in product_model.search("yo")] == ["Yo-yo"]
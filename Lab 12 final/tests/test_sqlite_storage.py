@@ -0,0 +1,251 @@
+import sys
+import os
+import datetime
+import sqlite3
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrate_data import migrate
+from model.bill_model import Bill, BillModel
+from model.product_model import Product, ProductModel
+from model.sqlite_storage import SQLiteStorage
+from model.storage import Storage, open_storage
+from model.text_storage import TextStorage
+from model.user_model import UserModel, User
+
+class TestSQLiteStorage:
+    @pytest.fixture
+    def data_dir(self, tmp_path):
+        """Create a data directory with text files to migrate"""
+        (tmp_path / "admin.txt").write_text("testadmin,adminpass\n")
+        (tmp_path / "cashiers.txt").write_text("john,john123\nmary,mary123\n")
+        (tmp_path / "products.txt").write_text(
+            "Electronics,Laptop,1000.0,5\n"
+            "Electronics,Tablet,500.0,20\n"
+            "Books,Cookbook,25.0,30\n"
+        )
+        (tmp_path / "bills.txt").write_text("Bill 1: 100.00\nBill 2: 50.00\nBill 2: 75.00\n")
+        return tmp_path
+    
+    @pytest.fixture
+    def storage(self, data_dir):
+        """Create a SQLite storage migrated from the text files"""
+        database = str(data_dir / "smartmart.db")
+        migrate(str(data_dir), database)
+        storage = SQLiteStorage(database)
+        yield storage
+        storage.close()
+    
+    def test_open_storage_selects_backend(self, data_dir, monkeypatch):
+        """Test choosing the backend with SMARTMART_STORAGE"""
+        assert isinstance(open_storage(str(data_dir)), TextStorage)
+        
+        monkeypatch.setenv("SMARTMART_STORAGE", "sqlite")
+        storage = open_storage(str(data_dir))
+        assert isinstance(storage, SQLiteStorage)
+        assert storage.database == str(data_dir / "smartmart.db")
+        storage.close()
+    
+    def test_incomplete_backend_is_refused(self):
+        """Test that a backend missing part of the interface cannot be created"""
+        class ProductsOnly(Storage):
+            def get_all_products(self):
+                return []
+        
+        with pytest.raises(TypeError, match="abstract"):
+            ProductsOnly()
+    
+    def test_wal_mode(self, storage):
+        """Test that the database runs in write-ahead logging mode"""
+        assert storage._query("PRAGMA journal_mode")[0][0] == "wal"
+    
+    def test_migration_counts(self, data_dir):
+        """Test that the migration imports every record"""
+        counts = migrate(str(data_dir), str(data_dir / "migrated.db"))
+        assert counts == {"products": 3, "cashiers": 2, "admin": 1, "bills": 3}
+    
+    def test_migrated_bills_keep_unique_numbers(self, storage):
+        """Test that repeated bill numbers in bills.txt are given fresh ones"""
+        rows = storage._query("SELECT number, final_amount FROM bills ORDER BY number")
+        assert rows == [(1, 100.0), (2, 50.0), (3, 75.0)]
+        assert storage.next_bill_number() == 4
+    
+    def test_product_model(self, storage):
+        """Test the product model on top of SQLite"""
+        model = ProductModel(storage)
+        assert model.get_categories() == ["Books", "Electronics"]
+        assert [p.name for p in model.get_products_by_category("Electronics")] == ["Laptop", "Tablet"]
+        
+        assert model.add_product("Toys", "Kite", 12.5, 8)[0] is True
+        assert model.add_product("Toys", "Kite", 12.5, 8)[0] is False
+        assert model.update_stock("Electronics", "Laptop", 3)[0] is True
+        assert model.update_product("Books", "Cookbook", "Books", "Baking", 30.0, 12)[0] is True
+        assert model.delete_product("Electronics", "Tablet")[0] is True
+        assert model.delete_product("Electronics", "Tablet")[0] is False
+        
+        assert [(p.name, p.stock) for p in model.get_all_products()] == [
+            ("Laptop", 3), ("Baking", 12), ("Kite", 8)]
+    
+    def test_sku(self, storage, data_dir):
+        """Test the SKU column, its unique index and migrating SKUs from products.txt"""
+        model = ProductModel(storage)
+        assert model.add_product("Toys", "Kite", 12.5, 8, "0042")[0] is True
+        assert model.get_product("Toys", "Kite").sku == "0042"
+        assert model.get_product("Books", "Cookbook").sku is None
+        assert model.get_product_by_sku("0042").name == "Kite"
+        
+        # The unique index holds even if the model's check is bypassed
+        with pytest.raises(Exception):
+            storage.update_product("Books", "Cookbook", Product("Books", "Cookbook", 25.0, 30, "0042"))
+        
+        (data_dir / "products.txt").write_text("Toys,Yo-yo,3.0,5,777\n")
+        database = str(data_dir / "skus.db")
+        migrate(str(data_dir), database)
+        migrated = SQLiteStorage(database)
+        assert migrated.get_product("Toys", "Yo-yo").sku == "777"
+        migrated.close()
+    
+    def test_catalog_version(self, storage):
+        """Test that the catalog version moves with products but not with stock"""
+        version = storage.catalog_version()
+        storage.update_stock("Books", "Cookbook", 29)
+        assert storage.decrement_stock({("Books", "Cookbook"): 1})[0] is True
+        assert storage.catalog_version() == version
+        storage.add_product(Product("Toys", "Kite", 12.5, 8))
+        assert storage.catalog_version() != version
+        version = storage.catalog_version()
+        storage.delete_product("Toys", "Missing")
+        assert storage.catalog_version() == version
+        storage.delete_product("Toys", "Kite")
+        assert storage.catalog_version() != version
+    
+    def test_sku_column_added_to_old_database(self, tmp_path):
+        """Test opening a database created before products had a SKU"""
+        database = str(tmp_path / "old.db")
+        connection = sqlite3.connect(database)
+        connection.execute("CREATE TABLE products (id INTEGER PRIMARY KEY, category TEXT NOT NULL, "
+                           "name TEXT NOT NULL, price REAL NOT NULL, stock INTEGER NOT NULL, "
+                           "UNIQUE (category, name))")
+        connection.execute("INSERT INTO products (category, name, price, stock) VALUES ('Books', 'Atlas', 30.0, 4)")
+        connection.commit()
+        connection.close()
+        
+        storage = SQLiteStorage(database)
+        assert storage.get_product("Books", "Atlas").sku is None
+        storage.close()
+    
+    def test_save_bills_batch(self, storage):
+        """Test saving a batch of bills in one transaction, skipping the ones short of stock"""
+        model = ProductModel(storage)
+        cashier = User("john", "john123", "cashier")
+        batch = []
+        for quantity in (3, 3, 2):
+            bill = Bill(cashier)
+            bill.add_item(model.get_product("Electronics", "Laptop"), quantity)
+            bill.apply_payment_method("cash")
+            batch.append((bill, {("Electronics", "Laptop"): quantity}))
+        
+        results = storage.save_bills(batch)
+        assert results == [(True, 4), (False, "Insufficient stock for Laptop. Available: 2"), (True, 5)]
+        assert model.get_product("Electronics", "Laptop").stock == 0
+        assert storage._query("SELECT number, final_amount FROM bills WHERE number >= 4") == [(4, 3000.0), (5, 2000.0)]
+    
+    def test_get_products_page(self, storage):
+        """Test paging with LIMIT/OFFSET in SQLite"""
+        model = ProductModel(storage)
+        total, page = model.get_products_page(None, 1, 5, "name")
+        assert total == 3
+        assert [p.name for p in page] == ["Laptop", "Tablet"]
+        assert [p.name for p in model.get_products_page("Electronics", 0, 1, "-price")[1]] == ["Laptop"]
+    
+    def test_user_model(self, storage):
+        """Test the user model on top of SQLite"""
+        model = UserModel(storage)
+        assert model.authenticate_admin("testadmin", "adminpass") is not None
+        assert model.authenticate_cashier("john", "john123") is not None
+        assert model.authenticate_cashier("john", "wrongpass") is None
+        
+        assert model.add_cashier("alex", "alex123")[0] is True
+        assert model.add_cashier("john", "other")[0] is False
+        assert model.update_cashier("john", "johnny", "newpass")[0] is True
+        assert model.delete_cashier("mary")[0] is True
+        assert [c.username for c in model.get_all_cashiers()] == ["johnny", "alex"]
+    
+    def test_save_bill(self, storage):
+        """Test that a checkout writes the bill, its lines and the stock in one transaction"""
+        product_model = ProductModel(storage)
+        bill_model = BillModel(product_model)
+        
+        bill = Bill(User("john", "john123", "cashier"))
+        bill.add_item(product_model.get_product("Electronics", "Laptop"), 2)
+        bill.add_item(product_model.get_product("Books", "Cookbook"), 4)
+        bill.apply_payment_method("card")
+        
+        success, message = bill_model.save_bill(bill)
+        assert success is True
+        assert message == "Bill 4 saved successfully"
+        
+        assert product_model.get_product("Electronics", "Laptop").stock == 3
+        assert storage._query("SELECT cashier, payment_method, final_amount FROM bills WHERE number = 4") == [
+            ("john", "card", 1890.0)]
+        assert storage._query("SELECT name, quantity FROM bill_lines WHERE bill_number = 4 ORDER BY line") == [
+            ("Laptop", 2), ("Cookbook", 4)]
+        
+        records = list(bill_model.iter_bills())
+        assert [record["number"] for record in records] == [1, 2, 3, 4]
+        assert records[0]["items"] == []
+        assert [(item["name"], item["quantity"]) for item in records[3]["items"]] == [
+            ("Laptop", 2), ("Cookbook", 4)]
+    
+    def test_migration_imports_bill_records(self, data_dir):
+        """Test that full records in bills.jsonl are imported with their line items"""
+        text_storage = TextStorage(str(data_dir))
+        product_model = ProductModel(text_storage)
+        bill = Bill(User("john", "john123", "cashier"))
+        bill.add_item(product_model.get_product("Books", "Cookbook"), 2)
+        bill.apply_payment_method("cash")
+        assert BillModel(product_model).save_bill(bill)[0] is True
+        
+        database = str(data_dir / "migrated.db")
+        counts = migrate(str(data_dir), database)
+        assert counts["bills"] == 4
+        
+        storage = SQLiteStorage(database)
+        records = list(storage.iter_bills())
+        storage.close()
+        # The repeated "Bill 2" summary gets the next free number after the full record
+        assert [record["number"] for record in records] == [1, 2, 4, 5]
+        assert records[2]["cashier"] == "john"
+        assert records[2]["items"][0]["name"] == "Cookbook"
+        assert records[3]["cashier"] is None
+    
+    def test_sales_for_day(self, storage):
+        """Test today's sales totals and the data version after a checkout"""
+        product_model = ProductModel(storage)
+        version = product_model.data_version()
+        
+        bill = Bill(User("john", "john123", "cashier"))
+        bill.add_item(product_model.get_product("Books", "Cookbook"), 2)
+        bill.apply_payment_method("cash")
+        assert BillModel(product_model).save_bill(bill)[0] is True
+        
+        assert product_model.data_version() != version
+        assert storage.get_sales_for_day(datetime.date.today().isoformat()) == (1, 50.0)
+        assert storage.get_sales_for_day("2000-01-01") == (0, 0.0)
+    
+    def test_save_bill_rolls_back(self, storage):
+        """Test that a checkout failing on one line changes nothing"""
+        product_model = ProductModel(storage)
+        bill_model = BillModel(product_model)
+        
+        bill = Bill(User("john", "john123", "cashier"))
+        bill.add_item(product_model.get_product("Electronics", "Laptop"), 2)
+        storage.update_stock("Electronics", "Laptop", 1)
+        bill.apply_payment_method("cash")
+        
+        success, _ = bill_model.save_bill(bill)
+        assert success is False
+        assert product_model.get_product("Electronics", "Laptop").stock == 1
+        assert storage._query("SELECT COUNT(*) FROM bills")[0][0] == 3
@@ -0,0 +1,104 @@
+import sys
+import os
+import random
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from view.tree_sync import TreeSync
+
+class FakeTree:
+    """The part of the ttk.Treeview API that TreeSync uses, without a display"""
+    
+    def __init__(self):
+        self.children = []
+        self.values = {}
+        self.calls = 0
+        self._next_id = 0
+    
+    def insert(self, parent, index, values=(), tags=()):
+        self._next_id += 1
+        item = f"I{self._next_id}"
+        self.children.insert(index, item)
+        self.values[item] = tuple(values)
+        self.calls += 1
+        return item
+    
+    def item(self, item, values=(), tags=()):
+        self.values[item] = tuple(values)
+        self.calls += 1
+    
+    def move(self, item, parent, index):
+        self.children.remove(item)
+        self.children.insert(index, item)
+        self.calls += 1
+    
+    def delete(self, *items):
+        for item in items:
+            self.children.remove(item)
+            del self.values[item]
+        self.calls += 1
+    
+    def shown(self):
+        return [self.values[item] for item in self.children]
+
+def rows(stock):
+    """Build keyed rows from {name: stock}"""
+    return [(name, (name, amount), ()) for name, amount in stock.items()]
+
+class TestTreeSync:
+    @pytest.fixture
+    def tree(self):
+        return FakeTree()
+    
+    def test_first_sync_inserts_every_row(self, tree):
+        """Test filling an empty tree"""
+        sync = TreeSync(tree)
+        assert sync.sync(rows({"a": 1, "b": 2, "c": 3})) == 3
+        assert tree.shown() == [("a", 1), ("b", 2), ("c", 3)]
+    
+    def test_one_changed_row_touches_one_item(self, tree):
+        """Test that editing one row of a large list updates only that row"""
+        sync = TreeSync(tree)
+        stock = {f"p{i}": i for i in range(5000)}
+        sync.sync(rows(stock))
+        items = list(tree.children)
+        
+        tree.calls = 0
+        stock["p2500"] = 0
+        assert sync.sync(rows(stock)) == 1
+        assert tree.calls == 1
+        assert tree.children == items
+        assert tree.values[items[2500]] == ("p2500", 0)
+    
+    def test_unchanged_rows_do_nothing(self, tree):
+        """Test that a refresh with the same rows leaves the tree alone"""
+        sync = TreeSync(tree)
+        sync.sync(rows({"a": 1, "b": 2}))
+        tree.calls = 0
+        assert sync.sync(rows({"a": 1, "b": 2})) == 0
+        assert tree.calls == 0
+    
+    def test_insert_delete_and_reorder(self, tree):
+        """Test that the tree ends up in the new order with surviving items kept"""
+        sync = TreeSync(tree)
+        sync.sync(rows({"a": 1, "b": 2, "c": 3, "d": 4}))
+        item_c = tree.children[2]
+        
+        sync.sync(rows({"c": 3, "e": 5, "a": 1, "d": 4}))
+        assert tree.shown() == [("c", 3), ("e", 5), ("a", 1), ("d", 4)]
+        assert tree.children[0] == item_c
+        
+        sync.sync(rows({}))
+        assert tree.children == []
+    
+    def test_random_refreshes_match_rows(self, tree):
+        """Test many random add/remove/edit/reorder refreshes against the expected rows"""
+        generator = random.Random(7)
+        sync = TreeSync(tree)
+        for _ in range(200):
+            names = generator.sample([f"p{i}" for i in range(30)], generator.randint(0, 30))
+            stock = {name: generator.randint(0, 3) for name in names}
+            sync.sync(rows(stock))
+            assert tree.shown() == list(stock.items())
@@ -5,7 +5,7 @@ import pytest
 # Add the parent directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from model.user_model import UserModel, User
+from model.user_model import UserModel, User, hash_password, is_hashed, verify_password
 
 class TestUserModel:
     @pytest.fixture
@@ -75,7 +75,9 @@ class TestUserModel:
         cashiers = user_model.get_all_cashiers()
         assert len(cashiers) == 4
         assert cashiers[3].username == "newcashier"
-        assert cashiers[3].password == "newpass"
+        assert cashiers[3].password != "newpass"  # Stored as a salted hash
+        assert verify_password(cashiers[3].password, "newpass")
+        assert user_model.authenticate_cashier("newcashier", "newpass") is not None
     
     def test_add_duplicate_cashier(self, user_model):
         """Test adding a duplicate cashier fails"""
@@ -86,6 +88,30 @@ class TestUserModel:
         cashiers = user_model.get_all_cashiers()
         assert len(cashiers) == 3
     
+    def test_duplicate_check_uses_index(self, user_model, monkeypatch):
+        """Test that adding cashiers does not read cashiers.txt again, but sees other terminals' changes"""
+        storage = user_model.storage
+        storage.get_all_cashiers()
+        assert user_model.add_cashier("kate", "kate123")[0] is True
+        
+        reads = []
+        real_open = open
+        
+        def counting_open(path, mode='r', *args, **kwargs):
+            if path == user_model.cashiers_file and 'r' in mode:
+                reads.append(path)
+            return real_open(path, mode, *args, **kwargs)
+        monkeypatch.setattr("builtins.open", counting_open)
+        assert user_model.add_cashier("kate", "other")[0] is False
+        assert user_model.add_cashier("john", "other")[0] is False
+        assert reads == []
+        monkeypatch.undo()
+        
+        with open(user_model.cashiers_file, 'a') as file:
+            file.write("lena,lena123\n")
+        assert user_model.add_cashier("lena", "other")[0] is False
+        assert [cashier.username for cashier in user_model.get_all_cashiers()] == ["john", "mary", "alex", "kate", "lena"]
+    
     def test_update_cashier(self, user_model):
         """Test updating an existing cashier"""
         success, _ = user_model.update_cashier("john", "johnnew", "newpass")
@@ -95,7 +121,9 @@ class TestUserModel:
         cashiers = user_model.get_all_cashiers()
         assert len(cashiers) == 3
         assert cashiers[0].username == "johnnew"
-        assert cashiers[0].password == "newpass"
+        assert verify_password(cashiers[0].password, "newpass")
+        assert user_model.authenticate_cashier("johnnew", "newpass") is not None
+        assert user_model.authenticate_cashier("john", "john123") is None
     
     def test_update_nonexistent_cashier(self, user_model):
         """Test updating a nonexistent cashier fails"""
@@ -125,4 +153,57 @@ class TestUserModel:
         
         # Check that no cashier was deleted
         cashiers = user_model.get_all_cashiers()
-        assert len(cashiers) == 3 
\ No newline at end of file
+        assert len(cashiers) == 3
+    
+    def test_password_hashes_are_salted(self):
+        """Test that the same password hashes differently each time and still verifies"""
+        first, second = hash_password("secret"), hash_password("secret")
+        assert first != second
+        assert verify_password(first, "secret") and verify_password(second, "secret")
+        assert not verify_password(first, "Secret")
+        assert verify_password("secret", "secret")  # Plaintext from older files
+    
+    def test_index_reloads_when_file_changes(self, user_model):
+        """Test that accounts written by another terminal are seen at the next login"""
+        assert user_model.authenticate_cashier("kate", "kate123") is None
+        with open(user_model.cashiers_file, 'a') as file:
+            file.write(f"kate,{hash_password('kate123')}\n")
+        assert user_model.authenticate_cashier("kate", "kate123") is not None
+    
+    def test_verification_is_cached(self, user_model, monkeypatch):
+        """Test that a repeated login skips the hash, but a changed password does not"""
+        user_model.add_cashier("kate", "kate123")
+        calls = []
+        real_verify = verify_password
+        monkeypatch.setattr("model.user_model.verify_password",
+                            lambda stored, password: calls.append(password) or real_verify(stored, password))
+        
+        assert user_model.authenticate_cashier("kate", "kate123") is not None
+        assert user_model.authenticate_cashier("kate", "kate123") is not None
+        assert calls == ["kate123"]
+        
+        assert user_model.authenticate_cashier("kate", "wrong") is None
+        user_model.update_cashier("kate", "kate", "newpass")
+        assert user_model.authenticate_cashier("kate", "kate123") is None
+        assert calls == ["kate123", "wrong", "kate123"]
+    
+    def test_plaintext_password_is_hashed_at_login(self, user_model):
+        """Test that a legacy plaintext password is stored hashed after one login"""
+        assert user_model.authenticate_cashier("mary", "wrong") is None
+        assert user_model.authenticate_admin("testadmin", "adminpass") is not None
+        assert user_model.authenticate_cashier("mary", "mary123") is not None
+        
+        with open(user_model.admin_file) as file:
+            admin = file.read().strip().split(",")
+        with open(user_model.cashiers_file) as file:
+            cashiers = dict(line.split(",") for line in file.read().splitlines())
+        assert admin[0] == "testadmin" and is_hashed(admin[1])
+        assert is_hashed(cashiers["mary"]) and verify_password(cashiers["mary"], "mary123")
+        assert cashiers["john"] == "john123"
+        
+        fresh_model = UserModel()
+        fresh_model.admin_file = user_model.admin_file
+        fresh_model.cashiers_file = user_model.cashiers_file
+        assert fresh_model.authenticate_admin("testadmin", "adminpass") is not None
+        assert fresh_model.authenticate_cashier("mary", "mary123") is not None
+
@@ -0,0 +1,43 @@
+import sys
+import os
+import pytest
+
+# Add the parent directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from view.virtual_list import PageCache
+
+class TestPageCache:
+    @pytest.fixture
+    def fetches(self):
+        """Record every page fetch"""
+        return []
+    
+    @pytest.fixture
+    def pages(self, fetches):
+        """Create a page cache over 1,000,000 numbered rows"""
+        def fetch_page(offset, limit, sort_key):
+            fetches.append((offset, limit, sort_key))
+            return 1000000, list(range(offset, min(offset + limit, 1000000)))
+        return PageCache(fetch_page, page_size=100, max_pages=3)
+    
+    def test_only_the_pages_in_view_are_fetched(self, pages, fetches):
+        """Test that a window near the end fetches two pages, not the whole list"""
+        assert pages.count() == 1000000
+        assert pages.rows(999950, 20) == list(range(999950, 999970))
+        assert pages.rows(999890, 20) == list(range(999890, 999910))
+        assert [offset for offset, _, _ in fetches] == [0, 999900, 999800]
+    
+    def test_cached_pages_are_reused_and_evicted(self, pages, fetches):
+        """Test that recent pages are kept and the least recently used is dropped"""
+        for offset in (0, 100, 200, 0, 300, 0, 100):
+            pages.rows(offset, 10)
+        assert [offset for offset, _, _ in fetches] == [0, 100, 200, 300, 100]
+    
+    def test_clear_and_sort_key(self, pages, fetches):
+        """Test that clearing refetches with the current sort key"""
+        pages.rows(0, 10)
+        pages.sort_key = "-price"
+        pages.clear()
+        pages.rows(0, 10)
+        assert fetches == [(0, 100, None), (0, 100, "-price")]
@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk
 from view.base_view import BaseView
+from view.tree_sync import TreeSync
+from view.virtual_list import VirtualList
 
 class AdminView(BaseView):
-    def __init__(self, admin_controller, logout_callback=None):
+    def __init__(self, admin_controller, logout_callback=None, root=None):
         """Initialize the admin view"""
-        super().__init__("Admin Panel", "900x700")
+        super().__init__("Admin Panel", "900x700", root)
         
         self.admin_controller = admin_controller
         self.logout_callback = logout_callback
@@ -26,8 +28,15 @@ class AdminView(BaseView):
         # Create stock management tab
         self.create_stock_tab()
         
+        # Create sales reports tab
+        self.create_reports_tab()
+        
         # Create toolbar with logout button
         self.create_toolbar()
+        
+        # Hidden profiling switch: Ctrl+Shift+P, or Ctrl+Shift+M to trace memory too
+        self.root.bind("<Control-Shift-P>", lambda event: self.toggle_profiling())
+        self.root.bind("<Control-Shift-M>", lambda event: self.toggle_profiling(memory=True))
     
     def create_toolbar(self):
         """Create toolbar with logout button"""
@@ -61,15 +70,17 @@ class AdminView(BaseView):
         summary_frame.columnconfigure(1, weight=1)
         summary_frame.rowconfigure(0, weight=1)
         summary_frame.rowconfigure(1, weight=1)
-        
-        # Cashier summary
-        cashier_frame = self.create_summary_panel(summary_frame, "Cashier Accounts", 0, 0)
-        # Product summary
-        product_frame = self.create_summary_panel(summary_frame, "Product Categories", 0, 1)
-        # Category summary
-        category_frame = self.create_summary_panel(summary_frame, "Total Products", 1, 0)
-        # Stock summary
-        stock_frame = self.create_summary_panel(summary_frame, "Low Stock Items", 1, 1)
+        summary_frame.rowconfigure(2, weight=1)
+        
+        # Summary panels, keyed by the dashboard snapshot figure they show
+        self.dashboard_panels = {
+            "cashiers": self.create_summary_panel(summary_frame, "Cashier Accounts", 0, 0),
+            "categories": self.create_summary_panel(summary_frame, "Product Categories", 0, 1),
+            "products": self.create_summary_panel(summary_frame, "Total Products", 1, 0),
+            "low_stock": self.create_summary_panel(summary_frame, "Low Stock Items", 1, 1),
+            "stock_value": self.create_summary_panel(summary_frame, "Stock Value", 2, 0),
+            "sales_today": self.create_summary_panel(summary_frame, "Today's Sales", 2, 1),
+        }
         
         # Refresh dashboard
         self.refresh_dashboard()
@@ -93,25 +104,13 @@ class AdminView(BaseView):
     
     def refresh_dashboard(self):
         """Refresh dashboard with latest data"""
-        # Update cashier count
-        cashiers = self.admin_controller.get_all_cashiers()
-        cashier_frame = self.notebook.nametowidget(self.notebook.select()).winfo_children()[1].winfo_children()[0]
-        cashier_frame.content_label.config(text=str(len(cashiers)))
-        
-        # Update category count
-        categories = self.admin_controller.get_categories()
-        product_frame = self.notebook.nametowidget(self.notebook.select()).winfo_children()[1].winfo_children()[1]
-        product_frame.content_label.config(text=str(len(categories)))
+        snapshot = self.admin_controller.get_dashboard_snapshot()
         
-        # Update product count
-        products = self.admin_controller.get_all_products()
-        category_frame = self.notebook.nametowidget(self.notebook.select()).winfo_children()[1].winfo_children()[2]
-        category_frame.content_label.config(text=str(len(products)))
-        
-        # Update low stock count
-        low_stock = [p for p in products if p.stock < 10]
-        stock_frame = self.notebook.nametowidget(self.notebook.select()).winfo_children()[1].winfo_children()[3]
-        stock_frame.content_label.config(text=str(len(low_stock)))
+        for key in ("cashiers", "categories", "products", "low_stock"):
+            self.dashboard_panels[key].content_label.config(text=str(snapshot[key]))
+        self.dashboard_panels["stock_value"].content_label.config(text=f"${snapshot['stock_value']:.2f}")
+        self.dashboard_panels["sales_today"].content_label.config(
+            text=f"${snapshot['sales_today']:.2f} ({snapshot['bills_today']} bills)")
     
     def create_cashier_tab(self):
         """Create cashier management tab"""
@@ -171,6 +170,7 @@ class AdminView(BaseView):
         self.cashier_tree.heading("password", text="Password")
         self.cashier_tree.column("username", width=150)
         self.cashier_tree.column("password", width=150)
+        self.cashier_rows = TreeSync(self.cashier_tree)
         self.cashier_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Bind treeview selection
@@ -181,15 +181,10 @@ class AdminView(BaseView):
     
     def refresh_cashier_list(self):
         """Refresh the cashier list"""
-        # Clear the tree
-        for item in self.cashier_tree.get_children():
-            self.cashier_tree.delete(item)
-            
-        # Load cashiers
+        # Load cashiers, updating only the rows that changed
         cashiers = self.admin_controller.get_all_cashiers()
-        for cashier in cashiers:
-            masked_password = "*" * len(cashier.password)
-            self.cashier_tree.insert("", tk.END, values=(cashier.username, masked_password))
+        self.cashier_rows.sync((cashier.username, (cashier.username, "********"), ())
+                               for cashier in cashiers)
     
     def on_cashier_select(self, event=None):
         """Handle cashier selection in treeview"""
@@ -243,6 +238,7 @@ class AdminView(BaseView):
             self.show_message("Success", message)
             self.clear_cashier_form()
             self.refresh_cashier_list()
+            self.refresh_dashboard()
         else:
             self.show_message("Error", message, "error")
     
@@ -311,6 +307,10 @@ class AdminView(BaseView):
         self.product_stock = ttk.Entry(form_frame)
         self.product_stock.grid(row=3, column=1, sticky=tk.W+tk.E, padx=5, pady=5)
         
+        ttk.Label(form_frame, text="SKU / Barcode:").grid(row=4, column=0, sticky=tk.W, padx=5, pady=5)
+        self.product_sku = ttk.Entry(form_frame)
+        self.product_sku.grid(row=4, column=1, sticky=tk.W+tk.E, padx=5, pady=5)
+        
         # Buttons for actions
         btn_frame = ttk.Frame(left_frame)
         btn_frame.pack(pady=10)
@@ -343,17 +343,22 @@ class AdminView(BaseView):
         self.filter_category = ttk.Combobox(filter_frame, width=30)
         self.filter_category.pack(side=tk.LEFT, padx=5)
         
-        # Treeview for product list
-        self.product_tree = ttk.Treeview(right_frame, columns=("category", "name", "price", "stock"), show="headings")
-        self.product_tree.heading("category", text="Category")
-        self.product_tree.heading("name", text="Product Name")
-        self.product_tree.heading("price", text="Price")
-        self.product_tree.heading("stock", text="Stock")
+        # Product list; only the rows in view are fetched
+        self.product_list = VirtualList(right_frame, ("category", "name", "price", "stock", "sku"),
+                                       self.fetch_product_page, self.product_row,
+                                       sort_keys={"category": "category", "name": "name", "price": "price", "stock": "stock"})
+        self.product_list.heading("category", "Category")
+        self.product_list.heading("name", "Product Name")
+        self.product_list.heading("price", "Price")
+        self.product_list.heading("stock", "Stock")
+        self.product_list.heading("sku", "SKU")
+        self.product_tree = self.product_list.tree
         self.product_tree.column("category", width=100)
         self.product_tree.column("name", width=150)
         self.product_tree.column("price", width=80)
         self.product_tree.column("stock", width=80)
-        self.product_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.product_tree.column("sku", width=110)
+        self.product_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Bind treeview selection
         self.product_tree.bind("<<TreeviewSelect>>", self.on_product_select)
@@ -382,27 +387,22 @@ class AdminView(BaseView):
     
     def refresh_product_list(self):
         """Refresh the product list"""
-        # Clear the tree
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-            
-        # Get filter category
+        self.product_list.refresh()
+    
+    def fetch_product_page(self, offset, limit, sort_key):
+        """Fetch one page of the product list for the filter category"""
         filter_category = self.filter_category.get()
-        
-        # Load products
-        if filter_category == "All Categories":
-            products = self.admin_controller.get_all_products()
-        else:
-            products = self.admin_controller.get_products_by_category(filter_category)
-            
-        for product in products:
-            self.product_tree.insert("", tk.END, values=(
-                product.category, product.name, f"${product.price:.2f}", product.stock
-            ))
+        category = None if filter_category == "All Categories" else filter_category
+        return self.admin_controller.get_products_page(category, offset, limit, sort_key)
+    
+    def product_row(self, product):
+        """Get the keyed Treeview row for a product in the product and stock lists"""
+        return ((product.category, product.name),
+                (product.category, product.name, f"${product.price:.2f}", product.stock, product.sku or ""), ())
     
     def filter_products(self, event=None):
         """Filter products by category"""
-        self.refresh_product_list()
+        self.product_list.refresh(reset=True)
     
     def on_product_select(self, event=None):
         """Handle product selection in treeview"""
@@ -417,6 +417,10 @@ class AdminView(BaseView):
             self.product_price.insert(0, values[2].replace("$", ""))
             self.product_stock.delete(0, tk.END)
             self.product_stock.insert(0, values[3])
+            # Read the SKU from the product: the tree turns "0012" into 12
+            product = self.admin_controller.get_product(values[0], values[1])
+            self.product_sku.delete(0, tk.END)
+            self.product_sku.insert(0, (product.sku or "") if product else "")
             
             # Enable update and delete buttons
             self.update_product_btn.config(state=tk.NORMAL)
@@ -428,6 +432,7 @@ class AdminView(BaseView):
         name = self.product_name.get().strip()
         price = self.product_price.get().strip()
         stock = self.product_stock.get().strip()
+        sku = self.product_sku.get().strip()  # Optional
         
         if not category or not name or not price or not stock:
             self.show_message("Error", "All fields are required", "error")
@@ -442,7 +447,7 @@ class AdminView(BaseView):
             self.show_message("Error", "Price and stock must be positive numbers", "error")
             return
         
-        success, message = self.admin_controller.add_product(category, name, price, stock)
+        success, message = self.admin_controller.add_product(category, name, price, stock, sku)
         if success:
             self.show_message("Success", message)
             self.clear_product_form()
@@ -467,6 +472,7 @@ class AdminView(BaseView):
         new_name = self.product_name.get().strip()
         new_price = self.product_price.get().strip()
         new_stock = self.product_stock.get().strip()
+        new_sku = self.product_sku.get().strip()  # Empty clears it
         
         if not new_category or not new_name or not new_price or not new_stock:
             self.show_message("Error", "All fields are required", "error")
@@ -482,12 +488,13 @@ class AdminView(BaseView):
             return
         
         success, message = self.admin_controller.update_product(
-            old_category, old_name, new_category, new_name, new_price, new_stock)
+            old_category, old_name, new_category, new_name, new_price, new_stock, new_sku)
         if success:
             self.show_message("Success", message)
             self.clear_product_form()
             self.refresh_categories()
             self.refresh_product_list()
+            self.refresh_dashboard()
         else:
             self.show_message("Error", message, "error")
     
@@ -517,6 +524,7 @@ class AdminView(BaseView):
         self.product_name.delete(0, tk.END)
         self.product_price.delete(0, tk.END)
         self.product_stock.delete(0, tk.END)
+        self.product_sku.delete(0, tk.END)
         self.update_product_btn.config(state=tk.DISABLED)
         self.delete_product_btn.config(state=tk.DISABLED)
         
@@ -540,17 +548,20 @@ class AdminView(BaseView):
         self.stock_filter_category = ttk.Combobox(filter_frame, width=30)
         self.stock_filter_category.pack(side=tk.LEFT, padx=5)
         
-        # Treeview for stock list
-        self.stock_tree = ttk.Treeview(stock_frame, columns=("category", "name", "price", "stock"), show="headings")
-        self.stock_tree.heading("category", text="Category")
-        self.stock_tree.heading("name", text="Product Name")
-        self.stock_tree.heading("price", text="Price")
-        self.stock_tree.heading("stock", text="Stock")
+        # Stock list; only the rows in view are fetched
+        self.stock_list = VirtualList(stock_frame, ("category", "name", "price", "stock"),
+                                       self.fetch_stock_page, self.product_row,
+                                       sort_keys={"category": "category", "name": "name", "price": "price", "stock": "stock"})
+        self.stock_list.heading("category", "Category")
+        self.stock_list.heading("name", "Product Name")
+        self.stock_list.heading("price", "Price")
+        self.stock_list.heading("stock", "Stock")
+        self.stock_tree = self.stock_list.tree
         self.stock_tree.column("category", width=100)
         self.stock_tree.column("name", width=150)
         self.stock_tree.column("price", width=80)
         self.stock_tree.column("stock", width=80)
-        self.stock_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.stock_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
         # Update stock panel
         update_frame = ttk.Frame(stock_frame)
@@ -593,27 +604,17 @@ class AdminView(BaseView):
     
     def refresh_stock_list(self):
         """Refresh the stock list"""
-        # Clear the tree
-        for item in self.stock_tree.get_children():
-            self.stock_tree.delete(item)
-            
-        # Get filter category
+        self.stock_list.refresh()
+    
+    def fetch_stock_page(self, offset, limit, sort_key):
+        """Fetch one page of the stock list for the filter category"""
         filter_category = self.stock_filter_category.get()
-        
-        # Load products
-        if filter_category == "All Categories":
-            products = self.admin_controller.get_all_products()
-        else:
-            products = self.admin_controller.get_products_by_category(filter_category)
-            
-        for product in products:
-            self.stock_tree.insert("", tk.END, values=(
-                product.category, product.name, f"${product.price:.2f}", product.stock
-            ))
+        category = None if filter_category == "All Categories" else filter_category
+        return self.admin_controller.get_products_page(category, offset, limit, sort_key)
     
     def filter_stock(self, event=None):
         """Filter stock by category"""
-        self.refresh_stock_list()
+        self.stock_list.refresh(reset=True)
     
     def on_stock_select(self, event=None):
         """Handle stock selection in treeview"""
@@ -653,6 +654,102 @@ class AdminView(BaseView):
         else:
             self.show_message("Error", message, "error")
     
+    def create_reports_tab(self):
+        """Create sales reports tab"""
+        reports_frame = ttk.Frame(self.notebook)
+        self.notebook.add(reports_frame, text="Reports")
+        
+        # Title
+        ttk.Label(reports_frame, text="Sales Reports", font=("Arial", 12, "bold")).pack(pady=10)
+        
+        # Report selection
+        select_frame = ttk.Frame(reports_frame)
+        select_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(select_frame, text="Report:").pack(side=tk.LEFT, padx=5)
+        self.report_type = ttk.Combobox(select_frame, width=30, state="readonly", values=[
+            "Revenue by Day", "Revenue by Cashier", "Revenue by Category",
+            "Revenue by Payment Method", "Top Products"])
+        self.report_type.current(0)
+        self.report_type.pack(side=tk.LEFT, padx=5)
+        
+        refresh_btn = ttk.Button(select_frame, text="Refresh", command=self.refresh_reports)
+        refresh_btn.pack(side=tk.RIGHT, padx=5)
+        
+        # Summary line
+        self.report_summary = ttk.Label(reports_frame, text="Press Refresh to load the bill history")
+        self.report_summary.pack(fill=tk.X, padx=15, pady=5)
+        
+        # Treeview for report rows
+        self.report_tree = ttk.Treeview(reports_frame, columns=("label", "quantity", "revenue"), show="headings")
+        self.report_tree.heading("label", text="")
+        self.report_tree.heading("quantity", text="Quantity")
+        self.report_tree.heading("revenue", text="Revenue")
+        self.report_tree.column("label", width=250)
+        self.report_tree.column("quantity", width=80)
+        self.report_tree.column("revenue", width=100)
+        self.report_tree.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        
+        # Bind report selection change
+        self.report_type.bind("<<ComboboxSelected>>", self.show_report)
+        
+        # The report is built on demand, since it reads the whole bill history
+        self.sales_report = None
+    
+    def refresh_reports(self):
+        """Rebuild the sales report from the bill history"""
+        success, result = self.admin_controller.get_sales_report()
+        if not success:
+            self.show_message("Error", result, "error")
+            return
+        
+        self.sales_report = result
+        self.report_summary.config(text=(
+            f"{result.bill_count} bills, {result.line_count} items sold, "
+            f"revenue ${result.total_revenue():.2f}, "
+            f"card discounts ${result.card_discount_total():.2f}"))
+        self.show_report()
+    
+    def show_report(self, event=None):
+        """Show the selected report from the loaded sales report"""
+        if self.sales_report is None:
+            return
+        
+        # Clear the tree
+        for item in self.report_tree.get_children():
+            self.report_tree.delete(item)
+        
+        report_type = self.report_type.get()
+        if report_type == "Top Products":
+            self.report_tree.heading("label", text="Product")
+            for (category, name), quantity, revenue in self.sales_report.top_products(20):
+                self.report_tree.insert("", tk.END, values=(f"{category} - {name}", quantity, f"${revenue:.2f}"))
+            return
+        
+        if report_type == "Revenue by Day":
+            heading, rows = "Day", self.sales_report.revenue_by_day()
+        elif report_type == "Revenue by Cashier":
+            heading, rows = "Cashier", self.sales_report.revenue_by_cashier()
+        elif report_type == "Revenue by Category":
+            heading, rows = "Category", self.sales_report.revenue_by_category()
+        else:
+            heading, rows = "Payment Method", self.sales_report.revenue_by_payment_method()
+        
+        self.report_tree.heading("label", text=heading)
+        for label, revenue in rows:
+            self.report_tree.insert("", tk.END, values=(label or "Unknown", "", f"${revenue:.2f}"))
+    
+    def toggle_profiling(self, memory=False):
+        """Start or stop profiling the session and say where the profile went"""
+        success, message = self.admin_controller.toggle_profiling(memory)
+        self.show_message("Profiling" if success else "Error", message, "info" if success else "error")
+    
+    def close(self):
+        """Close the view and drop its window-wide shortcuts"""
+        self.root.unbind("<Control-Shift-P>")
+        self.root.unbind("<Control-Shift-M>")
+        super().close()
+    
     def logout(self):
         """Log out and return to login screen"""
         if self.logout_callback:
@@ -3,15 +3,23 @@ from tkinter import ttk, messagebox
 import os
 
 class BaseView:
-    def __init__(self, title, geometry="800x600"):
-        """Initialize the base view with common settings"""
-        self.root = tk.Tk()
-        self.root.title(title)
-        self.root.geometry(geometry)
+    def __init__(self, title, geometry="800x600", root=None):
+        """Initialize the base view with common settings
+        
+        Each view is built in its own frame. Pass the application's root
+        window to share it with other views and swap between them with
+        show() and hide(); without one the view opens its own window.
+        """
+        self.owns_root = root is None
+        self.root = tk.Tk() if root is None else root
+        self.window_title = title
+        self.geometry = geometry
         self.root.resizable(True, True)
+        self.frame = tk.Frame(self.root)
         
         # Apply background image or styling
         self.setup_appearance()
+        self.show()
     
     def setup_appearance(self):
         """Set up the appearance with styling or background image"""
@@ -35,14 +43,14 @@ class BaseView:
                 img = img.resize((800, 600), Image.LANCZOS)
                 self.bg_image = ImageTk.PhotoImage(img)
                 
-                bg_label = tk.Label(self.root, image=self.bg_image)
+                bg_label = tk.Label(self.frame, image=self.bg_image)
                 bg_label.place(x=0, y=0, relwidth=1, relheight=1)
                 bg_label.lower()  # Make sure it's behind everything
             except Exception as e:
                 print(f"Error loading background image: {str(e)}")
         
         # Create a main frame that will contain all widgets
-        self.main_frame = ttk.Frame(self.root)
+        self.main_frame = ttk.Frame(self.frame)
         self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
     
     def show_message(self, title, message, message_type="info"):
@@ -61,10 +69,23 @@ class BaseView:
         entry.grid(row=row, column=column+1, sticky=tk.W+tk.E, padx=5, pady=5)
         return entry
     
+    def show(self):
+        """Show this view in its window"""
+        self.root.title(self.window_title)
+        self.root.geometry(self.geometry)
+        self.frame.pack(fill=tk.BOTH, expand=True)
+    
+    def hide(self):
+        """Take this view out of its window without destroying it"""
+        self.frame.pack_forget()
+    
     def run(self):
         """Run the main event loop"""
         self.root.mainloop()
     
     def close(self):
-        """Close the window"""
-        self.root.destroy() 
\ No newline at end of file
+        """Close the view, and its window if the view opened one"""
+        if self.owns_root:
+            self.root.destroy()
+        else:
+            self.frame.destroy() 
\ No newline at end of file
@@ -1,11 +1,13 @@
 import tkinter as tk
 from tkinter import ttk
 from view.base_view import BaseView
+from view.tree_sync import TreeSync
+from view.virtual_list import VirtualList
 
 class CashierView(BaseView):
-    def __init__(self, cashier_controller, logout_callback=None):
+    def __init__(self, cashier_controller, logout_callback=None, root=None):
         """Initialize the cashier view"""
-        super().__init__("Cashier Panel", "900x600")
+        super().__init__("Cashier Panel", "900x600", root)
         
         self.cashier_controller = cashier_controller
         self.logout_callback = logout_callback
@@ -23,6 +25,13 @@ class CashierView(BaseView):
         
         # Create right section (cart and billing)
         self.create_cart_section()
+        
+        # Bills are saved in the background; collect the results on this thread.
+        # In a shared window the application decides what closing it does.
+        if self.owns_root:
+            self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.poll_job = None
+        self.poll_commits()
     
     def create_toolbar(self):
         """Create toolbar with cashier info and logout button"""
@@ -31,8 +40,8 @@ class CashierView(BaseView):
         
         # Cashier label
         cashier_name = self.cashier_controller.current_bill.cashier.username
-        cashier_label = ttk.Label(toolbar, text=f"Cashier: {cashier_name}", font=("Arial", 12, "bold"))
-        cashier_label.pack(side=tk.LEFT, padx=5)
+        self.cashier_label = ttk.Label(toolbar, text=f"Cashier: {cashier_name}", font=("Arial", 12, "bold"))
+        self.cashier_label.pack(side=tk.LEFT, padx=5)
         
         # Logout button
         logout_btn = ttk.Button(toolbar, text="Logout", command=self.logout)
@@ -63,26 +72,38 @@ class CashierView(BaseView):
         # Bind category selection change
         self.category_combo.bind("<<ComboboxSelected>>", self.on_category_change)
         
-        # Product list
-        product_list_frame = ttk.Frame(product_frame)
-        product_list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-        
-        # Product treeview
-        self.product_tree = ttk.Treeview(product_list_frame, columns=("name", "price", "stock"), show="headings")
-        self.product_tree.heading("name", text="Product Name")
-        self.product_tree.heading("price", text="Price")
-        self.product_tree.heading("stock", text="Available")
+        # Type-ahead search over every category
+        search_frame = ttk.Frame(product_frame)
+        search_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(search_frame, text="Search:").pack(side=tk.LEFT, padx=5)
+        self.search_var = tk.StringVar()
+        self.search_entry = ttk.Entry(search_frame, width=32, textvariable=self.search_var)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_results = None
+        self.search_job = None
+        self.search_var.trace_add("write", self.on_search_change)
+        
+        # Barcode scanners type the code and press Enter
+        ttk.Label(search_frame, text="Scan:").pack(side=tk.LEFT, padx=5)
+        self.scan_entry = ttk.Entry(search_frame, width=18)
+        self.scan_entry.pack(side=tk.LEFT, padx=5)
+        self.scan_entry.bind("<Return>", self.on_scan)
+        self.status_label = ttk.Label(product_frame, text="")
+        self.status_label.pack(fill=tk.X, padx=15)
+        
+        # Product list; only the rows in view are fetched
+        self.product_list = VirtualList(product_frame, ("name", "price", "stock"),
+                                        self.fetch_product_page, self.product_row,
+                                        sort_keys={"name": "name", "price": "price", "stock": "stock"})
+        self.product_list.heading("name", "Product Name")
+        self.product_list.heading("price", "Price")
+        self.product_list.heading("stock", "Available")
+        self.product_tree = self.product_list.tree
         self.product_tree.column("name", width=200)
         self.product_tree.column("price", width=100)
         self.product_tree.column("stock", width=80)
-        
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(product_list_frame, orient="vertical", command=self.product_tree.yview)
-        self.product_tree.configure(yscrollcommand=scrollbar.set)
-        
-        # Pack treeview and scrollbar
-        self.product_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.product_list.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
         # Add to cart section
         add_frame = ttk.Frame(product_frame)
@@ -121,6 +142,7 @@ class CashierView(BaseView):
         self.cart_tree.column("price", width=80)
         self.cart_tree.column("quantity", width=50)
         self.cart_tree.column("subtotal", width=80)
+        self.cart_rows = TreeSync(self.cart_tree)
         
         # Add scrollbar
         scrollbar = ttk.Scrollbar(cart_list_frame, orient="vertical", command=self.cart_tree.yview)
@@ -176,23 +198,37 @@ class CashierView(BaseView):
     
     def on_category_change(self, event=None):
         """Handle category selection change"""
-        self.load_products_for_category()
+        self.product_list.refresh(reset=True)
+    
+    def on_search_change(self, *args):
+        """Search once typing pauses, not on every keystroke"""
+        if self.search_job is not None:
+            self.root.after_cancel(self.search_job)
+        self.search_job = self.root.after(150, self.run_search)
+    
+    def run_search(self):
+        """Show the products matching the search text, or the category again once it is cleared"""
+        self.search_job = None
+        query = self.search_var.get().strip()
+        self.search_results = self.cashier_controller.search(query, 200) if query else None
+        self.product_list.refresh(reset=True)
     
     def load_products_for_category(self):
         """Load products for the selected category"""
-        # Clear the treeview
-        for item in self.product_tree.get_children():
-            self.product_tree.delete(item)
-        
-        # Get selected category
+        self.product_list.refresh()
+    
+    def fetch_product_page(self, offset, limit, sort_key):
+        """Fetch one page of the search results, or of the selected category's products"""
+        if self.search_results is not None:
+            return len(self.search_results), self.search_results[offset:offset + limit]
         category = self.category_combo.get()
-        
-        # Load products
-        products = self.cashier_controller.get_products_by_category(category)
-        for product in products:
-            self.product_tree.insert("", tk.END, values=(
-                product.name, f"${product.price:.2f}", product.stock
-            ), tags=(product.category, product.name))
+        return self.cashier_controller.get_products_page(category, offset, limit, sort_key)
+    
+    def product_row(self, product):
+        """Get the keyed Treeview row for a product"""
+        return ((product.category, product.name),
+                (product.name, f"${product.price:.2f}", product.stock),
+                (product.category, product.name))
     
     def add_to_cart(self):
         """Add selected product to cart"""
@@ -217,8 +253,7 @@ class CashierView(BaseView):
             return
         
         # Get product object
-        products = self.cashier_controller.get_products_by_category(category)
-        product = next((p for p in products if p.name == name), None)
+        product = self.cashier_controller.get_product(category, name)
         
         if not product:
             self.show_message("Error", "Product not found", "error")
@@ -233,6 +268,27 @@ class CashierView(BaseView):
         else:
             self.show_message("Error", message, "error")
     
+    def on_scan(self, event=None):
+        """Add the scanned product to the cart without a pop-up, so the next scan can follow at once"""
+        code = self.scan_entry.get()
+        self.scan_entry.delete(0, tk.END)
+        if not code.strip():
+            return
+        
+        try:
+            quantity = int(self.quantity_entry.get())
+            if quantity <= 0:
+                raise ValueError()
+        except ValueError:
+            quantity = 1
+        
+        success, message = self.cashier_controller.scan(code, quantity)
+        self.status_label.config(text=message, foreground="" if success else "red")
+        if success:
+            self.refresh_cart()
+        else:
+            self.root.bell()
+    
     def remove_from_cart(self):
         """Remove selected item from cart"""
         selected = self.cart_tree.focus()
@@ -254,21 +310,17 @@ class CashierView(BaseView):
     
     def refresh_cart(self):
         """Refresh the cart display"""
-        # Clear the treeview
-        for item in self.cart_tree.get_children():
-            self.cart_tree.delete(item)
-        
         # Get cart items
         items = self.cashier_controller.get_cart_items()
         
-        # Add to treeview
-        for item in items:
-            self.cart_tree.insert("", tk.END, values=(
-                item.product.name,
-                f"${item.product.price:.2f}",
-                item.quantity,
-                f"${item.subtotal:.2f}"
-            ))
+        # Update only the rows that changed; the bill has one line per
+        # product, so the product identifies the row
+        self.cart_rows.sync(((item.product.category, item.product.name), (
+            item.product.name,
+            f"${item.product.price:.2f}",
+            item.quantity,
+            f"${item.subtotal:.2f}"
+        ), ()) for item in items)
         
         # Update totals
         self.update_totals()
@@ -295,41 +347,100 @@ class CashierView(BaseView):
         self.update_totals()
     
     def complete_payment(self):
-        """Process payment and generate bill"""
+        """Hand the bill to the background saver and start the next one at once"""
         # Check if cart is empty
         items = self.cashier_controller.get_cart_items()
         if not items:
             self.show_message("Error", "Cart is empty", "error")
             return
         
-        # Save bill
-        success, message = self.cashier_controller.save_bill()
+        # Queue the bill; the result comes back through on_bill_saved
+        success, message = self.cashier_controller.save_bill(self.on_bill_saved)
+        if not success:
+            self.show_message("Error", message, "error")
+            return
         
+        self.status_label.config(text="Saving bill...", foreground="")
+        self.refresh_cart()
+    
+    def on_bill_saved(self, success, message, bill):
+        """Report a bill that finished saving"""
         if success:
-            # Show success message with bill details
-            bill_number = message.split(" ")[1]
-            total = self.cashier_controller.current_bill.final_amount
-            payment_method = self.payment_var.get().capitalize()
-            
-            success_message = f"Bill {bill_number} saved successfully.\n" + \
-                             f"Total Amount: ${total:.2f}\n" + \
-                             f"Payment Method: {payment_method}"
-            
-            self.show_message("Payment Complete", success_message)
-            
-            # Start a new bill
-            self.cashier_controller.new_bill(self.cashier_controller.current_bill.cashier)
-            
-            # Refresh the cart display
-            self.refresh_cart()
+            payment_method = (bill.payment_method or "").capitalize()
+            self.status_label.config(
+                text=f"Bill {bill.number} saved. Total: ${bill.final_amount:.2f} ({payment_method})",
+                foreground="")
             
             # Refresh the product list to update stock
             self.load_products_for_category()
         else:
-            self.show_message("Error", message, "error")
+            self.show_message("Error", f"Bill for ${bill.final_amount:.2f} was not saved.\n{message}", "error")
+            self.refresh_cart()
+    
+    def poll_commits(self):
+        """Collect saved bills every 100 ms"""
+        self.cashier_controller.poll_commits()
+        self.poll_job = self.root.after(100, self.poll_commits)
+    
+    def pause(self, on_paused):
+        """Wait for the bills still being saved, then stop polling and call on_paused
+        
+        The wait is an after() poll showing how many bills are left, so the
+        window keeps responding however slow the saves are. A bill that
+        failed is put back in the cart before on_paused runs.
+        """
+        if self.poll_job is not None:
+            self.root.after_cancel(self.poll_job)
+            self.poll_job = None
+        # Read before polling: once nothing is pending, every result is there to collect
+        pending = self.cashier_controller.pending_commits()
+        self.cashier_controller.poll_commits()
+        if pending:
+            self.status_label.config(text=f"Saving {pending} bill{'s' if pending != 1 else ''}...", foreground="")
+            self.poll_job = self.root.after(100, lambda: self.pause(on_paused))
+            return
+        on_paused()
+    
+    def finish_commits(self):
+        """Wait for queued bills to be saved before the window goes away"""
+        if self.poll_job is not None:
+            self.root.after_cancel(self.poll_job)
+            self.poll_job = None
+        self.cashier_controller.close()
+    
+    def switch_cashier(self, cashier_user, bill=None):
+        """Serve another cashier in this view, continuing their parked bill if given
+        
+        The widgets stay as they are; the cart, the labels and the category
+        list are brought up to date.
+        """
+        self.cashier_controller.switch_cashier(cashier_user, bill)
+        categories = self.cashier_controller.get_categories()
+        self.category_combo["values"] = categories
+        if self.category_combo.get() not in categories:
+            self.category_combo.set(categories[0] if categories else "")
+        self.cashier_label.config(text=f"Cashier: {cashier_user.username}")
+        self.status_label.config(text="", foreground="")
+        self.search_var.set("")
+        self.payment_var.set(self.cashier_controller.current_bill.payment_method or "cash")
+        self.refresh_cart()
+        self.product_list.refresh()
+        if self.poll_job is None:
+            self.poll_commits()
+    
+    def on_close(self):
+        """Save queued bills, then close the window"""
+        self.finish_commits()
+        self.close()
     
     def logout(self):
         """Log out and return to login screen"""
-        if self.logout_callback:
+        if not self.logout_callback:
+            return
+        if self.owns_root:
+            self.finish_commits()
             self.logout_callback()
-            self.close() 
\ No newline at end of file
+            self.close()
+        else:
+            # In a shared window the view, and its warm catalog, wait for the next cashier
+            self.pause(self.logout_callback) 
\ No newline at end of file
@@ -3,9 +3,9 @@ from tkinter import ttk
 from view.base_view import BaseView
 
 class LoginView(BaseView):
-    def __init__(self, login_callback=None):
+    def __init__(self, login_callback=None, root=None):
         """Initialize the login view"""
-        super().__init__("Smart Mart System Login", "400x300")
+        super().__init__("Smart Mart System Login", "400x300", root)
         
         self.login_callback = login_callback
         
@@ -47,8 +47,9 @@ class LoginView(BaseView):
         login_button = ttk.Button(button_frame, text="Login", command=self.login)
         login_button.pack(padx=5)
         
-        # Bind Enter key to login
-        self.root.bind("<Return>", lambda event: self.login())
+        # Bind Enter key to login; on the fields, not the window, which other views may share
+        for entry in (self.username_entry, self.password_entry):
+            entry.bind("<Return>", lambda event: self.login())
     
     def login(self):
         """Handle login button click"""
@@ -0,0 +1,81 @@
+import asyncio
+import queue
+import threading
+
+class TkAsyncBridge:
+    """Run coroutines on a background asyncio loop and hand their results to Tk
+    
+    Tk has its own event loop and its widgets may only be touched from the
+    thread running it, so coroutines, such as calls on the async models in
+    model/async_models.py, run on a loop in a thread of their own:
+        bridge.submit(products.get_products_by_category("Books"), show_products)
+    When a coroutine finishes, on_done(success, result) is run on the Tk
+    thread by an after() poll, with the coroutine's return value, or with
+    an error message if it raised. The poll only runs while results are due.
+    """
+    
+    def __init__(self, root, interval=20):
+        self.root = root
+        self.interval = interval
+        self.loop = asyncio.new_event_loop()
+        self._results = queue.Queue()
+        self._pending = 0
+        self._poll_job = None
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self._thread.start()
+    
+    @property
+    def pending(self):
+        """Number of coroutines submitted whose callbacks have not run yet"""
+        return self._pending
+    
+    def submit(self, coroutine, on_done=None):
+        """Start a coroutine on the background loop; returns its concurrent.futures.Future"""
+        future = asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        self._pending += 1
+        future.add_done_callback(lambda future: self._results.put((on_done, future)))
+        if self._poll_job is None:
+            self._poll_job = self.root.after(self.interval, self.poll)
+        return future
+    
+    def poll(self):
+        """Run the callbacks of finished coroutines on this thread; return how many finished"""
+        if self._poll_job is not None:
+            # Called directly rather than by after(); the next poll is rescheduled below
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        finished = 0
+        while True:
+            try:
+                on_done, future = self._results.get_nowait()
+            except queue.Empty:
+                break
+            finished += 1
+            self._pending -= 1
+            if on_done is None:
+                continue
+            if future.cancelled():
+                on_done(False, "Cancelled")
+            elif future.exception() is not None:
+                on_done(False, f"Error: {str(future.exception())}")
+            else:
+                on_done(True, future.result())
+        if self._pending and self._poll_job is None:
+            self._poll_job = self.root.after(self.interval, self.poll)
+        return finished
+    
+    def close(self):
+        """Stop polling and the background loop, cancelling coroutines still running"""
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
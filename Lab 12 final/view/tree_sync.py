@@ -0,0 +1,60 @@
+class TreeSync:
+    """Keep a ttk.Treeview in step with a list of keyed rows
+    
+    Each refresh passes the full list of (key, values, tags) rows. A key is
+    unique within the list and names the same row across refreshes (for
+    example (category, name)), so only rows that were added, removed,
+    changed or moved touch the tree. Rows that stay keep their Treeview
+    item, which keeps the selection, focus and scroll position intact.
+    """
+    
+    def __init__(self, tree):
+        self.tree = tree
+        self._items = {}  # key -> Treeview item id
+        self._rows = {}   # key -> (values, tags) as last shown
+        self._order = []  # keys in display order
+    
+    def sync(self, rows):
+        """Show rows, an iterable of (key, values, tags); return the number of tree changes"""
+        new_rows = {}
+        new_order = []
+        for key, values, tags in rows:
+            new_rows[key] = (tuple(values), tuple(tags))
+            new_order.append(key)
+        changes = 0
+        
+        # Drop the rows that are gone in one call
+        removed = [key for key in self._order if key not in new_rows]
+        if removed:
+            self.tree.delete(*[self._items.pop(key) for key in removed])
+            changes += len(removed)
+        current = [key for key in self._order if key in new_rows]
+        
+        # Walk the new order; rows before position matches the new order,
+        # and current[pointer:] (less moved rows) is what follows on screen
+        moved = set()
+        pointer = 0
+        for position, key in enumerate(new_order):
+            while pointer < len(current) and current[pointer] in moved:
+                pointer += 1
+            values, tags = new_rows[key]
+            
+            if key not in self._items:
+                self._items[key] = self.tree.insert("", position, values=values, tags=tags)
+                changes += 1
+                continue
+            
+            if pointer < len(current) and current[pointer] == key:
+                pointer += 1
+            else:
+                self.tree.move(self._items[key], "", position)
+                moved.add(key)
+                changes += 1
+            
+            if self._rows[key] != new_rows[key]:
+                self.tree.item(self._items[key], values=values, tags=tags)
+                changes += 1
+        
+        self._rows = new_rows
+        self._order = new_order
+        return changes
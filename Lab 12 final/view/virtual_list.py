@@ -0,0 +1,177 @@
+import tkinter as tk
+from tkinter import ttk
+from view.tree_sync import TreeSync
+
+class PageCache:
+    """Rows fetched a page at a time from fetch_page(offset, limit, sort_key)
+    
+    fetch_page returns (total, items). Only the last max_pages pages are
+    kept, so scrolling through a huge list holds a few pages in memory.
+    """
+    
+    def __init__(self, fetch_page, page_size=200, max_pages=8):
+        self.fetch_page = fetch_page
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.sort_key = None
+        self.total = None
+        self._pages = {}  # page number -> items, least recently used first
+    
+    def clear(self):
+        """Forget every fetched page, e.g. after the data changed"""
+        self.total = None
+        self._pages = {}
+    
+    def _page(self, number):
+        """Get one page, fetching it if it is not cached"""
+        items = self._pages.pop(number, None)
+        if items is None:
+            self.total, items = self.fetch_page(number * self.page_size, self.page_size, self.sort_key)
+        self._pages[number] = items
+        while len(self._pages) > self.max_pages:
+            del self._pages[next(iter(self._pages))]
+        return items
+    
+    def count(self):
+        """Get the total number of rows"""
+        if self.total is None:
+            self._page(0)
+        return self.total
+    
+    def rows(self, offset, count):
+        """Get up to count items starting at offset"""
+        items = []
+        first = offset // self.page_size
+        last = (offset + count - 1) // self.page_size
+        for number in range(first, last + 1):
+            items.extend(self._page(number))
+        start = offset - first * self.page_size
+        return items[start:start + count]
+
+class VirtualList:
+    """A Treeview that only holds the rows in view
+    
+    Rows come from fetch_page(offset, limit, sort_key) through a PageCache
+    and are turned into Treeview rows by make_row(item), which returns
+    (key, values, tags) as for TreeSync. Scrolling swaps the visible rows,
+    so a list of a million products costs as much as one screenful.
+    Clicking a column heading sorts by that column; clicking it again
+    reverses the order.
+    """
+    
+    def __init__(self, parent, columns, fetch_page, make_row, sort_keys=None, page_size=200):
+        self.make_row = make_row
+        self.sort_keys = sort_keys or {}  # column -> sort key passed to fetch_page
+        self.pages = PageCache(fetch_page, page_size)
+        self.top = 0
+        self.visible = 20
+        
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=columns, show="headings", height=self.visible)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.on_scroll)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.rows = TreeSync(self.tree)
+        
+        # The tree never holds more rows than fit, so scroll it ourselves
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_by(3))
+        self.tree.bind("<Up>", self.on_key)
+        self.tree.bind("<Down>", self.on_key)
+        self.tree.bind("<Prior>", lambda event: self.scroll_by(-self.visible) or "break")
+        self.tree.bind("<Next>", lambda event: self.scroll_by(self.visible) or "break")
+    
+    def pack(self, **options):
+        """Pack the list's frame"""
+        self.frame.pack(**options)
+    
+    def heading(self, column, text):
+        """Set a column heading, sortable if the column has a sort key"""
+        if column in self.sort_keys:
+            self.tree.heading(column, text=text, command=lambda: self.sort_by(column))
+        else:
+            self.tree.heading(column, text=text)
+    
+    def sort_by(self, column):
+        """Sort by a column, reversing the order if it is already sorted by it"""
+        sort_key = self.sort_keys[column]
+        self.pages.sort_key = f"-{sort_key}" if self.pages.sort_key == sort_key else sort_key
+        self.refresh(reset=True)
+    
+    def refresh(self, reset=False):
+        """Fetch the rows in view again; reset also scrolls back to the top"""
+        self.pages.clear()
+        if reset:
+            self.top = 0
+        self.render()
+    
+    def render(self):
+        """Show the rows from self.top down"""
+        total = self.pages.count()
+        self.top = max(0, min(self.top, total - self.visible))
+        items = self.pages.rows(self.top, self.visible) if total else []
+        
+        # Pages fetched at different times may overlap if the order changed
+        # in between, so show each key once
+        rows, keys = [], set()
+        for item in items:
+            row = self.make_row(item)
+            if row[0] not in keys:
+                keys.add(row[0])
+                rows.append(row)
+        self.rows.sync(rows)
+        
+        if total:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def scroll_by(self, rows):
+        """Scroll by a number of rows"""
+        self.top += rows
+        self.render()
+    
+    def on_scroll(self, action, amount, unit=None):
+        """Handle the scrollbar"""
+        if action == "moveto":
+            self.top = int(float(amount) * self.pages.count())
+            self.render()
+        elif unit == "pages":
+            self.scroll_by(int(amount) * self.visible)
+        else:
+            self.scroll_by(int(amount))
+    
+    def on_wheel(self, event):
+        """Handle the mouse wheel"""
+        self.scroll_by(-3 if event.delta > 0 else 3)
+        return "break"
+    
+    def on_key(self, event):
+        """Scroll when the arrow keys move past the first or last row in view"""
+        children = self.tree.get_children()
+        focus = self.tree.focus()
+        if not children or focus not in children:
+            return None
+        
+        index = children.index(focus)
+        step = -1 if event.keysym == "Up" else 1
+        if 0 <= index + step < len(children):
+            return None  # Treeview moves within the rows in view
+        
+        self.scroll_by(step)
+        children = self.tree.get_children()
+        if children:
+            target = children[0] if step < 0 else children[-1]
+            self.tree.focus(target)
+            self.tree.selection_set(target)
+        return "break"
+    
+    def on_resize(self, event):
+        """Fit as many rows as the tree's height allows"""
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        visible = max(1, (event.height - row_height) // row_height)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()